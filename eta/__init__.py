@@ -66,6 +66,19 @@ class ETAConfig(EnvConfig):
         self.default_video_ext = self.parse_string(
             d, "default_video_ext", env_var="ETA_DEFAULT_VIDEO_EXT",
             default=".mp4")
+        self.stream_info_cache_path = self.parse_string(
+            d, "stream_info_cache_path", env_var="ETA_STREAM_INFO_CACHE_PATH",
+            default="")
+        self.stream_info_cache_size = int(self.parse_number(
+            d, "stream_info_cache_size", env_var="ETA_STREAM_INFO_CACHE_SIZE",
+            default=4096))
+        self.video_index_dir = self.parse_string(
+            d, "video_index_dir", env_var="ETA_VIDEO_INDEX_DIR", default="")
+        self.frame_cache_dir = self.parse_string(
+            d, "frame_cache_dir", env_var="ETA_FRAME_CACHE_DIR", default="")
+        self.frame_cache_max_bytes = int(self.parse_number(
+            d, "frame_cache_max_bytes", env_var="ETA_FRAME_CACHE_MAX_BYTES",
+            default=10737418240))
 
 
 def set_config_settings(**kwargs):
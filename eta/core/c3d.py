@@ -246,6 +246,12 @@ class C3DFeaturizerConfig(C3DConfig):
         sample_method: the frame sampling method to use. The possible values
             are "first", "uniform", and "sliding_window"
         stride: the stride to use when the sampling method is "sliding_window"
+        batch_size: the number of sliding window clips to evaluate at a time.
+            The next batch of clips is decoded while the current batch is
+            being evaluated
+        use_frame_cache: whether to read the frames of the videos from the
+            shared `eta.core.video.FrameCache` when the sampling
+            method is "sliding_window"
     '''
 
     def __init__(self, d):
@@ -253,6 +259,9 @@ class C3DFeaturizerConfig(C3DConfig):
         self.sample_method = self.parse_string(
             d, "sample_method", default="sliding_window")
         self.stride = self.parse_number(d, "stride", default=8)
+        self.batch_size = self.parse_number(d, "batch_size", default=32)
+        self.use_frame_cache = self.parse_bool(
+            d, "use_frame_cache", default=False)
 
 
 class C3DFeaturizer(Featurizer):
@@ -290,30 +299,54 @@ class C3DFeaturizer(Featurizer):
         Returns:
             the feature vector, a 1D array of length 4096
         '''
-        clips = self._sample_clips(video_path)
-
-        features = self.c3d.evaluate(clips, layer=self.c3d.fc2l)
         if self.config.sample_method == "sliding_window":
-            # Average over sliding window clips
-            features = np.mean(features, axis=0)
-            features /= np.linalg.norm(features)
-        else:
-            features = features.reshape(-1)
+            return self._featurize_sliding_window(video_path)
 
+        clips = self._sample_clips(video_path)
+        features = self.c3d.evaluate(clips, layer=self.c3d.fc2l)
+        return features.reshape(-1)
+
+    def _featurize_sliding_window(self, video_path):
+        # Average over sliding window clips, which are generated and evaluated
+        # in batches so that the entire video is never held in memory. The
+        # next batch is decoded in the background while the current batch is
+        # being evaluated
+        cache = None
+        if self.config.use_frame_cache:
+            cache = etav.get_frame_cache()
+
+        total = np.zeros(self.dim())
+        count = 0
+        for clips in etav.iter_sliding_window_clips(
+                video_path, 16, self.config.stride,
+                batch_size=int(self.config.batch_size), size=(112, 112),
+                cache=cache, prefetch=True):
+            features = self.c3d.evaluate(clips, layer=self.c3d.fc2l)
+            total += np.sum(features, axis=0)
+            count += len(features)
+
+        if count == 0:
+            raise ValueError(
+                "Video '%s' has fewer than the 16 frames required to extract "
+                "a sliding window clip" % video_path)
+
+        # The clip features are averaged via a running double precision sum,
+        # so memory usage does not grow with the length of the video. The
+        # clips are identical to those generated by
+        # `eta.core.video.sliding_window_sample_frames()`, so the features
+        # only differ from the mean of all clip features by float32 rounding
+        features = (total / count).astype(np.float32)
+        features /= np.linalg.norm(features)
         return features
 
     def _sample_clips(self, video_path):
         sample_method = self.config.sample_method
-        stride = self.config.stride
         size = (112, 112)
 
         if sample_method == "first":
             clips = [etav.sample_first_frames(video_path, 16, size=size)]
         elif sample_method == "uniform":
             clips = [etav.uniformly_sample_frames(video_path, 16, size=size)]
-        elif sample_method == "sliding_window":
-            clips = etav.sliding_window_sample_frames(
-                video_path, 16, stride, size=size)
         else:
             raise ValueError("Invalid sample_method '%s'" % sample_method)
 
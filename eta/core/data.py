@@ -23,6 +23,8 @@ from future.utils import iteritems
 from collections import defaultdict
 import os
 
+import numpy as np
+
 from eta.core.config import no_default
 from eta.core.serial import Container, Serializable, read_json
 import eta.core.utils as etau
@@ -545,6 +547,15 @@ class AttributeContainerSchema(Serializable):
                 "Value '%s' of attribute '%s' is not allowed by the "
                 "schema " % (attr.value, attr.name))
 
+    def compile(self):
+        '''Compiles the schema into a form that can efficiently validate
+        many attributes at once.
+
+        Returns:
+            a CompiledAttributeContainerSchema
+        '''
+        return CompiledAttributeContainerSchema(self)
+
     @classmethod
     def build_active_schema(cls, attrs):
         '''Builds an AttributeContainerSchema that describes the active schema
@@ -568,6 +579,112 @@ class AttributeContainerSchemaError(Exception):
     pass
 
 
+class CompiledAttributeContainerSchema(object):
+    '''A compiled AttributeContainerSchema that validates batches of
+    attributes in a single pass.
+
+    The valid categories and numeric ranges of the attributes are captured
+    when the schema is compiled, so the schema must be recompiled if it is
+    subsequently modified.
+    '''
+
+    def __init__(self, schema):
+        '''Compiles the given AttributeContainerSchema.
+
+        Args:
+            schema: an AttributeContainerSchema
+        '''
+        self._schemas = {}
+        for name, attr_schema in iteritems(schema.schema):
+            if isinstance(attr_schema, CategoricalAttributeSchema):
+                check = _make_categories_check(attr_schema.categories)
+            elif isinstance(attr_schema, NumericAttributeSchema):
+                check = _make_range_check(attr_schema.range)
+            else:
+                check = _make_generic_check(attr_schema)
+            self._schemas[name] = (attr_schema, check)
+
+    def validate_attributes(self, attrs):
+        '''Validates that the attributes are compliant with the schema.
+
+        Args:
+            attrs: an iterable of Attributes
+
+        Raises:
+            AttributeSchemaError: if an attribute is not of the class expected
+                by the schema
+            AttributeContainerSchemaError: if an attribute violates the
+                schema
+        '''
+        groups = defaultdict(list)
+        for attr in attrs:
+            groups[attr.name].append(attr)
+
+        for name, group in iteritems(groups):
+            if name not in self._schemas:
+                raise AttributeContainerSchemaError(
+                    "Attribute '%s' is not allowed by the schema" % name)
+
+            attr_schema, check = self._schemas[name]
+            for attr in _first_of_each_class(group):
+                attr_schema.validate_type(attr)
+
+            idx = check([attr.value for attr in group])
+            if idx is not None:
+                raise AttributeContainerSchemaError(
+                    "Value '%s' of attribute '%s' is not allowed by the "
+                    "schema " % (group[idx].value, name))
+
+
+def _first_of_each_class(objs):
+    first = {}
+    for obj in objs:
+        first.setdefault(obj.__class__, obj)
+    return list(first.values())
+
+
+#
+# The checks below return the index of the first invalid value in the given
+# list, or None if all values are valid
+#
+
+
+def _make_categories_check(categories):
+    categories = frozenset(categories)
+
+    def _check(values):
+        if set(values) <= categories:
+            return None
+        return next(
+            idx for idx, value in enumerate(values)
+            if value not in categories)
+
+    return _check
+
+
+def _make_range_check(range_):
+    range_ = tuple(range_)
+
+    def _check(values):
+        if not range_:
+            return 0
+        values = np.asarray(values, dtype=float)
+        bad = np.flatnonzero(~((values >= range_[0]) & (values <= range_[1])))
+        return int(bad[0]) if bad.size else None
+
+    return _check
+
+
+def _make_generic_check(attr_schema):
+    def _check(values):
+        for idx, value in enumerate(values):
+            if not attr_schema.is_valid_value(value):
+                return idx
+        return None
+
+    return _check
+
+
 class DataFileSequence(Serializable):
     '''Class representing a sequence of data files on disk.
 
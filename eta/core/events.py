@@ -126,6 +126,20 @@ class EventDetection(Serializable):
             events.add(Event(start, len(self.bools)))
         return events
 
+    def _write_binary(self, writer):
+        # The detections are stored as packed bits
+        num_frames = len(self.bools)
+        writer.header["num_frames"] = num_frames
+        writer.write_chunk(
+            np.packbits(np.array(self.bools, dtype=bool)).tobytes(),
+            first=1, last=num_frames)
+
+    @classmethod
+    def _read_binary(cls, reader):
+        bits = np.unpackbits(
+            np.frombuffer(reader.read_chunk(0), dtype=np.uint8))
+        return cls(bools=bits[:reader.header["num_frames"]])
+
     @classmethod
     def from_dict(cls, d):
         '''Constructs a EventDetection from a JSON dictionary.'''
@@ -30,6 +30,7 @@ import cv2
 import numpy as np
 
 from eta.core.config import Config, Configurable
+import eta.core.image as etai
 from eta.core.numutils import GrowableArray
 import eta.core.utils as etau
 import eta.core.types as etat
@@ -70,7 +71,9 @@ class Featurizer(Configurable):
 
     Subclasses of Featurizer must implement the `dim()` and `_featurize()`
     methods, and if necessary, should also implement the `_start()` and
-    `_stop()` methods.
+    `_stop()` methods. Subclasses that can featurize multiple items more
+    efficiently at once should also implement the `_featurize_batch()`
+    method, which, by default, featurizes each item via `_featurize()`.
 
     Subclasses must call the superclass constructor defined by this base class.
 
@@ -184,6 +187,41 @@ class Featurizer(Configurable):
         '''
         raise NotImplementedError("subclass must implement _featurize()")
 
+    def featurize_batch(self, items):
+        '''Featurizes a batch of input data.
+
+        Args:
+            items: a list (or array) of data to featurize
+
+        Returns:
+            a (# items) x (# dims) array whose rows contain the feature
+                vectors
+        '''
+        self.start(warn_on_restart=False, keep_alive=False)
+        X = self._featurize_batch(items)
+        if self._keep_alive is False:
+            self.stop()
+
+        return X
+
+    def _featurize_batch(self, items):
+        '''The backend implementation of the batch feature extraction
+        routine. By default, each item is featurized via `_featurize()`.
+        Subclasses that can featurize batches more efficiently should
+        override this method.
+
+        Args:
+            items: a list (or array) of data to featurize
+
+        Returns:
+            a (# items) x (# dims) array whose rows contain the feature
+                vectors
+        '''
+        if not len(items):
+            return np.zeros((0, self.dim()))
+
+        return np.array([self._featurize(item) for item in items])
+
 
 class CanFeaturize(object):
     '''Mixin class that exposes the ability to featurize data just-in-time via
@@ -381,6 +419,11 @@ class VideoFramesFeaturizerConfig(Config):
         self.frame_featurizer = self.parse_object(
             d, "frame_featurizer", FeaturizerConfig)
         self.frames = self.parse_string(d, "frames", default="*")
+        self.size = self.parse_array(d, "size", default=None)
+        self.pix_fmt = self.parse_string(d, "pix_fmt", default="rgb24")
+        self.use_frame_cache = self.parse_bool(
+            d, "use_frame_cache", default=False)
+        self.batch_size = self.parse_number(d, "batch_size", default=32)
 
 
 class VideoFramesFeaturizer(Featurizer):
@@ -395,7 +438,18 @@ class VideoFramesFeaturizer(Featurizer):
 
     This class also allows a `frame_preprocessor` function to be installed
     that preprocesses each input frame before featurizing it. By default, no
-    preprocessing is performed.
+    preprocessing is performed. Resizing and grayscale conversion are best
+    performed during decoding via the `size` and `pix_fmt` config fields,
+    which are passed to `eta.core.video.FFmpegVideoReader`. When the
+    `use_frame_cache` config field is True, the frames are instead read from
+    the shared `eta.core.video.FrameCache`, so videos that are featurized
+    repeatedly (or by multiple featurizers) are only decoded once.
+
+    Frames that have not yet been featurized are passed to the frame
+    Featurizer in batches of (up to) `batch_size` frames via
+    `Featurizer.featurize_batch()`, so featurizers that support batching,
+    such as `eta.core.vgg16.VGG16Featurizer`, can process multiple frames
+    per evaluation.
 
     **WARNING** if you use the same backing path for multiple videos your
     features will be invalid (features on disk are not overwritten, they are
@@ -533,9 +587,10 @@ class VideoFramesFeaturizer(Featurizer):
 
         Attributes:
             video_path: the input video path
-            frames: an optional frames string to specify the frames of the
-                video to featurize. By default, the value provided in the
-                VideoFramesFeaturizerConfig is used
+            frames: an optional frames string or FrameRanges to specify the
+                frames of the video to featurize, e.g., the frames sampled by
+                `eta.core.video.sample_scene_changes()`. By default, the
+                value provided in the VideoFramesFeaturizerConfig is used
             returnX: whether to return the frames matrix
 
         Returns:
@@ -559,41 +614,45 @@ class VideoFramesFeaturizer(Featurizer):
         frames = frames or self.config.frames
         logger.debug("Featurizing frames %s" % frames)
 
-        if returnX:
-            X = None
-
-        with etav.FFmpegVideoReader(video_path, frames=frames) as vr:
+        X = None
+        if self.config.use_frame_cache:
+            # Videos that are too large to cache are streamed instead
+            open_reader = etav.get_frame_cache().open
+        else:
+            open_reader = etav.FFmpegVideoReader
+
+        batch_size = max(1, int(self.config.batch_size))
+        with open_reader(
+                video_path, frames=frames, size=self.config.size,
+                pix_fmt=self.config.pix_fmt) as vr:
+            # The features of the frames since the last batch was processed,
+            # in order. Frames that must be featurized have None features
+            pending = []
+            imgs = []
             for img in vr:
                 self.most_recent_frame = vr.frame_number
-                path = self.featurized_frame_path(vr.frame_number)
 
                 try:
                     # Try to load the existing feature
                     v = self.retrieve_featurized_frame(vr.frame_number)
                 except FeaturizedFrameNotFoundError:
-                    # Build the per-frame Featurizer, if necessary
-                    if not self._frame_featurizer:
-                        self._frame_featurizer = \
-                            self.config.frame_featurizer.build()
-                        self._frame_featurizer.start()
-
                     if self._frame_preprocessor is not None:
-                        # Pre-process and then featurize the frame
-                        _img = self._frame_preprocessor(img)
-                        v = self._frame_featurizer.featurize(_img)
-                    else:
-                        # Featurize the frame
-                        v = self._frame_featurizer.featurize(img)
-
-                    # Write the feature to disk
-                    np.savez_compressed(path, v=v)
-
-                if returnX:
-                    if X is None:
-                        # Lazily build the GrowableArray now that we know the
-                        # dimension of the features
-                        X = GrowableArray(len(v))
-                    X.update(v)
+                        # Pre-process the frame
+                        img = self._frame_preprocessor(img)
+                    imgs.append(img)
+                    v = None
+
+                pending.append((vr.frame_number, v))
+                if len(pending) < batch_size:
+                    continue
+
+                for v in self._featurize_pending(pending, imgs):
+                    X = _update_features(X, v, returnX)
+                pending = []
+                imgs = []
+
+            for v in self._featurize_pending(pending, imgs):
+                X = _update_features(X, v, returnX)
 
         if self._frame_featurizer and not self._keep_alive:
             # Stop the frame featurizer
@@ -602,6 +661,27 @@ class VideoFramesFeaturizer(Featurizer):
 
         return X.finalize() if returnX else None
 
+    def _featurize_pending(self, pending, imgs):
+        if not imgs:
+            return [v for _, v in pending]
+
+        # Build the per-frame Featurizer, if necessary
+        if not self._frame_featurizer:
+            self._frame_featurizer = self.config.frame_featurizer.build()
+            self._frame_featurizer.start()
+
+        # Featurize the frames and write the features to disk
+        V = iter(self._frame_featurizer.featurize_batch(imgs))
+        features = []
+        for frame_number, v in pending:
+            if v is None:
+                v = next(V)
+                np.savez_compressed(
+                    self.featurized_frame_path(frame_number), v=v)
+            features.append(v)
+
+        return features
+
     def featurized_frame_path(self, frame_number):
         '''Returns the backing path for the given frame number.'''
         return os.path.join(
@@ -631,6 +711,18 @@ class VideoFramesFeaturizer(Featurizer):
                 raise
 
 
+def _update_features(X, v, returnX):
+    if not returnX:
+        return None
+
+    if X is None:
+        # Lazily build the GrowableArray now that we know the dimension of
+        # the features
+        X = GrowableArray(len(v))
+    X.update(v)
+    return X
+
+
 class ORBFeaturizer(Featurizer):
     '''ORB (Oriented FAST and rotated BRIEF features) Featurizer.
 
@@ -655,8 +747,20 @@ class ORBFeaturizer(Featurizer):
         return 32 * self.num_keypoints
 
     def _featurize(self, img):
-        gray = etai.rgb_to_gray(img)
-        return self.orb.detectAndCompute(gray, None)[1].flatten()
+        return self._featurize_batch([img])[0]
+
+    def _featurize_batch(self, imgs):
+        # Descriptors are written directly into a preallocated array. Images
+        # with fewer than `num_keypoints` keypoints are zero-padded
+        X = np.zeros((len(imgs), self.dim()), dtype=np.uint8)
+        for idx, img in enumerate(imgs):
+            gray = etai.rgb_to_gray(img)
+            descriptors = self.orb.detectAndCompute(gray, None)[1]
+            if descriptors is not None:
+                v = descriptors.ravel()[:X.shape[1]]
+                X[idx, :v.size] = v
+
+        return X
 
 
 class RandFeaturizer(Featurizer):
@@ -670,7 +774,7 @@ class RandFeaturizer(Featurizer):
         Args:
             dim: the desired embedding dimension. The default value is 1024
         '''
-        super(RandFeaturizer, self).__init__(self)
+        super(RandFeaturizer, self).__init__()
         self._dim = dim
 
     def dim(self):
@@ -681,3 +785,6 @@ class RandFeaturizer(Featurizer):
 
     def _featurize(self, _):
         return np.random.rand(self._dim)
+
+    def _featurize_batch(self, items):
+        return np.random.rand(len(items), self._dim)
@@ -126,6 +126,41 @@ class DetectedObjectContainer(DataContainer):
         '''Returns a set containing the labels of the DetectedObjects.'''
         return set(obj.label for obj in self)
 
+    def write_binary(self, path, objects_per_chunk=4096):
+        '''Writes the container to disk in the ETA binary format.
+
+        The objects are stored in chunks of compressed JSON, each of which is
+        indexed by the range of frame numbers of its objects.
+
+        Args:
+            path: the output path
+            objects_per_chunk: the number of objects to store in each chunk.
+                The default is 4096
+        '''
+        super(DetectedObjectContainer, self).write_binary(
+            path, objects_per_chunk=objects_per_chunk)
+
+    def _write_binary(self, writer, objects_per_chunk=4096):
+        for idx in range(0, len(self), objects_per_chunk):
+            chunk = self.__class__(
+                objects=self.objects[idx:(idx + objects_per_chunk)])
+            frame_numbers = [
+                obj.frame_number for obj in chunk
+                if obj.frame_number is not None]
+            first = min(frame_numbers) if frame_numbers else None
+            last = max(frame_numbers) if frame_numbers else None
+            writer.write_chunk(
+                chunk.to_str(pretty_print=False).encode("utf-8"),
+                first=first, last=last)
+
+    @classmethod
+    def _read_binary(cls, reader):
+        objects = cls()
+        for idx in range(reader.num_chunks):
+            objects.add_container(
+                cls.from_str(reader.read_chunk(idx).decode("utf-8")))
+        return objects
+
     def sort_by_confidence(self, reverse=False):
         '''Sorts the object list by confidence.
 
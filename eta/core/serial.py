@@ -26,12 +26,18 @@ import dill as pickle
 import json
 import os
 import pprint
+import struct
+import zlib
 
 import numpy as np
 
 import eta.core.utils as etau
 
 
+# The magic bytes that begin and end ETA binary files
+_BINARY_MAGIC = b"ETAB\x00\x00\x00\x01"
+
+
 def load_json(path_or_str):
     '''Loads JSON from the input argument.
 
@@ -260,6 +266,25 @@ class Serializable(object):
         obj = self.serialize(reflective=reflective)
         write_json(obj, path, pretty_print=pretty_print)
 
+    def write_binary(self, path, **kwargs):
+        '''Writes the object to disk in the ETA binary format.
+
+        See `BinaryFileWriter` for a description of the format.
+
+        Subclasses may override `_write_binary()` to customize how the object
+        is split into chunks, but, by default, the object is stored as a
+        single chunk containing its (compressed) JSON representation.
+
+        Args:
+            path: the output path
+            **kwargs: optional keyword arguments for `_write_binary()`
+        '''
+        with BinaryFileWriter(path) as writer:
+            self._write_binary(writer, **kwargs)
+
+    def _write_binary(self, writer):
+        writer.write_chunk(self.to_str(pretty_print=False).encode("utf-8"))
+
     @classmethod
     def from_dict(cls, d, *args, **kwargs):
         '''Constructs a Serializable object from a JSON dictionary.
@@ -301,6 +326,28 @@ class Serializable(object):
         '''
         return cls.from_dict(read_json(path), *args, **kwargs)
 
+    @classmethod
+    def from_binary(cls, path, *args, **kwargs):
+        '''Constructs a Serializable object from a file in the ETA binary
+        format.
+
+        Subclasses may override `_read_binary()`, but, by default, this method
+        simply parses the JSON in the first chunk of the file and calls
+        from_dict(), which subclasses must implement.
+        '''
+        with BinaryFileReader(path) as reader:
+            return cls._read_binary(reader, *args, **kwargs)
+
+    @classmethod
+    def _read_binary(cls, reader, *args, **kwargs):
+        s = reader.read_chunk(0).decode("utf-8")
+        return cls.from_str(s, *args, **kwargs)
+
+    @staticmethod
+    def is_binary_path(path):
+        '''Checks the path to see if it has an ETA binary extension.'''
+        return path.endswith(".etab")
+
 
 def _recurse(v, reflective):
     if isinstance(v, Serializable):
@@ -610,3 +657,207 @@ class ETAJSONEncoder(json.JSONEncoder):
         elif isinstance(obj, (dt.datetime, dt.date)):
             return obj.isoformat()
         return super(ETAJSONEncoder, self).default(obj)
+
+
+class BinaryFileWriter(object):
+    '''Class for writing files in the ETA binary format.
+
+    ETA binary files store a sequence of independently compressed chunks of
+    data, followed by a footer that indexes the byte offsets of the chunks and
+    the (optional) range of frames that each chunk describes, so that readers
+    can load only the chunks that they need. The layout of a file is:
+
+        <magic> <chunk> ... <chunk> <footer> <footer offset> <magic>
+
+    where the footer is the compressed JSON dictionary
+    `{"header": {...}, "chunks": [{"offset", "size", "first", "last"}, ...]}`
+    and the footer offset is an unsigned 64-bit little-endian integer.
+
+    The file is written to a temporary path alongside the output path and is
+    only moved to the output path when the writer is closed, so that partially
+    written files are never mistaken for valid ones. When the writer is used
+    as a context manager and an exception is raised, the temporary file is
+    discarded.
+
+    Attributes:
+        path: the output path
+        header: a dictionary of JSON-serializable metadata to store in the
+            footer of the file
+    '''
+
+    def __init__(self, path, compression_level=6):
+        '''Creates a BinaryFileWriter instance.
+
+        Args:
+            path: the output path
+            compression_level: the zlib compression level to use, in [0, 9].
+                The default is 6
+        '''
+        self.path = path
+        self.header = OrderedDict()
+        self._compression_level = compression_level
+        self._chunks = []
+        self._tmp_path = path + ".tmp"
+        etau.ensure_basedir(path)
+        self._f = open(self._tmp_path, "wb")
+        self._f.write(_BINARY_MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def write_chunk(self, data, first=None, last=None):
+        '''Writes a chunk of data to the file.
+
+        Args:
+            data: the bytes to write
+            first: an optional first frame number described by the chunk
+            last: an optional last frame number described by the chunk
+        '''
+        data = zlib.compress(data, self._compression_level)
+        self._chunks.append(OrderedDict([
+            ("offset", self._f.tell()),
+            ("size", len(data)),
+            ("first", first),
+            ("last", last),
+        ]))
+        self._f.write(data)
+
+    def close(self):
+        '''Writes the footer and closes the file.'''
+        if self._f.closed:
+            return
+
+        footer = OrderedDict([
+            ("header", self.header),
+            ("chunks", self._chunks),
+        ])
+        offset = self._f.tell()
+        self._f.write(zlib.compress(
+            json_to_str(footer, pretty_print=False).encode("utf-8")))
+        self._f.write(struct.pack("<Q", offset))
+        self._f.write(_BINARY_MAGIC)
+        self._f.close()
+        etau.move_file(self._tmp_path, self.path)
+
+    def abort(self):
+        '''Closes and deletes the partially written file without writing
+        the output file.
+        '''
+        if self._f.closed:
+            return
+
+        self._f.close()
+        os.remove(self._tmp_path)
+
+
+class BinaryFileReader(object):
+    '''Class for reading files in the ETA binary format.
+
+    See `BinaryFileWriter` for a description of the format.
+
+    Attributes:
+        path: the path to the file
+        header: the dictionary of metadata stored in the footer of the file
+        chunks: a list of dictionaries describing the chunks in the file
+    '''
+
+    def __init__(self, path):
+        '''Creates a BinaryFileReader instance.
+
+        Args:
+            path: the path to the file
+
+        Raises:
+            BinaryFileError: if the file is not a valid ETA binary file
+        '''
+        self.path = path
+        self._f = open(path, "rb")
+        try:
+            footer = self._read_footer()
+        except Exception:
+            self._f.close()
+            raise
+
+        self.header = footer["header"]
+        self.chunks = footer["chunks"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def num_chunks(self):
+        '''The number of chunks in the file.'''
+        return len(self.chunks)
+
+    def find_chunks(self, first, last):
+        '''Returns the indices of the chunks whose frame ranges overlap the
+        given range of frames.
+
+        Chunks that do not describe a frame range always match.
+
+        Args:
+            first: the first frame number
+            last: the last frame number
+
+        Returns:
+            a list of chunk indices
+        '''
+        return [
+            idx for idx, chunk in enumerate(self.chunks)
+            if chunk["first"] is None or (
+                chunk["first"] <= last and chunk["last"] >= first)
+        ]
+
+    def read_chunk(self, idx):
+        '''Reads the given chunk from the file.
+
+        Args:
+            idx: the index of the chunk
+
+        Returns:
+            the bytes of the chunk
+        '''
+        chunk = self.chunks[idx]
+        self._f.seek(chunk["offset"])
+        return zlib.decompress(self._f.read(chunk["size"]))
+
+    def close(self):
+        '''Closes the file.'''
+        self._f.close()
+
+    def _read_footer(self):
+        tail_size = 8 + len(_BINARY_MAGIC)
+        if self._f.read(len(_BINARY_MAGIC)) != _BINARY_MAGIC:
+            raise BinaryFileError(
+                "'%s' is not an ETA binary file" % self.path)
+
+        self._f.seek(0, os.SEEK_END)
+        end = self._f.tell()
+        if end < len(_BINARY_MAGIC) + tail_size:
+            raise BinaryFileError(
+                "ETA binary file '%s' is truncated" % self.path)
+
+        self._f.seek(end - tail_size)
+        tail = self._f.read(tail_size)
+        if tail[8:] != _BINARY_MAGIC:
+            raise BinaryFileError(
+                "ETA binary file '%s' is truncated" % self.path)
+
+        offset = struct.unpack("<Q", tail[:8])[0]
+        self._f.seek(offset)
+        footer = zlib.decompress(self._f.read(end - tail_size - offset))
+        return json.loads(footer.decode("utf-8"))
+
+
+class BinaryFileError(Exception):
+    '''Exception raised when an invalid ETA binary file is encountered.'''
+    pass
@@ -686,6 +686,64 @@ class DetectedObjectsSequence(JSONFileSequence):
     pass
 
 
+class BinaryFile(File, ConcreteData):
+    '''The base type for files in the ETA binary format.
+
+    This format is implemented in ETA by the `eta.core.serial.BinaryFileWriter`
+    and `eta.core.serial.BinaryFileReader` classes.
+
+    Examples:
+        /path/to/data.etab
+    '''
+
+    @staticmethod
+    def gen_path(basedir, params):
+        return os.path.join(basedir, "{name}.etab").format(**params)
+
+    @staticmethod
+    def is_valid_path(path):
+        return File.is_valid_path(path) and etau.has_extension(path, ".etab")
+
+
+class VideoLabelsBinary(BinaryFile):
+    '''A description of the labeled contents of a video in the ETA binary
+    format.
+
+    This type is implemented in ETA by the `eta.core.video.VideoLabels`
+    class, via its `write_binary()` and `from_binary()` methods.
+
+    Examples:
+        /path/to/video_labels.etab
+    '''
+    pass
+
+
+class DetectedObjectsBinary(BinaryFile):
+    '''A list of detected objects in an image or video in the ETA binary
+    format.
+
+    This type is implemented in ETA by the
+    `eta.core.objects.DetectedObjectContainer` class, via its
+    `write_binary()` and `from_binary()` methods.
+
+    Examples:
+        /path/to/detected_objects.etab
+    '''
+    pass
+
+
+class EventDetectionBinary(BinaryFile):
+    '''A per-frame binary event detection in the ETA binary format.
+
+    This type is implemented in ETA by the `eta.core.events.EventDetection`
+    class, via its `write_binary()` and `from_binary()` methods.
+
+    Examples:
+        /path/to/event_detection.etab
+    '''
+    pass
+
+
 class Features(FileSequence, ConcreteData):
     '''A sequence of features indexed by one numeric parameter.
 
@@ -494,10 +494,38 @@ class VGG16Featurizer(Featurizer):
         Returns:
             the feature vector, a 1D array of length 4096
         '''
-        if etai.is_gray(img):
-            img = etai.gray_to_rgb(img)
-        elif etai.has_alpha(img):
-            img = img[:, :, :3]
+        return self._featurize_batch([img])[0]
 
-        imgs = [etai.resize(img, 224, 224)]
-        return self.vgg16.evaluate(imgs, layer=self.vgg16.fc2l)[0]
+    def _featurize_batch(self, imgs):
+        '''Featurizes the input images using VGG-16 in a single evaluation
+        of the network.
+
+        The images are resized to 224 x 224 internally, if necessary.
+
+        Args:
+            imgs: a list of input images, or an array of images
+
+        Returns:
+            a (# images) x 4096 array of feature vectors
+        '''
+        if not len(imgs):
+            return np.zeros((0, self.dim()), dtype=np.float32)
+
+        batch = np.empty((len(imgs), 224, 224, 3), dtype=np.float32)
+        for idx, img in enumerate(imgs):
+            batch[idx] = _preprocess_image(img)
+
+        return self.vgg16.evaluate(batch, layer=self.vgg16.fc2l)
+
+
+def _preprocess_image(img):
+    # Converts the image to a 224 x 224 RGB image
+    if etai.is_gray(img):
+        img = etai.gray_to_rgb(img)
+    elif etai.has_alpha(img):
+        img = img[:, :, :3]
+
+    if img.shape[:2] != (224, 224):
+        img = etai.resize(img, 224, 224)
+
+    return img
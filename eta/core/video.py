@@ -25,27 +25,40 @@ from __future__ import unicode_literals
 from builtins import *
 from future.utils import iteritems, itervalues
 import six
+from six.moves import queue
 # pragma pylint: enable=redefined-builtin
 # pragma pylint: enable=unused-wildcard-import
 # pragma pylint: enable=wildcard-import
 
+import bisect
 from collections import defaultdict, OrderedDict
+import copy
 import dateutil.parser
 import errno
+import glob
+import hashlib
+import io
 import json
 import logging
+import multiprocessing
+import multiprocessing.pool
 import os
+import re
 from subprocess import Popen, PIPE
+import tempfile
 import threading
 
 import cv2
 import numpy as np
-import scipy.interpolate as spi
 
-from eta.core.data import AttributeContainer, AttributeContainerSchema
+import eta
+from eta.core.data import Attribute, AttributeContainer
+from eta.core.data import AttributeContainerSchema
+from eta.core.geometry import BoundingBox, RelativePoint
 import eta.core.image as etai
-from eta.core.objects import DetectedObjectContainer
+from eta.core.objects import DetectedObject, DetectedObjectContainer
 from eta.core.serial import Serializable
+import eta.core.serial as etas
 import eta.core.utils as etau
 
 
@@ -250,8 +263,9 @@ class VideoMetadata(Serializable):
         self.encoding_str = encoding_str
         self.gps_waypoints = gps_waypoints
 
-        self._flat = None
-        self._flon = None
+        self._gps_frames = None
+        self._gps_lats = None
+        self._gps_lons = None
         self._init_gps()
 
     @property
@@ -328,7 +342,90 @@ class VideoMetadata(Serializable):
             timestamp = self.get_timestamp(world_time=world_time)
         if timestamp is not None:
             frame_number = self.get_frame_number(timestamp=timestamp)
-        return self._flat(frame_number), self._flon(frame_number)
+        lat, lon = self.get_gps_locations(frame_numbers=[frame_number])[0]
+        return float(lat), float(lon)
+
+    def get_gps_locations(
+            self, frame_numbers=None, timestamps=None, world_times=None,
+            method="nearest"):
+        '''Gets the GPS locations at the given points in the video.
+
+        Exactly one of `frame_numbers`, `timestamps`, and `world_times` must
+        be supplied.
+
+        The supported interpolation methods are:
+            "nearest": the location of the nearest waypoint is used. This is
+                the method used by `get_gps_location()`
+            "linear": the latitude and longitude are linearly interpolated
+                between the surrounding waypoints
+            "great_circle": the location is interpolated along the great
+                circle between the surrounding waypoints
+
+        Points before the first waypoint or after the last waypoint are
+        assigned the location of the first or last waypoint, respectively.
+
+        Args:
+            frame_numbers: an array-like of frame numbers of interest
+            timestamps: an array-like of timestamps (in seconds) of interest
+            world_times: an iterable of datetimes describing the absolute
+                (world) times of interest
+            method: the interpolation method to use. The default is "nearest"
+
+        Returns:
+            an [N, 2] array containing the (lat, lon) of the given points in
+                the video, or None if the video has no GPS waypoints
+
+        Raises:
+            ValueError: if the interpolation method is not supported
+        '''
+        if method not in ("nearest", "linear", "great_circle"):
+            raise ValueError("Unsupported interpolation method '%s'" % method)
+
+        if not self.has_gps:
+            return None
+
+        if world_times is not None:
+            timestamps = [
+                self.get_timestamp(world_time=wt) for wt in world_times]
+        if timestamps is not None:
+            alpha = np.asarray(timestamps, dtype=float) / self.duration
+            frame_numbers = 1 + alpha * (self.total_frame_count - 1)
+            if method == "nearest":
+                frame_numbers = np.round(frame_numbers)
+
+        x = np.asarray(frame_numbers, dtype=float).reshape(-1)
+        frames = self._gps_frames
+        lats, lons = self._gps_lats, self._gps_lons
+
+        if method == "nearest" or len(frames) == 1:
+            # A point exactly halfway between waypoints uses the earlier one
+            idx = np.searchsorted((frames[1:] + frames[:-1]) / 2, x)
+            return np.stack([lats[idx], lons[idx]], axis=1)
+
+        idx = np.clip(
+            np.searchsorted(frames, x, side="right") - 1, 0, len(frames) - 2)
+        f0, f1 = frames[idx], frames[idx + 1]
+        span = np.where(f1 > f0, f1 - f0, 1.0)
+        t = np.clip((x - f0) / span, 0.0, 1.0)
+
+        if method == "linear":
+            lat = lats[idx] + t * (lats[idx + 1] - lats[idx])
+            lon = lons[idx] + t * (lons[idx + 1] - lons[idx])
+            return np.stack([lat, lon], axis=1)
+
+        v0 = _lat_lon_to_unit_vector(lats[idx], lons[idx])
+        v1 = _lat_lon_to_unit_vector(lats[idx + 1], lons[idx + 1])
+        omega = np.arccos(np.clip(np.sum(v0 * v1, axis=1), -1.0, 1.0))
+        sin_omega = np.sin(omega)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w0 = np.where(
+                sin_omega > 1e-12, np.sin((1 - t) * omega) / sin_omega, 1 - t)
+            w1 = np.where(
+                sin_omega > 1e-12, np.sin(t * omega) / sin_omega, t)
+        v = w0[:, np.newaxis] * v0 + w1[:, np.newaxis] * v1
+        lat = np.degrees(np.arctan2(v[:, 2], np.hypot(v[:, 0], v[:, 1])))
+        lon = np.degrees(np.arctan2(v[:, 1], v[:, 0]))
+        return np.stack([lat, lon], axis=1)
 
     def attributes(self):
         '''Returns the list of class attributes that will be serialized.'''
@@ -391,16 +488,24 @@ class VideoMetadata(Serializable):
     def _init_gps(self):
         if not self.has_gps:
             return
-        frames = [loc.frame_number for loc in self.gps_waypoints]
-        lats = [loc.latitude for loc in self.gps_waypoints]
-        lons = [loc.longitude for loc in self.gps_waypoints]
-        self._flat = self._make_interp(frames, lats)
-        self._flon = self._make_interp(frames, lons)
-
-    @staticmethod
-    def _make_interp(x, y):
-        return spi.interp1d(
-            x, y, kind="nearest", bounds_error=False, fill_value="extrapolate")
+        frames = np.array(
+            [loc.frame_number for loc in self.gps_waypoints], dtype=float)
+        inds = np.argsort(frames, kind="mergesort")
+        self._gps_frames = frames[inds]
+        self._gps_lats = np.array(
+            [loc.latitude for loc in self.gps_waypoints], dtype=float)[inds]
+        self._gps_lons = np.array(
+            [loc.longitude for loc in self.gps_waypoints], dtype=float)[inds]
+
+
+def _lat_lon_to_unit_vector(lats, lons):
+    lats = np.radians(lats)
+    lons = np.radians(lons)
+    return np.stack([
+        np.cos(lats) * np.cos(lons),
+        np.cos(lats) * np.sin(lons),
+        np.sin(lats),
+    ], axis=1)
 
 
 class VideoFrameLabels(Serializable):
@@ -496,6 +601,16 @@ class VideoLabels(Serializable):
     strings. The `from_dict` method of this class handles converting the keys
     back to integers when VideoLabels instances are loaded.
 
+    When a schema is enforced, labels are validated against a compiled form of
+    the schema, which is rebuilt whenever the `schema` attribute is accessed,
+    since the schema may then be modified in-place.
+
+    Once the active schema of the labels has been computed, it is maintained
+    incrementally as labels are added via the methods of this class. It is
+    recomputed from scratch after frames are deleted or overwritten, or after
+    VideoFrameLabels instances are handed out for in-place editing via
+    `get_frame()` or the `frames` attribute.
+
     Attributes:
         frames: a dictionary mapping frame number strings to VideoFrameLabels
             instances
@@ -511,8 +626,10 @@ class VideoLabels(Serializable):
             schema: an optional VideoLabelsSchema to enforce on the object.
                 By default, no schema is enforced
         '''
-        self.frames = frames or {}
-        self.schema = schema
+        self._frames = frames or {}
+        self._schema = schema
+        self._compiled_schema = None
+        self._active_schema = None
 
     def __getitem__(self, frame_number):
         return self.get_frame(frame_number)
@@ -522,37 +639,66 @@ class VideoLabels(Serializable):
 
     def __iter__(self):
         # Always iterate over the keys in sorted order
-        return iter(sorted(self.frames))
+        return iter(sorted(self._frames))
 
     def __len__(self):
-        return len(self.frames)
+        return len(self._frames)
 
     def __bool__(self):
-        return bool(self.frames)
+        return bool(self._frames)
+
+    @property
+    def frames(self):
+        '''The dictionary mapping frame numbers to VideoFrameLabels.'''
+        # The frames may be edited in-place
+        self._active_schema = None
+        return self._frames
+
+    @frames.setter
+    def frames(self, frames):
+        self._frames = frames
+        self._active_schema = None
+
+    @property
+    def schema(self):
+        '''The enforced VideoLabelsSchema, or None if no schema is enforced.'''
+        # The schema may be edited in-place
+        self._compiled_schema = None
+        return self._schema
+
+    @schema.setter
+    def schema(self, schema):
+        self._schema = schema
+        self._compiled_schema = None
 
     @property
     def has_schema(self):
         '''Returns True/False whether the container has an enforced schema.'''
-        return self.schema is not None
+        return self._schema is not None
 
     def has_frame(self, frame_number):
         '''Returns True/False whether this object contains a VideoFrameLabels
         for the given frame number.
         '''
-        return frame_number in self.frames
+        return frame_number in self._frames
 
     def get_frame(self, frame_number):
         '''Gets the VideoFrameLabels for the given frame number, or an empty if
         VideoFrameLabels if the frame has no labels.
         '''
         try:
-            return self.frames[frame_number]
+            frame_labels = self._frames[frame_number]
         except KeyError:
             return VideoFrameLabels(frame_number)
 
+        # The frame labels may be edited in-place
+        self._active_schema = None
+        return frame_labels
+
     def delete_frame(self, frame_number):
         '''Deletes the VideoFrameLabels for the given frame number.'''
-        del self.frames[frame_number]
+        del self._frames[frame_number]
+        self._active_schema = None
 
     def merge_video_labels(self, video_labels):
         '''Merges the given VideoLabels into this labels.'''
@@ -571,11 +717,30 @@ class VideoLabels(Serializable):
         if self.has_schema:
             self._validate_frame_labels(frame_labels)
 
-        frame_number = frame_labels.frame_number
-        if overwrite or not self.has_frame(frame_number):
-            self.frames[frame_number] = frame_labels
-        else:
-            self.frames[frame_number].merge_frame_labels(frame_labels)
+        self._add_frame(frame_labels, overwrite)
+
+    def add_frames(self, frame_labels_list, overwrite=True):
+        '''Adds the labels for multiple frames to the video.
+
+        When a schema is enforced, all of the labels are validated in a single
+        pass before any of them are added.
+
+        Args:
+            frame_labels_list: an iterable of VideoFrameLabels instances
+            overwrite: whether to overwrite any existing VideoFrameLabels
+                instances for the frames or merge the new labels. By default,
+                this is True
+        '''
+        frame_labels_list = list(frame_labels_list)
+        if self.has_schema:
+            schema = self._get_compiled_schema()
+            schema.validate_frame_attributes(
+                attr for fl in frame_labels_list for attr in fl.attrs)
+            schema.validate_objects(
+                obj for fl in frame_labels_list for obj in fl.objects)
+
+        for frame_labels in frame_labels_list:
+            self._add_frame(frame_labels, overwrite)
 
     def add_frame_attribute(self, frame_attr, frame_number):
         '''Adds the given frame attribute to the video.
@@ -587,7 +752,9 @@ class VideoLabels(Serializable):
         if self.has_schema:
             self._validate_frame_attribute(frame_attr)
         self._ensure_frame(frame_number)
-        self.frames[frame_number].add_frame_attribute(frame_attr)
+        self._frames[frame_number].add_frame_attribute(frame_attr)
+        if self._active_schema is not None:
+            self._active_schema.add_frame_attribute(frame_attr)
 
     def add_frame_attributes(self, frame_attrs, frame_number):
         '''Adds the given frame attributes to the video.
@@ -597,10 +764,11 @@ class VideoLabels(Serializable):
             frame_number: the frame number
         '''
         if self.has_schema:
-            for frame_attr in frame_attrs:
-                self._validate_frame_attribute(frame_attr)
+            self._get_compiled_schema().validate_frame_attributes(frame_attrs)
         self._ensure_frame(frame_number)
-        self.frames[str(frame_number)].add_frame_attributes(frame_attrs)
+        self._frames[frame_number].add_frame_attributes(frame_attrs)
+        if self._active_schema is not None:
+            self._active_schema.add_frame_attributes(frame_attrs)
 
     def add_object(self, obj, frame_number):
         '''Adds the object to the video.
@@ -613,7 +781,9 @@ class VideoLabels(Serializable):
             self._validate_object(obj)
         self._ensure_frame(frame_number)
         obj.frame_number = frame_number
-        self.frames[frame_number].add_object(obj)
+        self._frames[frame_number].add_object(obj)
+        if self._active_schema is not None:
+            self._active_schema.add_object(obj)
 
     def add_objects(self, objs, frame_number):
         '''Adds the objects to the video.
@@ -623,12 +793,32 @@ class VideoLabels(Serializable):
             frame_number: the frame number
         '''
         if self.has_schema:
-            for obj in objs:
-                self._validate_object(obj)
+            self._get_compiled_schema().validate_objects(objs)
         self._ensure_frame(frame_number)
         for obj in objs:
             obj.frame_number = frame_number
-            self.frames[frame_number].add_object(obj)
+            self._frames[frame_number].add_object(obj)
+        if self._active_schema is not None:
+            self._active_schema.add_objects(objs)
+
+    def add_detected_objects(self, objects):
+        '''Adds the objects to the video, in the frames specified by their
+        `frame_number` attributes.
+
+        When a schema is enforced, all of the objects are validated in a
+        single pass before any of them are added.
+
+        Args:
+            objects: a DetectedObjectContainer whose DetectedObjects have
+                their `frame_number` attributes set
+        '''
+        if self.has_schema:
+            self._get_compiled_schema().validate_objects(objects)
+        for obj in objects:
+            self._ensure_frame(obj.frame_number)
+            self._frames[obj.frame_number].add_object(obj)
+        if self._active_schema is not None:
+            self._active_schema.add_objects(objects)
 
     def get_schema(self):
         '''Gets the current enforced schema for the video, or None if no schema
@@ -640,7 +830,9 @@ class VideoLabels(Serializable):
         '''Returns a VideoLabelsSchema describing the active schema of the
         video.
         '''
-        return VideoLabelsSchema.build_active_schema(self)
+        if self._active_schema is None:
+            self._active_schema = VideoLabelsSchema.build_active_schema(self)
+        return copy.deepcopy(self._active_schema)
 
     def set_schema(self, schema):
         '''Sets the enforced schema to the given VideoLabelsSchema.'''
@@ -664,29 +856,123 @@ class VideoLabels(Serializable):
             _attrs.append("schema")
         return _attrs
 
+    def _add_frame(self, frame_labels, overwrite):
+        frame_number = frame_labels.frame_number
+        if not self.has_frame(frame_number):
+            self._frames[frame_number] = frame_labels
+        elif overwrite:
+            self._frames[frame_number] = frame_labels
+            self._active_schema = None
+        else:
+            self._frames[frame_number].merge_frame_labels(frame_labels)
+
+        if self._active_schema is not None:
+            self._active_schema.merge_schema(
+                VideoLabelsSchema.build_active_schema_for_frame(frame_labels))
+
     def _ensure_frame(self, frame_number):
         if not self.has_frame(frame_number):
-            self.frames[frame_number] = VideoFrameLabels(frame_number)
+            self._frames[frame_number] = VideoFrameLabels(frame_number)
+
+    def _get_compiled_schema(self):
+        if self._compiled_schema is None:
+            self._compiled_schema = self._schema.compile()
+        return self._compiled_schema
 
     def _validate_frame_labels(self, frame_labels):
         if self.has_schema:
-            for frame_attr in frame_labels.attrs:
-                self.schema.validate_frame_attribute(frame_attr)
-            for obj in frame_labels.objects:
-                self.schema.validate_object(obj)
+            schema = self._get_compiled_schema()
+            schema.validate_frame_attributes(frame_labels.attrs)
+            schema.validate_objects(frame_labels.objects)
 
     def _validate_frame_attribute(self, frame_attr):
         if self.has_schema:
-            self.schema.validate_frame_attribute(frame_attr)
+            self._get_compiled_schema().validate_frame_attributes(
+                [frame_attr])
 
     def _validate_object(self, obj):
         if self.has_schema:
-            self.schema.validate_object(obj)
+            self._get_compiled_schema().validate_objects([obj])
 
     def _validate_schema(self):
         if self.has_schema:
-            for frame_labels in itervalues(self.frames):
-                self._validate_frame_labels(frame_labels)
+            frames = list(itervalues(self._frames))
+            schema = self._get_compiled_schema()
+            schema.validate_frame_attributes(
+                attr for fl in frames for attr in fl.attrs)
+            schema.validate_objects(obj for fl in frames for obj in fl.objects)
+
+    def write_binary(self, path, frames_per_chunk=1024):
+        '''Writes the labels to disk in the ETA binary format.
+
+        The labels are stored in chunks of consecutive labeled frames, each of
+        which is stored in the columnar format of ColumnarVideoLabels, so
+        that readers can load only the frames that they need. Floating point
+        values are stored in double precision, so no precision is lost.
+
+        Args:
+            path: the output path
+            frames_per_chunk: the number of labeled frames to store in each
+                chunk. The default is 1024
+        '''
+        super(VideoLabels, self).write_binary(
+            path, frames_per_chunk=frames_per_chunk)
+
+    def _write_binary(self, writer, frames_per_chunk=1024):
+        if self.has_schema:
+            writer.header["schema"] = self._schema
+
+        frame_numbers = sorted(self._frames)
+        for idx in range(0, len(frame_numbers), frames_per_chunk):
+            chunk_frames = frame_numbers[idx:(idx + frames_per_chunk)]
+            chunk = ColumnarVideoLabels.from_video_labels(
+                VideoLabels(
+                    frames={fn: self._frames[fn] for fn in chunk_frames}),
+                float_dtype=np.float64)
+            writer.write_chunk(
+                chunk.to_bytes(), first=chunk_frames[0], last=chunk_frames[-1])
+
+    @classmethod
+    def from_binary(cls, path, frames=None):
+        '''Constructs a VideoLabels from a file in the ETA binary format.
+
+        Args:
+            path: the path to a file written by `write_binary()`
+            frames: an optional FrameRanges instance or frames string like
+                "1-3,6,8-10" specifying the frames to load. Only the chunks of
+                the file that contain these frames are read. By default, all
+                frames are loaded
+
+        Returns:
+            a VideoLabels instance
+        '''
+        return super(VideoLabels, cls).from_binary(path, frames=frames)
+
+    @classmethod
+    def _read_binary(cls, reader, frames=None):
+        if isinstance(frames, six.string_types):
+            frames = FrameRanges.from_str(frames)
+
+        schema = reader.header.get("schema", None)
+        if schema is not None:
+            schema = VideoLabelsSchema.from_dict(schema)
+
+        if frames is None:
+            chunk_inds = range(reader.num_chunks)
+        else:
+            chunk_inds = sorted(set(
+                idx for first, last in frames.intervals.tolist()
+                for idx in reader.find_chunks(first, last)))
+
+        # The labels were validated against the schema when they were written
+        labels = cls(schema=schema)
+        for idx in chunk_inds:
+            chunk = ColumnarVideoLabels.from_bytes(reader.read_chunk(idx))
+            for frame_number in chunk:
+                if frames is None or frame_number in frames:
+                    labels.frames[frame_number] = chunk.get_frame(frame_number)
+
+        return labels
 
     @classmethod
     def from_detected_objects(cls, objects):
@@ -701,8 +987,7 @@ class VideoLabels(Serializable):
             a VideoLabels instance
         '''
         labels = cls()
-        for obj in objects:
-            labels.add_object(obj, obj.frame_number)
+        labels.add_detected_objects(objects)
         return labels
 
     @classmethod
@@ -803,6 +1088,20 @@ class VideoLabelsSchema(Serializable):
         '''
         self.objects[label].add_attributes(obj_attrs)
 
+    def add_object(self, obj):
+        '''Incorporates the given DetectedObject into the schema.'''
+        if obj.has_attributes:
+            self.add_object_attributes(obj.label, obj.attrs)
+        else:
+            self.add_object_label(obj.label)
+
+    def add_objects(self, objs):
+        '''Incorporates the DetectedObjects in the given container into the
+        schema.
+        '''
+        for obj in objs:
+            self.add_object(obj)
+
     def merge_schema(self, schema):
         '''Merges the given VideoLabelsSchema into this schema.'''
         self.frames.merge_schema(schema.frames)
@@ -904,6 +1203,15 @@ class VideoLabelsSchema(Serializable):
             for obj_attr in obj.attrs:
                 self.validate_object_attribute(obj.label, obj_attr)
 
+    def compile(self):
+        '''Compiles the schema into a form that can efficiently validate
+        many labels at once.
+
+        Returns:
+            a CompiledVideoLabelsSchema
+        '''
+        return CompiledVideoLabelsSchema(self)
+
     @classmethod
     def build_active_schema_for_frame(cls, frame_labels):
         '''Builds a VideoLabelsSchema that describes the active schema of
@@ -911,11 +1219,7 @@ class VideoLabelsSchema(Serializable):
         '''
         schema = cls()
         schema.add_frame_attributes(frame_labels.attrs)
-        for obj in frame_labels.objects:
-            if obj.has_attributes:
-                schema.add_object_attributes(obj.label, obj.attrs)
-            else:
-                schema.add_object_label(obj.label)
+        schema.add_objects(frame_labels.objects)
         return schema
 
     @classmethod
@@ -951,461 +1255,3058 @@ class VideoLabelsSchemaError(Exception):
     pass
 
 
-class VideoStreamInfo(Serializable):
-    '''Class encapsulating the stream info for a video.'''
+class CompiledVideoLabelsSchema(object):
+    '''A compiled VideoLabelsSchema that validates batches of labels in a
+    single pass.
 
-    def __init__(self, stream_info):
-        '''Constructs a VideoStreamInfo instance.
+    The valid object labels, categories, and numeric ranges are captured when
+    the schema is compiled, so the schema must be recompiled if it is
+    subsequently modified.
+    '''
 
-        This constructor should not normally be called directly. The proper way
-        to instantiate this class is via the `build_for` factory method.
+    def __init__(self, schema):
+        '''Compiles the given VideoLabelsSchema.
 
         Args:
-            stream_info: a dictionary generated by `get_stream_info()`
+            schema: a VideoLabelsSchema
         '''
-        self.stream_info = stream_info
-
-    @property
-    def encoding_str(self):
-        '''Return the video encoding string.'''
-        return str(self.stream_info["codec_tag_string"])
-
-    @property
-    def frame_size(self):
-        '''The (width, height) of each frame.'''
-        return (
-            int(self.stream_info["width"]),
-            int(self.stream_info["height"]),
-        )
-
-    @property
-    def aspect_ratio(self):
-        '''The aspect ratio of the video.'''
-        width, height = self.frame_size
-        return width * 1.0 / height
+        self._frames = schema.frames.compile()
+        self._objects = {
+            label: obj_schema.compile()
+            for label, obj_schema in iteritems(schema.objects)
+        }
+
+    def validate_frame_attributes(self, frame_attrs):
+        '''Validates that the frame attributes are compliant with the
+        schema.
 
-    @property
-    def frame_rate(self):
-        '''The frame rate.'''
-        try:
-            try:
-                num, denom = self.stream_info["avg_frame_rate"].split("/")
-                return float(num) / float(denom)
-            except ZeroDivisionError:
-                num, denom = self.stream_info["r_frame_rate"].split("/")
-                return float(num) / float(denom)
-        except (KeyError, ValueError):
-            raise VideoStreamInfoError(
-                "Unable to determine frame rate from stream info")
+        Args:
+            frame_attrs: an iterable of Attributes
 
-    @property
-    def total_frame_count(self):
-        '''The total number of frames in the video, or 0 if it could not be
-        determined.
+        Raises:
+            AttributeSchemaError: if an attribute is not of the class expected
+                by the schema
+            AttributeContainerSchemaError: if an attribute violates the
+                schema
         '''
-        try:
-            # this fails for directories of frames
-            return int(self.stream_info["nb_frames"])
-        except KeyError:
-            # this seems to work for directories of frames
-            return int(self.stream_info.get("duration_ts", 0))
+        self._frames.validate_attributes(frame_attrs)
 
-    def get_raw_value(self, key):
-        '''Gets a value from the raw stream info dictionary.
+    def validate_objects(self, objs):
+        '''Validates that the detected objects are compliant with the
+        schema.
 
         Args:
-            key: the key to lookup in the stream info dictionary
-
-        Returns:
-            the value for the given key
+            objs: an iterable of DetectedObjects
 
         Raises:
-            KeyError: if the key was not found in the stream info dictionary
+            VideoLabelsSchemaError: if an object's label violates the schema
+            AttributeSchemaError: if an object attribute is not of the class
+                expected by the schema
+            AttributeContainerSchemaError: if an object attribute violates
+                the schema
         '''
-        return self.stream_info[key]
+        attrs = defaultdict(list)
+        for obj in objs:
+            if obj.label not in self._objects:
+                raise VideoLabelsSchemaError(
+                    "Object label '%s' is not allowed by the schema" %
+                    obj.label)
+            if obj.has_attributes:
+                attrs[obj.label].extend(obj.attrs)
 
-    def attributes(self):
-        '''Returns the list of class attributes that will be serialized.'''
-        return self.custom_attributes(dynamic=True)
+        for label, obj_attrs in iteritems(attrs):
+            self._objects[label].validate_attributes(obj_attrs)
 
-    @classmethod
-    def build_for(cls, inpath):
-        '''Builds a VideoStreamInfo object for the given video using
-        `get_stream_info()`.
 
-        Args:
-            inpath: the path to the input video
+class ColumnarVideoLabels(Serializable):
+    '''Class encapsulating labels for a video in a columnar format.
 
-        Returns:
-            a VideoStreamInfo instance
-        '''
-        return cls(get_stream_info(inpath))
+    This class stores the same information as a VideoLabels instance, but
+    the detected objects in the video are stored in flat numpy arrays rather
+    than as Python objects, which reduces memory usage and load times of long
+    videos by an order of magnitude and allows per-frame and per-label
+    queries to be vectorized.
 
-    @classmethod
-    def from_dict(cls, d):
-        '''Constructs a VideoStreamInfo from a JSON dictionary.'''
-        return cls(d["stream_info"])
+    The objects are sorted by frame number, preserving their order within
+    each frame. Object labels and attributes are dictionary-encoded, i.e.,
+    they are stored as indices into the `labels` and `attrs` lists. The
+    attributes of each frame/object are stored as a contiguous slice of the
+    `frame_attr_ids`/`obj_attr_ids` arrays, delimited by the corresponding
+    offsets arrays. Missing confidences and scores are stored as NaN, and
+    missing integer values are stored as `ColumnarVideoLabels.MISSING`.
 
+    By default, bounding box coordinates, confidences, and scores are stored
+    in single precision, so values with more than 7 significant digits are
+    rounded. Pass `float_dtype=np.float64` to store them exactly.
 
-class VideoStreamInfoError(Exception):
-    '''Exception raised when an invalid video stream info dictionary is
-    encountered.
+    Attributes:
+        frame_numbers: a sorted [num_frames] array of the frame numbers that
+            have labels
+        frame_attr_offsets: a [num_frames + 1] array of offsets into
+            `frame_attr_ids`
+        frame_attr_ids: an array of indices into `attrs` of the frame
+            attributes
+        obj_frame_numbers: a [num_objects] array of the frame numbers in which
+            the objects appear
+        obj_label_ids: a [num_objects] array of indices into `labels`
+        obj_bboxes: a [num_objects, 4] array of the (top-left-x, top-left-y,
+            bottom-right-x, bottom-right-y) relative coordinates of the
+            bounding boxes of the objects
+        obj_confidences: a [num_objects] array of object confidences
+        obj_scores: a [num_objects] array of object scores
+        obj_indexes: a [num_objects] array of object indexes
+        obj_indexes_in_frame: a [num_objects] array of the indexes of the
+            objects in their frames
+        obj_has_frame_number: a [num_objects] boolean array indicating
+            whether the `frame_number` attribute of each object is set
+        obj_has_attrs: a [num_objects] boolean array indicating whether each
+            object has an AttributeContainer
+        obj_attr_offsets: a [num_objects + 1] array of offsets into
+            `obj_attr_ids`
+        obj_attr_ids: an array of indices into `attrs` of the object
+            attributes
+        labels: the list of distinct object labels
+        attrs: the list of distinct Attributes
+        schema: an optional VideoLabelsSchema enforced on the labels
     '''
-    pass
 
+    # The value used to represent missing integer values
+    MISSING = np.iinfo(np.int64).min
 
-def get_stream_info(inpath):
-    '''Get stream info for the video using `ffprobe -show_streams`.
+    # The attributes that are stored as numpy arrays
+    _ARRAY_ATTRS = [
+        "frame_numbers", "frame_attr_offsets", "frame_attr_ids",
+        "obj_frame_numbers", "obj_label_ids", "obj_bboxes",
+        "obj_confidences", "obj_scores", "obj_indexes",
+        "obj_indexes_in_frame", "obj_has_frame_number", "obj_has_attrs",
+        "obj_attr_offsets", "obj_attr_ids"
+    ]
 
-    Args:
-        inpath: video path
+    def __init__(
+            self, frame_numbers=None, frame_attr_offsets=None,
+            frame_attr_ids=None, obj_frame_numbers=None, obj_label_ids=None,
+            obj_bboxes=None, obj_confidences=None, obj_scores=None,
+            obj_indexes=None, obj_indexes_in_frame=None,
+            obj_has_frame_number=None, obj_has_attrs=None,
+            obj_attr_offsets=None, obj_attr_ids=None, labels=None, attrs=None,
+            schema=None, float_dtype=np.float32):
+        '''Constructs a ColumnarVideoLabels instance.
+
+        This constructor should not normally be called directly. Instead, use
+        the `from_video_labels` factory method.
 
-    Returns:
-        stream: a dictionary of stream info
+        Args:
+            See the class attributes. By default, an empty instance is
+            created. In addition, `float_dtype` specifies the numpy dtype in
+            which to store the floating point columns, which is np.float32
+            by default
+        '''
+        def _arr(a, dtype, shape=(0,)):
+            if a is None:
+                return np.zeros(shape, dtype=dtype)
+            return np.asarray(a, dtype=dtype).reshape((-1,) + shape[1:])
+
+        self.frame_numbers = _arr(frame_numbers, np.int64)
+        self.frame_attr_offsets = _arr(frame_attr_offsets, np.int64, (1,))
+        self.frame_attr_ids = _arr(frame_attr_ids, np.int32)
+        self.obj_frame_numbers = _arr(obj_frame_numbers, np.int64)
+        self.obj_label_ids = _arr(obj_label_ids, np.int32)
+        self.obj_bboxes = _arr(obj_bboxes, float_dtype, (0, 4))
+        self.obj_confidences = _arr(obj_confidences, float_dtype)
+        self.obj_scores = _arr(obj_scores, float_dtype)
+        self.obj_indexes = _arr(obj_indexes, np.int64)
+        self.obj_indexes_in_frame = _arr(obj_indexes_in_frame, np.int64)
+        self.obj_has_frame_number = _arr(obj_has_frame_number, bool)
+        self.obj_has_attrs = _arr(obj_has_attrs, bool)
+        self.obj_attr_offsets = _arr(obj_attr_offsets, np.int64, (1,))
+        self.obj_attr_ids = _arr(obj_attr_ids, np.int32)
+        self.labels = labels or []
+        self.attrs = attrs or []
+        self.schema = schema
 
-    Raises:
-        FFprobeError: if no stream info was found
-    '''
-    try:
-        ffprobe = FFprobe(opts=[
-            "-show_streams",             # get stream info
-            "-print_format", "json",     # return in JSON format
-        ])
-        out = ffprobe.run(inpath, decode=True)
+    def __getitem__(self, frame_number):
+        return self.get_frame(frame_number)
 
-        info = json.loads(out)
+    def __iter__(self):
+        return iter(self.frame_numbers.tolist())
 
-        for stream in info["streams"]:
-            if stream["codec_type"] == "video":
-                return stream
+    def __len__(self):
+        return len(self.frame_numbers)
 
-        logger.warning(
-            "No stream found with codec_type = video. Returning the first "
-            "stream")
-        return info["streams"][0]  # default to the first stream
-    except:
-        raise FFprobeError("Unable to get stream info for '%s'" % inpath)
+    def __bool__(self):
+        return len(self) > 0
 
+    @property
+    def has_schema(self):
+        '''Returns True/False whether the labels have an enforced schema.'''
+        return self.schema is not None
 
-def get_encoding_str(inpath, use_ffmpeg=True):
-    '''Get the encoding string of the input video.
+    @property
+    def num_objects(self):
+        '''The total number of objects in the video.'''
+        return len(self.obj_frame_numbers)
 
-    Args:
-        inpath: video path
-        use_ffmpeg: whether to use ffmpeg (True) or OpenCV (False)
-    '''
-    r = FFmpegVideoReader(inpath) if use_ffmpeg else OpenCVVideoReader(inpath)
-    with r:
-        return r.encoding_str
+    def has_frame(self, frame_number):
+        '''Returns True/False whether there are labels for the given frame
+        number.
+        '''
+        idx = np.searchsorted(self.frame_numbers, frame_number)
+        return bool(
+            idx < len(self.frame_numbers) and
+            self.frame_numbers[idx] == frame_number)
 
+    def get_frame(self, frame_number):
+        '''Gets the VideoFrameLabels for the given frame number, or an empty
+        VideoFrameLabels if the frame has no labels.
+        '''
+        frame_labels = VideoFrameLabels(frame_number)
+        idx = np.searchsorted(self.frame_numbers, frame_number)
+        if (idx < len(self.frame_numbers) and
+                self.frame_numbers[idx] == frame_number):
+            start, stop = self.frame_attr_offsets[idx:idx + 2]
+            for attr_id in self.frame_attr_ids[start:stop]:
+                frame_labels.add_frame_attribute(
+                    _copy_attribute(self.attrs[attr_id]))
+
+        frame_labels.add_objects(
+            self.get_objects(self.get_frame_object_inds(frame_number)))
+        return frame_labels
+
+    def get_label_id(self, label):
+        '''Returns the index of the given label in `labels`, or -1 if no
+        objects have the label.
+        '''
+        try:
+            return self.labels.index(label)
+        except ValueError:
+            return -1
 
-def get_frame_rate(inpath, use_ffmpeg=True):
-    '''Get the frame rate of the input video.
+    def get_frame_object_inds(self, frame_number):
+        '''Returns the indices of the objects in the given frame.
 
-    Args:
-        inpath: video path
-        use_ffmpeg: whether to use ffmpeg (True) or OpenCV (False)
-    '''
-    r = FFmpegVideoReader(inpath) if use_ffmpeg else OpenCVVideoReader(inpath)
-    with r:
-        return r.frame_rate
+        Args:
+            frame_number: the frame number
 
+        Returns:
+            an array of object indices
+        '''
+        start, stop = np.searchsorted(
+            self.obj_frame_numbers, [frame_number, frame_number + 1])
+        return np.arange(start, stop)
 
-def get_frame_size(inpath, use_ffmpeg=True):
-    '''Get the frame (width, height) of the input video.
+    def find_objects(self, labels=None, frames=None, min_confidence=None):
+        '''Returns the indices of the objects matching the given criteria.
 
-    Args:
-        inpath: video path
-        use_ffmpeg: whether to use ffmpeg (True) or OpenCV (False)
-    '''
-    r = FFmpegVideoReader(inpath) if use_ffmpeg else OpenCVVideoReader(inpath)
-    with r:
-        return r.frame_size
+        Args:
+            labels: an optional label or list of labels to match
+            frames: an optional FrameRanges instance or frames string like
+                "1-3,6,8-10" specifying the frames to match
+            min_confidence: an optional minimum confidence to match. Objects
+                with no confidence never match
 
+        Returns:
+            a sorted array of object indices
+        '''
+        mask = np.ones(self.num_objects, dtype=bool)
+        if labels is not None:
+            if isinstance(labels, six.string_types):
+                labels = [labels]
+            label_ids = [self.get_label_id(label) for label in labels]
+            mask &= np.isin(self.obj_label_ids, label_ids)
+        if frames is not None:
+            if isinstance(frames, six.string_types):
+                frames = FrameRanges.from_str(frames)
+            mask &= frames.contains(self.obj_frame_numbers)
+        if min_confidence is not None:
+            with np.errstate(invalid="ignore"):
+                mask &= self.obj_confidences >= min_confidence
+        return np.flatnonzero(mask)
 
-def get_frame_count(inpath, use_ffmpeg=True):
-    '''Get the number of frames in the input video.
+    def count_objects(self, labels=None):
+        '''Counts the objects in each frame of the video.
 
-    Args:
-        inpath: video path
-        use_ffmpeg: whether to use ffmpeg (True) or OpenCV (False)
-    '''
-    r = FFmpegVideoReader(inpath) if use_ffmpeg else OpenCVVideoReader(inpath)
-    with r:
-        return r.total_frame_count
+        Args:
+            labels: an optional label or list of labels to count. By
+                default, all objects are counted
 
+        Returns:
+            a [num_frames] array containing the number of objects in each
+                frame of `frame_numbers`
+        '''
+        inds = self.find_objects(labels=labels)
+        frame_inds = np.searchsorted(
+            self.frame_numbers, self.obj_frame_numbers[inds])
+        return np.bincount(frame_inds, minlength=len(self.frame_numbers))
 
-def get_raw_frame_number(raw_frame_rate, raw_frame_count, fps, sampled_frame):
-    '''Get the raw frame number corresponding to the given sampled frame
-    number.
+    def get_objects(self, inds):
+        '''Gets the given objects.
 
-    This function assumes that the sampling was performed using the command:
-    ```
-    FFmpeg(fps=fps).run(raw_video_path, ...)
-    ```
+        Args:
+            inds: an array-like of object indices
 
-    Args:
-        raw_frame_rate: the frame rate of the raw video
-        raw_frame_count: the number of frames in the raw video
-        fps: the sampling rate that was used
-        sampled_frame: the sampled frame number
+        Returns:
+            a DetectedObjectContainer
+        '''
+        objects = DetectedObjectContainer()
+        for idx in np.asarray(inds, dtype=np.int64).tolist():
+            objects.add(self._build_object(idx))
+        return objects
 
-    Returns:
-        raw_frame: the raw frame number from the input video corresponding to
-            the given sampled frame number
-    '''
-    delta = raw_frame_rate / (1.0 * fps)
-    raw_frame = np.minimum(
-        np.ceil(delta * (sampled_frame - 0.5)), raw_frame_count)
-    return int(raw_frame)
+    def to_video_labels(self):
+        '''Converts these labels into a VideoLabels instance.
 
+        Returns:
+            a VideoLabels instance
+        '''
+        frames = OrderedDict(
+            (frame_number, self.get_frame(frame_number))
+            for frame_number in self)
+        return VideoLabels(frames=frames, schema=self.schema)
 
-def extract_clip(
-        video_path, output_path, start_time=None, duration=None, fast=False):
-    '''Extracts the specified clip from the video.
+    def attributes(self):
+        '''Returns the list of class attributes that will be serialized.'''
+        _attrs = self._ARRAY_ATTRS + ["labels", "attrs"]
+        if self.has_schema:
+            _attrs.append("schema")
+        return _attrs
 
-    When fast=False, the following ffmpeg command is used:
-    ```
-    # Slow, accurate option
-    ffmpeg -ss <start_time> -i <video_path> -t <duration> <output_path>
-    ```
+    def to_bytes(self):
+        '''Serializes the labels into a compact binary representation.
 
-    When fast is True, the following two-step ffmpeg process is used:
-    ```
-    # Faster, less accurate option
-    ffmpeg -ss <start_time> -i <video_path> -t <duration> -c copy <tmp_path>
-    ffmpeg -i <tmp_path> <output_path>
-    ```
+        The columns are stored as numpy arrays in an (uncompressed) .npz
+        archive, and the remaining attributes are stored as JSON.
 
-    Args:
-        video_path: the path to a video
-        output_path: the path to write the extracted video clip
-        start_time: the start timestamp, which can either be a float value of
-            seconds or a string in "HH:MM:SS.XXX" format. If omitted, the
-            beginning of the video is used
-        duration: the clip duration, which can either be a float value of
-            seconds or a string in "HH:MM:SS.XXX" format. If omitted, the clip
-            extends to the end of the video
-        fast: whether to
-    '''
-    in_opts = []
-    if start_time is not None:
-        if not isinstance(start_time, six.string_types):
-            start_time = "%.3f" % start_time
-        in_opts.extend(["-ss", start_time])
+        Returns:
+            a bytes string
+        '''
+        arrays = {a: getattr(self, a) for a in self._ARRAY_ATTRS}
+        meta = OrderedDict([("labels", self.labels), ("attrs", self.attrs)])
+        if self.has_schema:
+            meta["schema"] = self.schema
+        arrays["meta"] = np.frombuffer(
+            etas.json_to_str(meta, pretty_print=False).encode("utf-8"),
+            dtype=np.uint8)
+
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        return buf.getvalue()
+
+    def _build_object(self, idx):
+        tlx, tly, brx, bry = [_to_float(x) for x in self.obj_bboxes[idx]]
+        bounding_box = BoundingBox(
+            RelativePoint(tlx, tly), RelativePoint(brx, bry))
+
+        attrs = None
+        if self.obj_has_attrs[idx]:
+            start, stop = self.obj_attr_offsets[idx:idx + 2]
+            attrs = AttributeContainer(attrs=[
+                _copy_attribute(self.attrs[attr_id])
+                for attr_id in self.obj_attr_ids[start:stop]])
+
+        frame_number = None
+        if self.obj_has_frame_number[idx]:
+            frame_number = int(self.obj_frame_numbers[idx])
+
+        return DetectedObject(
+            self.labels[self.obj_label_ids[idx]],
+            bounding_box,
+            confidence=_to_optional_float(self.obj_confidences[idx]),
+            index=self._to_optional_int(self.obj_indexes[idx]),
+            score=_to_optional_float(self.obj_scores[idx]),
+            frame_number=frame_number,
+            index_in_frame=self._to_optional_int(
+                self.obj_indexes_in_frame[idx]),
+            attrs=attrs,
+        )
 
-    out_opts = []
-    if duration is not None:
-        if not isinstance(duration, six.string_types):
-            duration = "%.3f" % duration
-        out_opts.extend(["-t", duration])
+    @classmethod
+    def _to_optional_int(cls, value):
+        return None if value == cls.MISSING else int(value)
 
-    if not fast:
-        # Extract clip carefully and accurately by decoding every frame
-        ffmpeg = FFmpeg(in_opts=in_opts, out_opts=out_opts)
-        ffmpeg.run(video_path, output_path)
-        return
+    @classmethod
+    def from_video_labels(cls, video_labels, float_dtype=np.float32):
+        '''Builds a ColumnarVideoLabels instance from a VideoLabels instance.
 
-    with etau.TempDir() as d:
-        tmp_path = os.path.join(d, os.path.basename(output_path))
+        Args:
+            video_labels: a VideoLabels instance
+            float_dtype: the numpy dtype in which to store the bounding box
+                coordinates, confidences, and scores. The default is
+                np.float32
 
-        # Extract clip as accurately and quickly as possible by only touching
-        # key frames. May lave blank frames in the video
-        out_opts.extend(["-c", "copy"])
-        ffmpeg = FFmpeg(in_opts=in_opts, out_opts=out_opts)
-        ffmpeg.run(video_path, tmp_path)
+        Returns:
+            a ColumnarVideoLabels instance
+        '''
+        label_ids = {}
+        attr_ids = {}
+
+        def _get_attr_id(attr):
+            key = (attr.type, attr.name, attr.value, attr.confidence)
+            if key not in attr_ids:
+                attr_ids[key] = len(attr_ids)
+                attrs.append(_copy_attribute(attr))
+            return attr_ids[key]
+
+        labels = []
+        attrs = []
+        frame_numbers = []
+        frame_attr_offsets = [0]
+        frame_attr_ids = []
+        obj_frame_numbers = []
+        obj_label_ids = []
+        obj_bboxes = []
+        obj_confidences = []
+        obj_scores = []
+        obj_indexes = []
+        obj_indexes_in_frame = []
+        obj_has_frame_number = []
+        obj_has_attrs = []
+        obj_attr_offsets = [0]
+        obj_attr_ids = []
 
-        # Clean up fast output by re-encoding the extracted clip
-        # Note that this may not exactly correspond to the slow, accurate
-        # implementation above
-        ffmpeg = FFmpeg(in_opts=[], out_opts=[])
-        ffmpeg.run(tmp_path, output_path)
+        for frame_number in video_labels:
+            frame_labels = video_labels[frame_number]
+            frame_numbers.append(frame_number)
+            frame_attr_ids.extend(
+                _get_attr_id(attr) for attr in frame_labels.attrs)
+            frame_attr_offsets.append(len(frame_attr_ids))
 
+            for obj in frame_labels.objects:
+                if obj.label not in label_ids:
+                    label_ids[obj.label] = len(labels)
+                    labels.append(obj.label)
+
+                tl = obj.bounding_box.top_left
+                br = obj.bounding_box.bottom_right
+                obj_frame_numbers.append(frame_number)
+                obj_label_ids.append(label_ids[obj.label])
+                obj_bboxes.append((tl.x, tl.y, br.x, br.y))
+                obj_confidences.append(_from_optional_float(obj.confidence))
+                obj_scores.append(_from_optional_float(obj.score))
+                obj_indexes.append(cls._from_optional_int(obj.index))
+                obj_indexes_in_frame.append(
+                    cls._from_optional_int(obj.index_in_frame))
+                obj_has_frame_number.append(obj.frame_number is not None)
+                obj_has_attrs.append(obj.has_attributes)
+                if obj.has_attributes:
+                    obj_attr_ids.extend(
+                        _get_attr_id(attr) for attr in obj.attrs)
+                obj_attr_offsets.append(len(obj_attr_ids))
 
-def sample_select_frames(video_path, frames, output_patt=None):
-    '''Samples the specified frames of the video.
+        return cls(
+            frame_numbers=frame_numbers,
+            frame_attr_offsets=frame_attr_offsets,
+            frame_attr_ids=frame_attr_ids,
+            obj_frame_numbers=obj_frame_numbers,
+            obj_label_ids=obj_label_ids,
+            obj_bboxes=obj_bboxes,
+            obj_confidences=obj_confidences,
+            obj_scores=obj_scores,
+            obj_indexes=obj_indexes,
+            obj_indexes_in_frame=obj_indexes_in_frame,
+            obj_has_frame_number=obj_has_frame_number,
+            obj_has_attrs=obj_has_attrs,
+            obj_attr_offsets=obj_attr_offsets,
+            obj_attr_ids=obj_attr_ids,
+            labels=labels,
+            attrs=attrs,
+            schema=video_labels.schema,
+            float_dtype=float_dtype,
+        )
 
-    This implementation uses ffmpeg, so it is expected to be efficient.
+    @classmethod
+    def _from_optional_int(cls, value):
+        return cls.MISSING if value is None else value
 
-    Args:
-        video_path: the path to a video
-        frames: a sorted list of frame numbers to sample
-        output_patt: an optional output pattern like "/path/to/frames-%d.png"
-            specifying where to write the sampled frames. If omitted, the
-            frames are instead returned in an in-memory list
+    @classmethod
+    def from_bytes(cls, b):
+        '''Constructs a ColumnarVideoLabels from the binary representation
+        generated by `to_bytes()`.
 
-    Returns:
-        a list of the sampled frames if output_patt is None, and None otherwise
-    '''
-    ext = os.path.splitext(output_patt)[1] if output_patt else ".png"
+        The floating point columns are loaded in the precision in which they
+        were stored.
+        '''
+        with np.load(io.BytesIO(b)) as npz:
+            d = {a: npz[a] for a in cls._ARRAY_ATTRS}
+            d.update(json.loads(npz["meta"].tobytes().decode("utf-8")))
+        return cls.from_dict(d, float_dtype=d["obj_bboxes"].dtype)
 
-    with etau.TempDir() as d:
-        # Sample frames to disk temporarily
-        tmp_patt = os.path.join(d, "frame-%d" + ext)
-        ss = "+".join(["eq(n\,%d)" % (f - 1) for f in frames])
-        ffmpeg = FFmpeg(out_opts=["-vf", "select='%s'" % ss, "-vsync", "0"])
-        ffmpeg.run(video_path, tmp_patt)
-
-        if output_patt is not None:
-            # Move frames into place with correct output names
-            for idx, fn in enumerate(frames, 1):
-                etau.move_file(tmp_patt % idx, output_patt % fn)
-            return
+    @classmethod
+    def from_dict(cls, d, float_dtype=np.float32):
+        '''Constructs a ColumnarVideoLabels from a JSON dictionary.
 
-        # Read frames into memory
-        imgs = []
-        for idx in range(1, len(frames) + 1):
-            imgs.append(etai.read(tmp_patt % idx))
+        Args:
+            d: a JSON dictionary
+            float_dtype: the numpy dtype in which to store the bounding box
+                coordinates, confidences, and scores. The default is
+                np.float32
 
-        return imgs
+        Returns:
+            a ColumnarVideoLabels instance
+        '''
+        schema = d.get("schema", None)
+        if schema is not None:
+            schema = VideoLabelsSchema.from_dict(schema)
 
+        kwargs = {k: v for k, v in iteritems(d) if k != "schema"}
+        kwargs["attrs"] = [Attribute.from_dict(a) for a in d["attrs"]]
+        return cls(schema=schema, float_dtype=float_dtype, **kwargs)
 
-def sample_first_frames(arg, k, size=None):
-    '''Samples the first k frames in a video.
 
-    Args:
-        arg: can be either the path to the input video or an array of frames
-            of size [num_frames, height, width, num_channels]
-        k: number of frames to extract
-        size: an optional [width, height] to resize the sampled frames. By
-            default, the native dimensions of the frames are used
+def _copy_attribute(attr):
+    return attr.__class__(attr.name, attr.value, confidence=attr.confidence)
 
-    Returns:
-        A numpy array of size [k, height, width, num_channels]
-    '''
-    # Read frames ...
-    if isinstance(arg, six.string_types):
-        # ... from disk
-        with FFmpegVideoReader(arg, frames="1-%d" % k) as vr:
-            imgs = [img for img in vr]
-    else:
-        # ... from tensor
-        imgs = arg[:k]
 
-    # Resize frames, if necessary
-    if size:
-        imgs = [etai.resize(img, *size) for img in imgs]
+def _to_optional_float(value):
+    return None if np.isnan(value) else _to_float(value)
 
-    return np.array(imgs)
 
+def _to_float(value):
+    # Converts the single precision value to the double closest to its
+    # shortest decimal representation, so that values like 0.2 are recovered
+    # exactly
+    return float(str(value))
 
-def uniformly_sample_frames(arg, k, size=None):
-    '''Uniformly samples k frames from the video, always including the first
-    and last frames.
 
-    Args:
-        arg: can be either the path to the input video or an array of frames
-            of size [num_frames, height, width, num_channels]
-        k: the number of frames to extract
-        size: an optional [width, height] to resize the sampled frames. By
-            default, the native dimensions of the frames are used
+def _from_optional_float(value):
+    return np.nan if value is None else value
 
-    Returns:
-        A numpy array of size [k, height, width, num_channels]
-    '''
-    is_video_file = isinstance(arg, six.string_types)
 
-    # Compute 1-based frames
-    num_frames = get_frame_count(arg) if is_video_file else len(arg)
-    frames = [int(round(i)) for i in np.linspace(1, min(num_frames, k), k)]
+class VideoLabelsJSONReader(object):
+    '''Class for iteratively reading the frames of a VideoLabels JSON file.
 
-    # Read frames ...
-    if is_video_file:
-        # ... from disk
-        with FFmpegVideoReader(arg, frames=frames) as vr:
-            imgs = [img for img in vr]
-    else:
-        # ... from tensor
-        imgs = [arg[f - 1] for f in frames]
+    The file is parsed incrementally, so only the frame currently being read
+    is held in memory. Frames are generated in the order in which they appear
+    in the file, which is ascending order for files written by
+    VideoLabelsJSONWriter.
 
-    # Resize frames, if necessary
-    if size:
-        imgs = [etai.resize(img, *size) for img in imgs]
+    When specific frames are requested, the labels of the other frames are
+    skipped without being decoded. If the frames in the file are known to be
+    in ascending order, `ascending=True` can be passed so that reading stops
+    after the last requested frame. Files written by `VideoLabels.write_json()`
+    store their frames in insertion order, which need not be ascending.
 
-    return np.array(imgs)
+    Example:
+        ```
+        with VideoLabelsJSONReader("labels.json", frames="1-100") as reader:
+            for frame_labels in reader:
+                ...
+        ```
 
+    Attributes:
+        path: the path to the VideoLabels JSON file
+        frames: a FrameRanges instance describing the frames to read, or None
+            if all frames are read
+        schema: the VideoLabelsSchema of the labels, or None if the labels
+            have no schema (or it has not been read yet). If present, the
+            schema is available once the frames have been read. When reading
+            stops after the last requested frame, a schema that follows the
+            frames in the file is not read
+        ascending: whether the frames in the file are in ascending order
+    '''
 
-def sliding_window_sample_frames(arg, k, stride, size=None):
-    '''Samples clips from the video using a sliding window of the given
-    length and stride.
+    def __init__(
+            self, path, frames=None, ascending=False, chunk_size=1048576):
+        '''Creates a VideoLabelsJSONReader instance.
 
-    Args:
-        arg: can be either the path to the input video or an array of frames
-            of size [num_frames, height, width, num_channels]
-        k: the size of each window
-        stride: the stride for sliding window
-        size: an optional [width, height] to resize the sampled frames. By
-            default, the native dimensions of the frames are used
+        Args:
+            path: the path to the VideoLabels JSON file
+            frames: an optional FrameRanges instance or frames string like
+                "1-3,6,8-10" specifying the frames to read. By default, all
+                frames are read
+            ascending: whether the frames in the file are known to be in
+                ascending order, as they are in files written by
+                VideoLabelsJSONWriter, so reading can stop after the last
+                requested frame. In this case, a VideoLabelsJSONError is
+                raised if frames are found out of order. The default is False
+            chunk_size: the number of characters to read from the file at a
+                time. The default is 1048576
+        '''
+        if isinstance(frames, six.string_types):
+            frames = FrameRanges.from_str(frames)
+        self.path = path
+        self.frames = frames
+        self.ascending = ascending
+        self.schema = None
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._f = open(path, "rt")
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._done = False
 
-    Returns:
-        A numpy array of size [XXXX, k, height, width, num_channels]
-    '''
-    is_video_file = isinstance(arg, six.string_types)
+    def __enter__(self):
+        return self
 
-    # Determine clip indices
-    num_frames = get_frame_count(arg) if is_video_file else len(arg)
-    delta = np.arange(1, k + 1)
-    offsets = np.array(list(range(0, num_frames + 1 - k, stride)))
-    clip_inds = offsets[:, np.newaxis] + delta[np.newaxis, :]
-    frames = list(np.unique(clip_inds))
+    def __exit__(self, *args):
+        self.close()
 
-    # Read frames ...
-    imgs = {}
-    if is_video_file:
-        # ... from disk
-        with FFmpegVideoReader(arg, frames=frames) as vr:
-            for img in vr:
-                imgs[vr.frame_number] = img
-    else:
-        # ... from tensor
-        for fn in frames:
-            imgs[fn] = arg[fn - 1]
+    def __iter__(self):
+        '''Returns a generator over the VideoFrameLabels in the file.
 
-    # Resize frames, if necessary
-    if size:
-        imgs = {fn: etai.resize(img, *size) for fn, img in iteritems(imgs)}
+        Raises:
+            VideoLabelsJSONError: if the file is not a valid VideoLabels JSON
+                file
+        '''
+        self._expect("{")
+        while True:
+            c = self._peek()
+            if c == "}":
+                break
+            if c == ",":
+                self._pos += 1
+                continue
+
+            key = self._decode()
+            self._expect(":")
+            if key == "frames":
+                for frame_labels in self._iter_frames():
+                    yield frame_labels
+                if self._done:
+                    break
+            elif key == "schema":
+                self.schema = VideoLabelsSchema.from_dict(self._decode())
+            else:
+                self._decode()
 
-    # Generate clips tensor
-    clips = []
-    for inds in clip_inds:
-        clips.append(np.array([imgs[k] for k in inds]))
+    def close(self):
+        '''Closes the file.'''
+        self._f.close()
+
+    def _iter_frames(self):
+        last_frame = None
+        if self.frames is not None and self.ascending:
+            intervals = self.frames.intervals
+            last_frame = intervals[-1, 1] if len(intervals) else 0
+
+        prev_frame = -1
+        self._expect("{")
+        while True:
+            c = self._peek()
+            if c == "}":
+                self._pos += 1
+                return
+            if c == ",":
+                self._pos += 1
+                continue
+
+            frame_number = int(self._decode())
+            if self.ascending and frame_number <= prev_frame:
+                raise VideoLabelsJSONError(
+                    "Frames of '%s' are not in ascending order; found frame "
+                    "%d after frame %d" % (
+                        self.path, frame_number, prev_frame))
+            prev_frame = frame_number
+
+            if last_frame is not None and frame_number > last_frame:
+                # No requested frames remain
+                self._done = True
+                return
+
+            self._expect(":")
+            if self.frames is None or frame_number in self.frames:
+                yield VideoFrameLabels.from_dict(self._decode())
+            else:
+                self._skip()
+
+    def _fill(self):
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+
+    def _peek(self):
+        while True:
+            while (self._pos < len(self._buf) and
+                    self._buf[self._pos].isspace()):
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._eof:
+                raise VideoLabelsJSONError(
+                    "Unexpected end of file '%s'" % self.path)
+            self._fill()
+
+    def _expect(self, c):
+        if self._peek() != c:
+            raise VideoLabelsJSONError(
+                "Expected '%s' in file '%s'; found '%s'" % (
+                    c, self.path, self._buf[self._pos]))
+        self._pos += 1
+
+    def _skip(self):
+        # Skips the next JSON value without decoding it. Objects and arrays
+        # are skipped by matching their brackets, outside of strings
+        if self._peek() not in "{[":
+            self._decode()
+            return
 
-    return np.array(clips)
+        depth = 0
+        in_string = False
+        while True:
+            pattern = _JSON_STRING_DELIMS if in_string else _JSON_DELIMS
+            m = pattern.search(self._buf, self._pos)
+            if m is None or m.end() >= len(self._buf) and not self._eof:
+                # The next delimiter (or escaped character) may not have
+                # been read yet
+                if self._eof:
+                    raise VideoLabelsJSONError(
+                        "Unable to parse JSON file '%s'" % self.path)
+                if m is not None:
+                    self._pos = m.start()
+                else:
+                    self._pos = len(self._buf)
+                self._fill()
+                continue
+
+            c = m.group()
+            self._pos = m.end()
+            if c == "\\":
+                # Skip the escaped character
+                self._pos += 1
+            elif c == '"':
+                in_string = not in_string
+            elif c in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
 
+    def _decode(self):
+        self._peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buf, self._pos)
+            except ValueError:
+                end = None
+
+            # A value that ends at the end of the buffer may be truncated
+            if end is not None and (end < len(self._buf) or self._eof):
+                self._pos = end
+                return obj
+            if self._eof:
+                raise VideoLabelsJSONError(
+                    "Unable to parse JSON file '%s'" % self.path)
+            self._fill()
+
+
+_JSON_DELIMS = re.compile(r'["{}\[\]]')
+_JSON_STRING_DELIMS = re.compile(r'["\\]')
+
+
+class VideoLabelsJSONWriter(object):
+    '''Class for incrementally writing labels to a VideoLabels JSON file.
+
+    This class supports the same methods as VideoLabels for adding labels to
+    frames, but each frame is written to disk as soon as labels are added to
+    a later frame, so that long-running jobs such as object detectors can
+    stream their labels to disk rather than holding them in memory. Thus
+    labels must be added in ascending frame order.
+
+    The output file is a valid VideoLabels JSON file once the writer is
+    closed.
+
+    Example:
+        ```
+        with VideoLabelsJSONWriter("labels.json") as writer:
+            for frame_number, objects in ...:
+                writer.add_objects(objects, frame_number)
+        ```
+    '''
 
-class VideoProcessor(object):
-    '''Class for reading a video and writing a new video frame-by-frame.
+    def __init__(self, path, schema=None):
+        '''Creates a VideoLabelsJSONWriter instance.
 
-    The typical usage is:
-    ```
-    with VideoProcessor(...) as p:
-        for img in p:
-            new_img = ... # process img
-            p.write(new_img)
-    ```
-    '''
+        Args:
+            path: the output path
+            schema: an optional VideoLabelsSchema to enforce on the labels.
+                By default, no schema is enforced
+        '''
+        self.path = path
+        self.schema = schema
+        self._compiled_schema = None
+        if schema is not None:
+            self._compiled_schema = schema.compile()
+        self._frame_labels = None
+        self._last_frame_number = None
+        etau.ensure_basedir(path)
+        self._f = open(path, "wt")
+        self._f.write('{\n"frames": {')
 
-    def __init__(
-            self,
-            inpath,
-            frames=None,
-            in_use_ffmpeg=True,
-            out_use_ffmpeg=True,
-            out_images_path=None,
-            out_video_path=None,
-            out_clips_path=None,
-            out_fps=None,
-            out_size=None,
-            out_opts=None):
-        '''Constructs a new VideoProcessor instance.
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def has_schema(self):
+        '''Returns True/False whether the writer has an enforced schema.'''
+        return self.schema is not None
+
+    def add_frame(self, frame_labels):
+        '''Adds the frame labels to the video.
 
         Args:
-            inpath: path to the input video. Passed directly to a VideoReader
-            frames: an optional string specifying the range(s) of frames to
-                process. Passed directly to a VideoReader
-            in_use_ffmpeg: whether to use FFmpegVideoReader to read input
-                videos rather than OpenCVVideoReader
-            out_use_ffmpeg: whether to use FFmpegVideoWriter to write output
+            frame_labels: a VideoFrameLabels instance
+
+        Raises:
+            VideoLabelsJSONError: if a later frame has already been added
+        '''
+        if self.has_schema:
+            self._compiled_schema.validate_frame_attributes(
+                frame_labels.attrs)
+            self._compiled_schema.validate_objects(frame_labels.objects)
+        self._get_frame(frame_labels.frame_number).merge_frame_labels(
+            frame_labels)
+
+    def add_frame_attribute(self, frame_attr, frame_number):
+        '''Adds the given frame attribute to the video.
+
+        Args:
+            frame_attr: an Attribute
+            frame_number: the frame number
+
+        Raises:
+            VideoLabelsJSONError: if a later frame has already been added
+        '''
+        if self.has_schema:
+            self._compiled_schema.validate_frame_attributes([frame_attr])
+        self._get_frame(frame_number).add_frame_attribute(frame_attr)
+
+    def add_frame_attributes(self, frame_attrs, frame_number):
+        '''Adds the given frame attributes to the video.
+
+        Args:
+            frame_attrs: an AttributeContainer
+            frame_number: the frame number
+
+        Raises:
+            VideoLabelsJSONError: if a later frame has already been added
+        '''
+        if self.has_schema:
+            self._compiled_schema.validate_frame_attributes(frame_attrs)
+        self._get_frame(frame_number).add_frame_attributes(frame_attrs)
+
+    def add_object(self, obj, frame_number):
+        '''Adds the object to the video.
+
+        Args:
+            obj: a DetectedObject
+            frame_number: the frame number
+
+        Raises:
+            VideoLabelsJSONError: if a later frame has already been added
+        '''
+        if self.has_schema:
+            self._compiled_schema.validate_objects([obj])
+        obj.frame_number = frame_number
+        self._get_frame(frame_number).add_object(obj)
+
+    def add_objects(self, objs, frame_number):
+        '''Adds the objects to the video.
+
+        Args:
+            objs: a DetectedObjectContainer
+            frame_number: the frame number
+
+        Raises:
+            VideoLabelsJSONError: if a later frame has already been added
+        '''
+        if self.has_schema:
+            self._compiled_schema.validate_objects(objs)
+        frame_labels = self._get_frame(frame_number)
+        for obj in objs:
+            obj.frame_number = frame_number
+            frame_labels.add_object(obj)
+
+    def flush(self):
+        '''Writes the labels of the current frame to disk.
+
+        No more labels can be added to the current frame after this method is
+        called.
+        '''
+        if self._frame_labels is not None:
+            self._write_frame(self._frame_labels)
+            self._frame_labels = None
+        self._f.flush()
+
+    def close(self):
+        '''Writes any pending labels and closes the file.'''
+        if self._f.closed:
+            return
+
+        self.flush()
+        self._f.write("\n}")
+        if self.has_schema:
+            self._f.write(
+                ',\n"schema": %s' % etas.json_to_str(
+                    self.schema, pretty_print=False))
+        self._f.write("\n}\n")
+        self._f.close()
+
+    def _get_frame(self, frame_number):
+        if (self._frame_labels is not None and
+                self._frame_labels.frame_number == frame_number):
+            return self._frame_labels
+
+        last_frame_number = self._last_frame_number
+        if self._frame_labels is not None:
+            last_frame_number = self._frame_labels.frame_number
+        if last_frame_number is not None and frame_number < last_frame_number:
+            raise VideoLabelsJSONError(
+                "Frames must be added in ascending order; found frame %d "
+                "after frame %d" % (frame_number, last_frame_number))
+        if frame_number == self._last_frame_number:
+            raise VideoLabelsJSONError(
+                "Frame %d has already been written" % frame_number)
+
+        self.flush()
+        self._frame_labels = VideoFrameLabels(frame_number)
+        return self._frame_labels
+
+    def _write_frame(self, frame_labels):
+        sep = "," if self._last_frame_number is not None else ""
+        self._f.write('%s\n"%d": %s' % (
+            sep, frame_labels.frame_number,
+            etas.json_to_str(frame_labels, pretty_print=False)))
+        self._last_frame_number = frame_labels.frame_number
+
+
+class VideoLabelsJSONError(Exception):
+    '''Error raised when a VideoLabels JSON file cannot be read or written.'''
+    pass
+
+
+class VideoLabelsBinaryReader(object):
+    '''Class for random access to the frames of a VideoLabels file in the ETA
+    binary format.
+
+    Only the chunk of the file that contains the requested frame is read,
+    and the most recently read chunk is cached, so accessing nearby frames is
+    cheap.
+
+    Example:
+        ```
+        with VideoLabelsBinaryReader("labels.etab") as reader:
+            frame_labels = reader[1000]
+            labels = reader.get_labels("2000-3000")
+        ```
+
+    Attributes:
+        path: the path to the file
+        schema: the VideoLabelsSchema of the labels, or None if the labels
+            have no schema
+    '''
+
+    def __init__(self, path):
+        '''Creates a VideoLabelsBinaryReader instance.
+
+        Args:
+            path: the path to a file written by `VideoLabels.write_binary()`
+        '''
+        self.path = path
+        self._reader = etas.BinaryFileReader(path)
+        self._firsts = [chunk["first"] for chunk in self._reader.chunks]
+        self._chunk_idx = None
+        self._chunk = None
+
+        self.schema = self._reader.header.get("schema", None)
+        if self.schema is not None:
+            self.schema = VideoLabelsSchema.from_dict(self.schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getitem__(self, frame_number):
+        return self.get_frame(frame_number)
+
+    def __iter__(self):
+        '''Returns a generator over the VideoFrameLabels in the file, in
+        ascending order of frame number.
+        '''
+        for idx in range(self._reader.num_chunks):
+            chunk = self._get_chunk(idx)
+            for frame_number in chunk:
+                yield chunk.get_frame(frame_number)
+
+    def has_frame(self, frame_number):
+        '''Returns True/False whether the file contains labels for the given
+        frame number.
+        '''
+        idx = self._find_chunk(frame_number)
+        return idx is not None and self._get_chunk(idx).has_frame(frame_number)
+
+    def get_frame(self, frame_number):
+        '''Gets the VideoFrameLabels for the given frame number, or an empty
+        VideoFrameLabels if the frame has no labels.
+        '''
+        idx = self._find_chunk(frame_number)
+        if idx is None:
+            return VideoFrameLabels(frame_number)
+        return self._get_chunk(idx).get_frame(frame_number)
+
+    def get_labels(self, frames=None):
+        '''Loads the labels for the given frames.
+
+        Args:
+            frames: an optional FrameRanges instance or frames string like
+                "1-3,6,8-10" specifying the frames to load. By default, all
+                frames are loaded
+
+        Returns:
+            a VideoLabels instance
+        '''
+        return VideoLabels._read_binary(self._reader, frames=frames)
+
+    def close(self):
+        '''Closes the file.'''
+        self._reader.close()
+
+    def _find_chunk(self, frame_number):
+        idx = bisect.bisect_right(self._firsts, frame_number) - 1
+        if idx < 0 or frame_number > self._reader.chunks[idx]["last"]:
+            return None
+        return idx
+
+    def _get_chunk(self, idx):
+        if idx != self._chunk_idx:
+            self._chunk = ColumnarVideoLabels.from_bytes(
+                self._reader.read_chunk(idx))
+            self._chunk_idx = idx
+        return self._chunk
+
+
+class VideoStreamInfo(Serializable):
+    '''Class encapsulating the stream info for a video.'''
+
+    def __init__(self, stream_info):
+        '''Constructs a VideoStreamInfo instance.
+
+        This constructor should not normally be called directly. The proper way
+        to instantiate this class is via the `build_for` factory method.
+
+        Args:
+            stream_info: a dictionary generated by `get_stream_info()`
+        '''
+        self.stream_info = stream_info
+
+    @property
+    def encoding_str(self):
+        '''Return the video encoding string.'''
+        return str(self.stream_info["codec_tag_string"])
+
+    @property
+    def frame_size(self):
+        '''The (width, height) of each frame.'''
+        return (
+            int(self.stream_info["width"]),
+            int(self.stream_info["height"]),
+        )
+
+    @property
+    def aspect_ratio(self):
+        '''The aspect ratio of the video.'''
+        width, height = self.frame_size
+        return width * 1.0 / height
+
+    @property
+    def frame_rate(self):
+        '''The frame rate.'''
+        try:
+            try:
+                num, denom = self.stream_info["avg_frame_rate"].split("/")
+                return float(num) / float(denom)
+            except ZeroDivisionError:
+                num, denom = self.stream_info["r_frame_rate"].split("/")
+                return float(num) / float(denom)
+        except (KeyError, ValueError):
+            raise VideoStreamInfoError(
+                "Unable to determine frame rate from stream info")
+
+    @property
+    def total_frame_count(self):
+        '''The total number of frames in the video, or 0 if it could not be
+        determined.
+
+        If the container does not report the number of frames, any count
+        previously computed by `count_frames()` is used.
+        '''
+        for key in ("nb_frames", "nb_read_frames", "nb_read_packets"):
+            # these fail for directories of frames
+            if key in self.stream_info:
+                return int(self.stream_info[key])
+
+        # this seems to work for directories of frames
+        return int(self.stream_info.get("duration_ts", 0))
+
+    def get_raw_value(self, key):
+        '''Gets a value from the raw stream info dictionary.
+
+        Args:
+            key: the key to lookup in the stream info dictionary
+
+        Returns:
+            the value for the given key
+
+        Raises:
+            KeyError: if the key was not found in the stream info dictionary
+        '''
+        return self.stream_info[key]
+
+    def attributes(self):
+        '''Returns the list of class attributes that will be serialized.'''
+        return self.custom_attributes(dynamic=True)
+
+    @classmethod
+    def build_for(cls, inpath, use_cache=True):
+        '''Builds a VideoStreamInfo object for the given video using
+        `get_stream_info()`.
+
+        Args:
+            inpath: the path to the input video
+            use_cache: whether to use the stream info cache. By default, this
+                is True
+
+        Returns:
+            a VideoStreamInfo instance
+        '''
+        return cls(get_stream_info(inpath, use_cache=use_cache))
+
+    @classmethod
+    def from_dict(cls, d):
+        '''Constructs a VideoStreamInfo from a JSON dictionary.'''
+        return cls(d["stream_info"])
+
+
+class VideoStreamInfoError(Exception):
+    '''Exception raised when an invalid video stream info dictionary is
+    encountered.
+    '''
+    pass
+
+
+def get_stream_info(inpath, use_cache=True):
+    '''Get stream info for the video using `ffprobe -show_streams`.
+
+    By default, the results are served from the process-wide
+    `StreamInfoCache` returned by `get_stream_info_cache()`, so repeated calls
+    for an unchanged video file do not spawn new ffprobe processes.
+
+    Args:
+        inpath: video path
+        use_cache: whether to use the stream info cache. By default, this is
+            True
+
+    Returns:
+        stream: a dictionary of stream info
+
+    Raises:
+        FFprobeError: if no stream info was found
+    '''
+    if use_cache:
+        return get_stream_info_cache().get(inpath)
+    return _probe_stream_info(inpath)
+
+
+def probe_many(inpaths, num_workers=None, use_cache=True):
+    '''Gets the stream info for multiple videos, running the required
+    ffprobe processes concurrently.
+
+    Args:
+        inpaths: a list of video paths
+        num_workers: the maximum number of concurrent ffprobe processes. By
+            default, the number of CPUs is used
+        use_cache: whether to use the stream info cache. By default, this is
+            True
+
+    Returns:
+        a list of VideoStreamInfo instances, in the same order as `inpaths`
+
+    Raises:
+        FFprobeError: if the stream info for any video could not be found
+    '''
+    if use_cache:
+        infos = get_stream_info_cache().get_many(
+            inpaths, num_workers=num_workers)
+    else:
+        infos = _map_threaded(_probe_stream_info, inpaths, num_workers)
+    return [VideoStreamInfo(info) for info in infos]
+
+
+class StreamInfoCache(object):
+    '''An LRU cache of video stream info, optionally persisted to disk.
+
+    Entries are keyed by the real path of each video and are validated
+    against the size and modification time of the file, so a cached entry is
+    discarded as soon as the underlying file changes. Inputs that are not
+    regular files (e.g., image sequence patterns or URLs) are always probed.
+
+    The on-disk cache is an append-only file containing one JSON entry per
+    line, which is compacted whenever it grows to more than twice the
+    capacity of the cache. It is safe to share the cache file among multiple
+    processes; concurrent updates may at worst cause redundant probes.
+
+    This class is thread-safe.
+    '''
+
+    def __init__(self, max_size=4096, cache_path=None):
+        '''Constructs a StreamInfoCache.
+
+        Args:
+            max_size: the maximum number of entries to keep in the cache.
+                The default is 4096
+            cache_path: an optional path to a file in which to persist the
+                cache across processes
+        '''
+        self.max_size = max_size
+        self.cache_path = cache_path or None
+        self._entries = OrderedDict()
+        self._num_lines = 0
+        self._lock = threading.RLock()
+        if self.cache_path:
+            self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, inpath):
+        '''Gets the stream info for the given video, probing it if necessary.
+
+        Args:
+            inpath: video path
+
+        Returns:
+            a dictionary of stream info
+
+        Raises:
+            FFprobeError: if no stream info was found
+        '''
+        key = _get_stream_info_cache_key(inpath)
+        if key is None:
+            return _probe_stream_info(inpath)
+
+        info = self._lookup(key)
+        if info is None:
+            info = _probe_stream_info(inpath)
+            self._insert(key, info)
+        return dict(info)
+
+    def get_many(self, inpaths, num_workers=None):
+        '''Gets the stream info for multiple videos, probing any uncached
+        videos concurrently.
+
+        Args:
+            inpaths: a list of video paths
+            num_workers: the maximum number of concurrent ffprobe processes.
+                By default, the number of CPUs is used
+
+        Returns:
+            a list of stream info dictionaries, in the same order as `inpaths`
+
+        Raises:
+            FFprobeError: if the stream info for any video could not be found
+        '''
+        infos = [None] * len(inpaths)
+        misses = []
+        for idx, inpath in enumerate(inpaths):
+            key = _get_stream_info_cache_key(inpath)
+            info = self._lookup(key) if key is not None else None
+            if info is not None:
+                infos[idx] = dict(info)
+            else:
+                misses.append((idx, inpath, key))
+
+        if misses:
+            logger.debug("Probing %d uncached videos", len(misses))
+            probed = _map_threaded(
+                _probe_stream_info, [m[1] for m in misses], num_workers)
+            for (idx, _, key), info in zip(misses, probed):
+                if key is not None:
+                    self._insert(key, info)
+                infos[idx] = dict(info)
+
+        return infos
+
+    def put(self, inpath, stream_info):
+        '''Stores the given stream info for the given video, replacing any
+        existing entry. This is useful to record additional fields such as
+        those computed by `count_frames()`.
+
+        Videos that are not regular files are not cached, in which case this
+        method has no effect.
+
+        Args:
+            inpath: video path
+            stream_info: a dictionary of stream info
+        '''
+        key = _get_stream_info_cache_key(inpath)
+        if key is not None:
+            self._insert(key, dict(stream_info))
+
+    def clear(self):
+        '''Removes all entries from the cache, including those on disk.'''
+        with self._lock:
+            self._entries.clear()
+            if self.cache_path:
+                self._compact()
+
+    def _lookup(self, key):
+        path, size, mtime = key
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            if entry["size"] != size or entry["mtime"] != mtime:
+                del self._entries[path]
+                return None
+            # Mark as most recently used
+            del self._entries[path]
+            self._entries[path] = entry
+            return entry["stream_info"]
+
+    def _insert(self, key, info):
+        path, size, mtime = key
+        entry = {
+            "path": path, "size": size, "mtime": mtime, "stream_info": info}
+        with self._lock:
+            self._entries.pop(path, None)
+            self._entries[path] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            if self.cache_path:
+                self._append(entry)
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "rt") as f:
+                lines = f.readlines()
+        except IOError:
+            return
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+                path = entry["path"]
+                is_valid = _is_valid_stream_info_cache_entry(entry)
+            except (ValueError, KeyError, TypeError):
+                is_valid = False
+            if not is_valid:
+                # Skip partially written or corrupt entries
+                continue
+            self._entries.pop(path, None)
+            self._entries[path] = entry
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        self._num_lines = len(lines)
+
+    def _append(self, entry):
+        if self._num_lines >= 2 * self.max_size:
+            self._compact()
+            return
+
+        try:
+            etau.ensure_basedir(self.cache_path)
+            with open(self.cache_path, "at") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._num_lines += 1
+        except (IOError, OSError) as e:
+            logger.warning(
+                "Unable to write to stream info cache '%s': %s",
+                self.cache_path, e)
+
+    def _compact(self):
+        tmp_path = "%s.%d.tmp" % (self.cache_path, os.getpid())
+        try:
+            etau.ensure_basedir(self.cache_path)
+            with open(tmp_path, "wt") as f:
+                for entry in itervalues(self._entries):
+                    f.write(json.dumps(entry) + "\n")
+            etau.move_file(tmp_path, self.cache_path)
+            self._num_lines = len(self._entries)
+        except (IOError, OSError) as e:
+            logger.warning(
+                "Unable to write to stream info cache '%s': %s",
+                self.cache_path, e)
+
+
+_STREAM_INFO_CACHE = None
+_STREAM_INFO_CACHE_LOCK = threading.Lock()
+
+
+def get_stream_info_cache():
+    '''Gets the process-wide StreamInfoCache.
+
+    The cache is created on first use according to the
+    `stream_info_cache_size` and `stream_info_cache_path` ETA config
+    settings.
+
+    Returns:
+        the StreamInfoCache instance
+    '''
+    global _STREAM_INFO_CACHE
+    with _STREAM_INFO_CACHE_LOCK:
+        if _STREAM_INFO_CACHE is None:
+            _STREAM_INFO_CACHE = StreamInfoCache(
+                max_size=eta.config.stream_info_cache_size,
+                cache_path=eta.config.stream_info_cache_path)
+        return _STREAM_INFO_CACHE
+
+
+def _is_valid_stream_info_cache_entry(entry):
+    return (
+        isinstance(entry["path"], six.string_types) and
+        isinstance(entry["size"], six.integer_types) and
+        isinstance(entry["mtime"], (float,) + six.integer_types) and
+        isinstance(entry["stream_info"], dict))
+
+
+def _get_stream_info_cache_key(inpath):
+    try:
+        path = os.path.realpath(inpath)
+        stat = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return None
+
+    if not os.path.isfile(path):
+        return None
+
+    return path, stat.st_size, stat.st_mtime
+
+
+def _map_threaded(fcn, args, num_workers=None):
+    num_workers = min(num_workers or multiprocessing.cpu_count(), len(args))
+    if num_workers <= 1:
+        return [fcn(arg) for arg in args]
+
+    pool = multiprocessing.pool.ThreadPool(num_workers)
+    try:
+        return pool.map(fcn, args)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _probe_stream_info(inpath):
+    try:
+        ffprobe = FFprobe(opts=[
+            "-show_streams",             # get stream info
+            "-print_format", "json",     # return in JSON format
+        ])
+        out = ffprobe.run(inpath, decode=True)
+
+        info = json.loads(out)
+
+        for stream in info["streams"]:
+            if stream["codec_type"] == "video":
+                return stream
+
+        logger.warning(
+            "No stream found with codec_type = video. Returning the first "
+            "stream")
+        return info["streams"][0]  # default to the first stream
+    except:
+        raise FFprobeError("Unable to get stream info for '%s'" % inpath)
+
+
+def get_encoding_str(inpath, use_ffmpeg=True):
+    '''Get the encoding string of the input video.
+
+    Args:
+        inpath: video path
+        use_ffmpeg: whether to use ffmpeg (True) or OpenCV (False)
+    '''
+    if use_ffmpeg:
+        return VideoStreamInfo.build_for(inpath).encoding_str
+
+    with OpenCVVideoReader(inpath) as r:
+        return r.encoding_str
+
+
+def get_frame_rate(inpath, use_ffmpeg=True):
+    '''Get the frame rate of the input video.
+
+    Args:
+        inpath: video path
+        use_ffmpeg: whether to use ffmpeg (True) or OpenCV (False)
+    '''
+    if use_ffmpeg:
+        return VideoStreamInfo.build_for(inpath).frame_rate
+
+    with OpenCVVideoReader(inpath) as r:
+        return r.frame_rate
+
+
+def get_frame_size(inpath, use_ffmpeg=True):
+    '''Get the frame (width, height) of the input video.
+
+    Args:
+        inpath: video path
+        use_ffmpeg: whether to use ffmpeg (True) or OpenCV (False)
+    '''
+    if use_ffmpeg:
+        return VideoStreamInfo.build_for(inpath).frame_size
+
+    with OpenCVVideoReader(inpath) as r:
+        return r.frame_size
+
+
+def has_audio(inpath):
+    '''Determines whether the input video has an audio stream.
+
+    Args:
+        inpath: video path
+
+    Returns:
+        True/False
+
+    Raises:
+        FFprobeError: if the video could not be probed
+    '''
+    try:
+        ffprobe = FFprobe(opts=[
+            "-select_streams", "a",     # audio streams only
+            "-show_entries", "stream=index",
+            "-print_format", "json",    # return in JSON format
+        ])
+        out = ffprobe.run(inpath, decode=True)
+        return bool(json.loads(out).get("streams", []))
+    except Exception:
+        raise FFprobeError("Unable to probe audio of '%s'" % inpath)
+
+
+def get_frame_count(inpath, use_ffmpeg=True):
+    '''Get the number of frames in the input video.
+
+    When using ffmpeg, the frame count reported by the container is used if
+    available. Otherwise, the frames of video files are counted via
+    `count_frames(method="packets")`.
+
+    Args:
+        inpath: video path
+        use_ffmpeg: whether to use ffmpeg (True) or OpenCV (False)
+    '''
+    if use_ffmpeg:
+        vsi = VideoStreamInfo.build_for(inpath)
+        if "nb_frames" in vsi.stream_info or not is_supported_video_file(
+                inpath):
+            return vsi.total_frame_count
+        return count_frames(inpath, method="packets")
+
+    with OpenCVVideoReader(inpath) as r:
+        return r.total_frame_count
+
+
+def count_frames(inpath, method="packets", use_cache=True):
+    '''Counts the number of frames in the input video.
+
+    The supported methods are:
+        - "estimate": uses the frame count reported by the container, if
+            available, and otherwise estimates the count from the duration and
+            frame rate of the stream. No frames are read
+        - "packets": counts the video packets in the file via
+            `ffprobe -count_packets`. This requires demuxing the file but not
+            decoding it, and is exact for all codecs that store one frame per
+            packet, which includes all common codecs
+        - "decode": counts the decoded frames via `ffprobe -count_frames`.
+            This is always exact, but it requires decoding the entire video
+
+    The "packets" and "decode" counts are stored in the stream info record
+    of the video (as the `nb_read_packets` and `nb_read_frames` fields,
+    respectively), so, when the stream info cache is used, each video is
+    counted at most once per method and subsequent VideoStreamInfo instances
+    report the count via their `total_frame_count` property.
+
+    Args:
+        inpath: video path
+        method: the counting method to use. The default is "packets"
+        use_cache: whether to use the stream info cache. By default, this is
+            True
+
+    Returns:
+        the number of frames in the video, or 0 if it could not be
+        determined (only possible when method is "estimate")
+
+    Raises:
+        ValueError: if the method is not supported
+        FFprobeError: if the frames could not be counted
+    '''
+    stream_info = get_stream_info(inpath, use_cache=use_cache)
+
+    if method == "estimate":
+        return _estimate_frame_count(stream_info)
+
+    if method == "packets":
+        key, opt = "nb_read_packets", "-count_packets"
+    elif method == "decode":
+        key, opt = "nb_read_frames", "-count_frames"
+    else:
+        raise ValueError("Unsupported frame counting method '%s'" % method)
+
+    if key not in stream_info:
+        stream_info[key] = _probe_frame_count(inpath, key, opt)
+        if use_cache:
+            get_stream_info_cache().put(inpath, stream_info)
+
+    return int(stream_info[key])
+
+
+def _estimate_frame_count(stream_info):
+    if "nb_frames" in stream_info:
+        return int(stream_info["nb_frames"])
+
+    try:
+        duration = float(stream_info["duration"])
+        frame_rate = VideoStreamInfo(stream_info).frame_rate
+        return int(round(duration * frame_rate))
+    except (KeyError, ValueError, VideoStreamInfoError):
+        return 0
+
+
+def _probe_frame_count(inpath, key, opt):
+    try:
+        ffprobe = FFprobe(opts=[
+            "-select_streams", "v:0",    # first video stream only
+            opt,                         # count packets or frames
+            "-show_entries", "stream=%s" % key,
+            "-print_format", "json",     # return in JSON format
+        ])
+        out = ffprobe.run(inpath, decode=True)
+        return str(int(json.loads(out)["streams"][0][key]))
+    except Exception:
+        raise FFprobeError("Unable to count frames of '%s'" % inpath)
+
+
+class VideoIndex(Serializable):
+    '''An index of the frames of a video that supports random access.
+
+    The index records the presentation timestamp of every frame of the first
+    video stream of a video, as well as which frames are keyframes, so that
+    any frame number can be mapped to the exact timestamp that ffmpeg must
+    seek to and to the nearest preceding keyframe, from which decoding must
+    start.
+
+    Indexes are built via `VideoIndex.build_for()`, which reads (but does not
+    decode) every packet of the video via `ffprobe -show_packets`. Since this
+    requires a pass over the entire file, indexes are usually obtained via
+    `get_video_index()`, which persists them to disk so that each video only
+    needs to be indexed once.
+
+    This class uses 1-based indexing for all frame operations.
+
+    Attributes:
+        timestamps: a numpy array containing the presentation timestamp, in
+            seconds, of each frame
+        keyframes: a numpy array containing the (sorted) frame numbers of the
+            keyframes
+        start_time: the start time of the container, in seconds. ffmpeg seek
+            timestamps are relative to this time
+        size_bytes: the size of the video file when the index was built, or
+            None if unknown
+        mtime: the modification time of the video file when the index was
+            built, or None if unknown
+    '''
+
+    def __init__(
+            self, timestamps, keyframes, start_time=None, size_bytes=None,
+            mtime=None):
+        '''Constructs a VideoIndex.
+
+        Args:
+            timestamps: a list or numpy array of presentation timestamps, in
+                seconds, of the frames of the video, in presentation order
+            keyframes: a list or numpy array of the frame numbers of the
+                keyframes
+            start_time: the start time of the container, in seconds. By
+                default, the first timestamp is used
+            size_bytes: an optional size of the video file, in bytes
+            mtime: an optional modification time of the video file
+        '''
+        self.timestamps = np.asarray(timestamps, dtype=float)
+        self.keyframes = np.unique(np.asarray(keyframes, dtype=int))
+        if start_time is None:
+            start_time = self.timestamps[0] if self.timestamps.size else 0.0
+        self.start_time = float(start_time)
+        self.size_bytes = size_bytes
+        self.mtime = mtime
+
+    @property
+    def num_frames(self):
+        '''The number of frames in the video.'''
+        return len(self.timestamps)
+
+    def get_timestamp(self, frame_number):
+        '''Gets the timestamp of the given frame, relative to the start of the
+        video.
+
+        Args:
+            frame_number: the frame number
+
+        Returns:
+            the timestamp, in seconds
+        '''
+        self._validate_frame_number(frame_number)
+        return float(self.timestamps[frame_number - 1] - self.start_time)
+
+    def get_frame_number(self, timestamp):
+        '''Gets the frame that is displayed at the given timestamp.
+
+        Args:
+            timestamp: a timestamp, in seconds, relative to the start of the
+                video
+
+        Returns:
+            the frame number
+        '''
+        idx = np.searchsorted(
+            self.timestamps, timestamp + self.start_time, side="right")
+        return int(min(max(idx, 1), self.num_frames))
+
+    def get_keyframe(self, frame_number):
+        '''Gets the nearest keyframe at or before the given frame.
+
+        Args:
+            frame_number: the frame number
+
+        Returns:
+            the frame number of the keyframe, or 1 if the video has no
+            keyframes before the given frame
+        '''
+        self._validate_frame_number(frame_number)
+        idx = np.searchsorted(self.keyframes, frame_number, side="right")
+        return int(self.keyframes[idx - 1]) if idx > 0 else 1
+
+    def get_seek_timestamp(self, frame_number):
+        '''Gets the timestamp to pass to ffmpeg's input `-ss` option so that
+        the first frame that is decoded is exactly the given frame.
+
+        The timestamp is halfway between the given frame and the previous
+        frame, which makes the seek robust to the rounding of timestamps.
+
+        Args:
+            frame_number: the frame number
+
+        Returns:
+            the timestamp, in seconds
+        '''
+        self._validate_frame_number(frame_number)
+        if frame_number == 1:
+            return 0.0
+        t = 0.5 * (
+            self.timestamps[frame_number - 2] +
+            self.timestamps[frame_number - 1])
+        return max(0.0, float(t - self.start_time))
+
+    def is_valid_for(self, inpath):
+        '''Determines whether this index is valid for the given video, i.e.,
+        whether the video has not been modified since the index was built.
+
+        Args:
+            inpath: the path to the video
+
+        Returns:
+            True/False
+        '''
+        if self.size_bytes is None or self.mtime is None:
+            return True
+        try:
+            stat = os.stat(inpath)
+        except OSError:
+            return False
+        return stat.st_size == self.size_bytes and stat.st_mtime == self.mtime
+
+    def attributes(self):
+        '''Returns the list of class attributes that will be serialized.'''
+        return ["start_time", "size_bytes", "mtime", "timestamps", "keyframes"]
+
+    def _validate_frame_number(self, frame_number):
+        if frame_number < 1 or frame_number > self.num_frames:
+            raise VideoIndexError(
+                "Frame %d is out of range [1, %d]" % (
+                    frame_number, self.num_frames))
+
+    @classmethod
+    def build_for(cls, inpath):
+        '''Builds a VideoIndex for the given video via `ffprobe
+        -show_packets`.
+
+        Args:
+            inpath: the path to the video
+
+        Returns:
+            a VideoIndex instance
+
+        Raises:
+            FFprobeError: if the video could not be indexed
+        '''
+        try:
+            stat = os.stat(inpath)
+            ffprobe = FFprobe(opts=[
+                "-select_streams", "v:0",    # first video stream only
+                "-show_entries", "packet=pts_time,dts_time,flags:"
+                "format=start_time",
+                "-print_format", "json",     # return in JSON format
+            ])
+            out = ffprobe.run(inpath, decode=True)
+            info = json.loads(out)
+        except Exception:
+            raise FFprobeError("Unable to index '%s'" % inpath)
+
+        timestamps = []
+        is_keyframe = []
+        for packet in info.get("packets", []):
+            t = packet.get("pts_time", packet.get("dts_time"))
+            try:
+                timestamps.append(float(t))
+            except (TypeError, ValueError):
+                # Packets without timestamps cannot be seeked to
+                continue
+            is_keyframe.append("K" in packet.get("flags", ""))
+
+        if not timestamps:
+            raise FFprobeError("No video packets found in '%s'" % inpath)
+
+        # Packets are listed in decoding order; frames are numbered in
+        # presentation order
+        order = np.argsort(timestamps, kind="mergesort")
+        timestamps = np.asarray(timestamps)[order]
+        keyframes = np.flatnonzero(np.asarray(is_keyframe)[order]) + 1
+
+        try:
+            start_time = float(info["format"]["start_time"])
+        except (KeyError, TypeError, ValueError):
+            start_time = None
+
+        return cls(
+            timestamps, keyframes, start_time=start_time,
+            size_bytes=stat.st_size, mtime=stat.st_mtime)
+
+    @classmethod
+    def from_dict(cls, d):
+        '''Constructs a VideoIndex from a JSON dictionary.'''
+        return cls(
+            d["timestamps"], d["keyframes"], start_time=d.get("start_time"),
+            size_bytes=d.get("size_bytes"), mtime=d.get("mtime"))
+
+
+class VideoIndexError(Exception):
+    '''Exception raised when an invalid VideoIndex operation is performed.'''
+    pass
+
+
+def get_video_index_path(inpath):
+    '''Gets the path at which the VideoIndex for the given video is stored.
+
+    If the `video_index_dir` ETA config setting is set, indexes are stored in
+    that directory. Otherwise, they are stored next to their videos.
+
+    Args:
+        inpath: the path to the video
+
+    Returns:
+        the path to the index JSON file
+    '''
+    if eta.config.video_index_dir:
+        realpath = os.path.realpath(inpath)
+        name, _ = os.path.splitext(os.path.basename(realpath))
+        key = hashlib.md5(realpath.encode("utf-8")).hexdigest()
+        return os.path.join(
+            eta.config.video_index_dir, "%s-%s.index.json" % (name, key))
+
+    return os.path.splitext(inpath)[0] + ".index.json"
+
+
+def get_video_index(inpath, build=True):
+    '''Gets the VideoIndex for the given video.
+
+    A previously persisted index is used if it exists and the video has not
+    been modified since it was built. Otherwise, the index is built and
+    persisted to `get_video_index_path(inpath)`, if possible.
+
+    Args:
+        inpath: the path to the video
+        build: whether to build the index if no valid persisted index exists.
+            By default, this is True
+
+    Returns:
+        a VideoIndex, or None if build is False and no valid persisted index
+        exists
+
+    Raises:
+        FFprobeError: if the video could not be indexed
+    '''
+    index_path = get_video_index_path(inpath)
+    if os.path.isfile(index_path):
+        try:
+            index = VideoIndex.from_json(index_path)
+            if index.is_valid_for(inpath):
+                return index
+            logger.debug("Ignoring stale video index '%s'", index_path)
+        except Exception as e:
+            logger.warning(
+                "Ignoring invalid video index '%s': %s", index_path, e)
+
+    if not build:
+        return None
+
+    logger.debug("Indexing video '%s'", inpath)
+    index = VideoIndex.build_for(inpath)
+    try:
+        etau.ensure_basedir(index_path)
+        index.write_json(index_path, pretty_print=False)
+    except (IOError, OSError) as e:
+        logger.warning(
+            "Unable to write video index '%s': %s", index_path, e)
+
+    return index
+
+
+def get_raw_frame_number(raw_frame_rate, raw_frame_count, fps, sampled_frame):
+    '''Get the raw frame number corresponding to the given sampled frame
+    number.
+
+    This function assumes that the sampling was performed using the command:
+    ```
+    FFmpeg(fps=fps).run(raw_video_path, ...)
+    ```
+
+    Args:
+        raw_frame_rate: the frame rate of the raw video
+        raw_frame_count: the number of frames in the raw video
+        fps: the sampling rate that was used
+        sampled_frame: the sampled frame number
+
+    Returns:
+        raw_frame: the raw frame number from the input video corresponding to
+            the given sampled frame number
+    '''
+    delta = raw_frame_rate / (1.0 * fps)
+    raw_frame = np.minimum(
+        np.ceil(delta * (sampled_frame - 0.5)), raw_frame_count)
+    return int(raw_frame)
+
+
+def extract_clip(
+        video_path, output_path, start_time=None, duration=None, fast=False,
+        index=None):
+    '''Extracts the specified clip from the video.
+
+    When fast=False, the following ffmpeg command is used:
+    ```
+    # Slow, accurate option
+    ffmpeg -ss <start_time> -i <video_path> -t <duration> <output_path>
+    ```
+
+    When fast is True, the following two-step ffmpeg process is used:
+    ```
+    # Faster, less accurate option
+    ffmpeg -ss <start_time> -i <video_path> -t <duration> -c copy <tmp_path>
+    ffmpeg -i <tmp_path> <output_path>
+    ```
+
+    When fast is True and a VideoIndex is available, the stream copy instead
+    starts exactly at the keyframe preceding `start_time`, and the leading
+    frames are trimmed when re-encoding, so the clip is accurate:
+    ```
+    # Fast, accurate option
+    ffmpeg -ss <keyframe_time> -i <video_path> -t <duration + offset> \\
+        -c copy <tmp_path>
+    ffmpeg -ss <offset> -i <tmp_path> -t <duration> <output_path>
+    ```
+
+    Args:
+        video_path: the path to a video
+        output_path: the path to write the extracted video clip
+        start_time: the start timestamp, which can either be a float value of
+            seconds or a string in "HH:MM:SS.XXX" format. If omitted, the
+            beginning of the video is used
+        duration: the clip duration, which can either be a float value of
+            seconds or a string in "HH:MM:SS.XXX" format. If omitted, the clip
+            extends to the end of the video
+        fast: whether to extract the clip by copying the encoded stream and
+            then re-encoding it, rather than decoding the video directly
+        index: an optional VideoIndex for the video, which is only used when
+            fast is True. By default, a previously persisted index is used,
+            if one exists
+    '''
+    if fast and start_time is not None:
+        if index is None:
+            index = _try_get_video_index(video_path, build=False)
+        if index:
+            _extract_clip_fast_indexed(
+                video_path, output_path, start_time, duration, index)
+            return
+
+    in_opts = []
+    if start_time is not None:
+        if not isinstance(start_time, six.string_types):
+            start_time = "%.3f" % start_time
+        in_opts.extend(["-ss", start_time])
+
+    out_opts = []
+    if duration is not None:
+        if not isinstance(duration, six.string_types):
+            duration = "%.3f" % duration
+        out_opts.extend(["-t", duration])
+
+    if not fast:
+        # Extract clip carefully and accurately by decoding every frame
+        ffmpeg = FFmpeg(in_opts=in_opts, out_opts=out_opts)
+        ffmpeg.run(video_path, output_path)
+        return
+
+    with etau.TempDir() as d:
+        tmp_path = os.path.join(d, os.path.basename(output_path))
+
+        # Extract clip as accurately and quickly as possible by only touching
+        # key frames. May lave blank frames in the video
+        out_opts.extend(["-c", "copy"])
+        ffmpeg = FFmpeg(in_opts=in_opts, out_opts=out_opts)
+        ffmpeg.run(video_path, tmp_path)
+
+        # Clean up fast output by re-encoding the extracted clip
+        # Note that this may not exactly correspond to the slow, accurate
+        # implementation above
+        ffmpeg = FFmpeg(in_opts=[], out_opts=[])
+        ffmpeg.run(tmp_path, output_path)
+
+
+def _extract_clip_fast_indexed(
+        video_path, output_path, start_time, duration, index):
+    frame_number = index.get_frame_number(_parse_timestamp(start_time))
+    keyframe_time = index.get_timestamp(index.get_keyframe(frame_number))
+    offset = max(0.0, index.get_seek_timestamp(frame_number) - keyframe_time)
+
+    # When stream copying, ffmpeg starts at the last keyframe at or before
+    # the seek time, so seek slightly after the keyframe so that it is
+    # selected despite any rounding of the timestamps
+    in_opts = ["-ss", "%.6f" % (keyframe_time + 0.0005)]
+    out_opts = ["-c", "copy"]
+    if duration is not None:
+        out_opts.extend(["-t", "%.6f" % (_parse_timestamp(duration) + offset)])
+
+    with etau.TempDir() as d:
+        tmp_path = os.path.join(d, os.path.basename(output_path))
+
+        # Copy the encoded stream starting at the keyframe
+        ffmpeg = FFmpeg(in_opts=in_opts, out_opts=out_opts)
+        ffmpeg.run(video_path, tmp_path)
+
+        # Re-encode, trimming the frames before the requested start time
+        in_opts = ["-ss", "%.6f" % offset]
+        out_opts = []
+        if duration is not None:
+            out_opts.extend(["-t", "%.6f" % _parse_timestamp(duration)])
+        ffmpeg = FFmpeg(in_opts=in_opts, out_opts=out_opts)
+        ffmpeg.run(tmp_path, output_path)
+
+
+def extract_clips(
+        video_path, clips, mode="reencode", out_opts=None, max_outputs=32,
+        index=None):
+    '''Extracts multiple clips from the video in a single pass.
+
+    The clips are written as multiple outputs of a single ffmpeg process, so
+    the input video is only read (and, when re-encoding, decoded) once. To
+    bound the number of simultaneous encoders, clips are processed in groups
+    of at most `max_outputs` consecutive clips, each of which is handled by
+    one ffmpeg process that starts with an input-side seek to the start of
+    its first clip.
+
+    The supported modes are:
+        - "reencode": the clips are decoded and re-encoded, so they start and
+            end exactly at the requested times
+        - "copy": the encoded streams are copied without re-encoding, which is
+            much faster but requires each clip to start on a keyframe. The
+            start of each clip is moved back to the preceding keyframe, as
+            reported by the VideoIndex of the video
+
+    Args:
+        video_path: the path to a video
+        clips: a list of (start_time, duration, output_path) tuples describing
+            the clips to extract. The start times and durations can either
+            be float values of seconds or strings in "HH:MM:SS.XXX" format. A
+            start time of None means the beginning of the video, and a
+            duration of None means the end of the video
+        mode: the extraction mode, "reencode" (the default) or "copy"
+        out_opts: an optional list of output options for ffmpeg to apply to
+            each clip. By default, `FFmpeg.DEFAULT_VIDEO_OUT_OPTS` are used
+            when re-encoding, and `-c copy` is used when copying
+        max_outputs: the maximum number of clips to write per ffmpeg process.
+            The default is 32
+        index: an optional VideoIndex for the video, which is only used when
+            mode is "copy". By default, the index is loaded or built via
+            `get_video_index()`
+
+    Raises:
+        ValueError: if the mode is not supported
+    '''
+    if mode not in ("reencode", "copy"):
+        raise ValueError("Unsupported clip extraction mode '%s'" % mode)
+
+    _clips = []
+    for start_time, duration, output_path in clips:
+        start_time = _parse_timestamp(start_time or 0)
+        if duration is not None:
+            duration = _parse_timestamp(duration)
+        _clips.append((start_time, duration, output_path))
+    _clips.sort(key=lambda clip: clip[0])
+
+    if mode == "copy":
+        if out_opts is None:
+            out_opts = ["-c", "copy"]
+        if index is None:
+            index = _try_get_video_index(video_path, build=True)
+        if index:
+            _clips = [_align_clip_to_keyframe(c, index) for c in _clips]
+        else:
+            logger.warning(
+                "No index available for '%s'; copied clips may not start on "
+                "keyframes", video_path)
+    elif out_opts is None:
+        out_opts = FFmpeg.DEFAULT_VIDEO_OUT_OPTS
+
+    for idx in range(0, len(_clips), max_outputs):
+        _extract_clips_group(
+            video_path, _clips[idx:(idx + max_outputs)], out_opts,
+            mode == "copy")
+
+
+def _align_clip_to_keyframe(clip, index):
+    start_time, duration, output_path = clip
+    keyframe = index.get_keyframe(index.get_frame_number(start_time))
+    keyframe_time = index.get_timestamp(keyframe)
+    if duration is not None:
+        duration += start_time - keyframe_time
+    return keyframe_time, duration, output_path
+
+
+def _extract_clips_group(video_path, clips, out_opts, copy):
+    group_start = clips[0][0]
+
+    in_opts = []
+    if group_start > 0:
+        if copy:
+            # When stream copying, ffmpeg starts at the last keyframe at or
+            # before the seek time, so seek slightly after the keyframe so
+            # that it is selected despite any rounding of the timestamps
+            group_start += 0.0005
+        in_opts = ["-ss", "%.6f" % group_start]
+
+    opts = []
+    for start_time, duration, output_path in clips:
+        offset = start_time - group_start
+        if copy:
+            # Keep the keyframe that starts the clip
+            offset -= 0.0005
+        if offset > 0:
+            opts.extend(["-ss", "%.6f" % offset])
+        if duration is not None:
+            opts.extend(["-t", "%.6f" % duration])
+        opts.extend(out_opts)
+        opts.append(output_path)
+        etau.ensure_path(output_path)
+
+    # The last output path is passed separately to `FFmpeg.run()`
+    last_output_path = opts.pop()
+    ffmpeg = FFmpeg(in_opts=in_opts, out_opts=opts)
+    ffmpeg.run(video_path, last_output_path)
+
+
+def smart_cut(
+        video_path, ranges, out_video_path=None, out_clips_paths=None,
+        out_opts=None, index=None):
+    '''Cuts the given frame ranges from the video with minimal re-encoding.
+
+    The portion of each range that lies between keyframes is copied from the
+    input without re-encoding, and only the partial GOPs at the boundaries of
+    each range are re-encoded. The pieces are then joined via ffmpeg's
+    concat demuxer, so the output contains exactly the requested frames.
+
+    Joining copied and re-encoded pieces requires the re-encoded pieces to
+    be compatible with the input stream. By default, ranges are only copied
+    from H.264 videos whose profile and pixel format can be reproduced by
+    libx264; the boundary pieces are then encoded with the profile, level,
+    pixel format, and frame size of the input, and all pieces are written as
+    MPEG-TS intermediates, which carry their SPS/PPS in-band, before they are
+    joined. The ranges of all other videos are entirely re-encoded via
+    `FFmpeg.DEFAULT_VIDEO_OUT_OPTS`. Audio is not retained.
+
+    Args:
+        video_path: the path to a video
+        ranges: a list of (first, last) frame ranges to cut
+        out_video_path: an optional path to write a single video containing
+            all of the ranges concatenated together
+        out_clips_paths: an optional list of paths, one per range, to which
+            to write each range as a separate clip
+        out_opts: an optional list of output options for ffmpeg to use when
+            re-encoding. If provided, they are assumed to produce H.264
+            streams that can be joined with the streams of the input video
+        index: an optional VideoIndex for the video. By default, the index is
+            loaded or built via `get_video_index()`
+
+    Raises:
+        VideoIndexError: if a range is invalid
+    '''
+    if index is None:
+        index = get_video_index(video_path)
+
+    if out_opts is None:
+        stream_info = VideoStreamInfo.build_for(video_path)
+        out_opts = _get_matching_h264_out_opts(stream_info.stream_info)
+        can_copy = out_opts is not None
+        if not can_copy:
+            logger.debug(
+                "Unable to match the H.264 parameters of '%s'; re-encoding "
+                "all frames", video_path)
+            out_opts = FFmpeg.DEFAULT_VIDEO_OUT_OPTS
+    else:
+        can_copy = True
+
+    if can_copy:
+        # Join the pieces through MPEG-TS so that each piece carries its own
+        # SPS/PPS
+        ext = ".ts"
+        out_opts = list(out_opts) + ["-f", "mpegts"]
+    else:
+        ext = os.path.splitext(out_video_path or out_clips_paths[0])[1]
+
+    with etau.TempDir() as d:
+        all_pieces = []
+        for idx, (first, last) in enumerate(ranges):
+            pieces = _smart_cut_range(
+                video_path, first, last, index, out_opts, can_copy,
+                os.path.join(d, "%d-%%d%s" % (idx, ext)))
+            all_pieces.extend(pieces)
+            if out_clips_paths:
+                _concat_videos(pieces, out_clips_paths[idx], d)
+
+        if out_video_path:
+            _concat_videos(all_pieces, out_video_path, d)
+
+
+# The libx264 profiles that reproduce each H.264 profile reported by ffprobe
+_X264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+}
+
+
+def _get_matching_h264_out_opts(stream_info):
+    # Returns libx264 output options that produce a stream whose pieces can
+    # be joined with the given H.264 stream, or None if that is not possible
+    if stream_info.get("codec_name") != "h264":
+        return None
+
+    profile = _X264_PROFILES.get(stream_info.get("profile"))
+    pix_fmt = stream_info.get("pix_fmt")
+    if profile is None or pix_fmt not in ("yuv420p", "yuvj420p"):
+        return None
+
+    try:
+        size = "%dx%d" % (
+            int(stream_info["width"]), int(stream_info["height"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    out_opts = [
+        "-c:v", "libx264", "-preset", "medium", "-crf", "23",
+        "-profile:v", profile, "-pix_fmt", pix_fmt, "-s", size]
+    try:
+        level = int(stream_info.get("level", -1))
+    except (TypeError, ValueError):
+        level = -1
+    if level > 0:
+        out_opts.extend(["-level", "%d.%d" % divmod(level, 10)])
+
+    return out_opts + ["-an"]
+
+
+def _smart_cut_range(video_path, first, last, index, out_opts, can_copy, patt):
+    # Copy the frames from the first keyframe in the range up to (but not
+    # including) the last keyframe after the range. The end of the video acts
+    # as a keyframe here
+    boundaries = np.append(index.keyframes, index.num_frames + 1)
+    copy_first = boundaries[np.searchsorted(boundaries, first)]
+    idx = np.searchsorted(boundaries, last + 1, "right") - 1
+    copy_end = boundaries[idx] if idx >= 0 else -1
+    if not can_copy or copy_first >= copy_end:
+        sections = [(first, last, False)]
+    else:
+        sections = [
+            (first, copy_first - 1, False),
+            (copy_first, copy_end - 1, True),
+            (copy_end, last, False),
+        ]
+
+    pieces = []
+    for a, b, copy in sections:
+        if a > b:
+            continue
+
+        outpath = patt % len(pieces)
+        start_time = index.get_seek_timestamp(a)
+        if copy:
+            # When stream copying, ffmpeg starts at the last keyframe at or
+            # before the seek time, so seek slightly after the keyframe so
+            # that it is selected despite any rounding of the timestamps
+            start_time = index.get_timestamp(a) + 0.0005
+            opts = [
+                "-c", "copy", "-an", "-bsf:v", "h264_mp4toannexb",
+                "-f", "mpegts"]
+        else:
+            opts = list(out_opts)
+
+        if b < index.num_frames:
+            duration = index.get_seek_timestamp(b + 1) - start_time
+            opts = ["-t", "%.6f" % duration] + opts
+
+        logger.debug(
+            "%s frames %d-%d of '%s'", "Copying" if copy else "Re-encoding",
+            a, b, video_path)
+        ffmpeg = FFmpeg(in_opts=["-ss", "%.6f" % start_time], out_opts=opts)
+        ffmpeg.run(video_path, outpath)
+        pieces.append(outpath)
+
+    return pieces
+
+
+def transcode_in_segments(
+        video_path, output_path, num_segments, size=None, global_opts=None,
+        in_opts=None, out_opts=None, index=None):
+    '''Transcodes the video by encoding multiple segments of it concurrently
+    and then joining them together.
+
+    The video is split at keyframes into (at most) `num_segments` segments
+    of roughly equal length, each of which is transcoded by a separate
+    ffmpeg process. The encoded segments are then joined via ffmpeg's concat
+    demuxer without re-encoding. Each segment is seeked to and trimmed using
+    the VideoIndex of the video, so the output contains exactly the same
+    frames, with the same timestamps, as a serial transcode of the video.
+
+    Since each segment starts on a keyframe, no frames are decoded more than
+    once. Note that the frame rate of the video cannot be changed here, as
+    resampling each segment independently is not guaranteed to select the
+    same frames as resampling the entire video. Audio is not retained, so
+    use a serial transcode for videos whose audio must be kept.
+
+    Args:
+        video_path: the path to a video
+        output_path: the path to write the transcoded video
+        num_segments: the number of segments to transcode concurrently
+        size: an optional output (width, height) for each frame. At most one
+            dimension can be -1, in which case the aspect ratio is preserved
+        global_opts: an optional list of global options for ffmpeg to apply
+            to each segment. By default, `FFmpeg.DEFAULT_GLOBAL_OPTS` are used
+        in_opts: an optional list of input options for ffmpeg to apply to
+            each segment, in addition to the seek options that select the
+            segment
+        out_opts: an optional list of output options for ffmpeg to apply to
+            each segment. By default, `FFmpeg.DEFAULT_VIDEO_OUT_OPTS` are
+            used. The options must produce streams that can be joined by
+            stream copying, e.g., all segments must use the same codec
+        index: an optional VideoIndex for the video. By default, the index is
+            loaded or built via `get_video_index()`
+    '''
+    if index is None:
+        index = get_video_index(video_path)
+
+    if out_opts is None:
+        out_opts = FFmpeg.DEFAULT_VIDEO_OUT_OPTS
+    out_opts = list(out_opts)
+    if "-an" not in out_opts:
+        out_opts.append("-an")
+
+    ranges = _get_segment_ranges(index, num_segments)
+    logger.debug(
+        "Transcoding '%s' in %d segment(s)", video_path, len(ranges))
+
+    ext = os.path.splitext(output_path)[1]
+    with etau.TempDir() as d:
+        def _transcode(args):
+            idx, (first, last) = args
+            outpath = os.path.join(d, "%d%s" % (idx, ext))
+            opts = list(out_opts)
+            start_time = index.get_seek_timestamp(first)
+            if last < index.num_frames:
+                duration = index.get_seek_timestamp(last + 1) - start_time
+                opts = ["-t", "%.6f" % duration] + opts
+
+            seek_opts = ["-ss", "%.6f" % start_time] if first > 1 else []
+            ffmpeg = FFmpeg(
+                size=size, global_opts=global_opts,
+                in_opts=list(in_opts or []) + seek_opts, out_opts=opts)
+            ffmpeg.run(video_path, outpath)
+            return outpath
+
+        pieces = _map_threaded(
+            _transcode, list(enumerate(ranges)), num_workers=len(ranges))
+        _concat_videos(pieces, output_path, d)
+
+
+def _get_segment_ranges(index, num_segments):
+    # Splits the frames of the video into at most `num_segments` (first, last)
+    # ranges of roughly equal length that each start on a keyframe
+    num_frames = index.num_frames
+    targets = 1 + np.arange(1, num_segments) * num_frames / num_segments
+    keyframes = index.keyframes[index.keyframes > 1]
+    starts = [1]
+    if keyframes.size:
+        inds = np.searchsorted(keyframes, targets)
+        inds = np.clip(inds, 1, keyframes.size) - 1
+        # Choose the nearest keyframe to each target
+        nexts = np.minimum(inds + 1, keyframes.size - 1)
+        closer = (
+            np.abs(keyframes[nexts] - targets) <
+            np.abs(keyframes[inds] - targets))
+        inds = np.where(closer, nexts, inds)
+        starts.extend(np.unique(keyframes[inds]).tolist())
+
+    ends = starts[1:] + [num_frames + 1]
+    return [(first, end - 1) for first, end in zip(starts, ends)]
+
+
+def _concat_videos(inpaths, outpath, tmp_dir):
+    if len(inpaths) == 1 and is_same_video_file_format(inpaths[0], outpath):
+        etau.copy_file(inpaths[0], outpath)
+        return
+
+    list_path = os.path.join(tmp_dir, "concat.txt")
+    with open(list_path, "wt") as f:
+        for inpath in inpaths:
+            f.write("file '%s'\n" % inpath.replace("'", "'\\''"))
+
+    ffmpeg = FFmpeg(
+        in_opts=["-f", "concat", "-safe", "0"], out_opts=["-c", "copy"])
+    ffmpeg.run(list_path, outpath)
+
+
+def _parse_timestamp(timestamp):
+    # Converts a float number of seconds or a "HH:MM:SS.XXX" string to seconds
+    if not isinstance(timestamp, six.string_types):
+        return float(timestamp)
+
+    seconds = 0.0
+    for part in timestamp.split(":"):
+        seconds = 60.0 * seconds + float(part)
+    return seconds
+
+
+def sample_select_frames(
+        video_path, frames, output_patt=None, index=None, build_index=False):
+    '''Samples the specified frames of the video.
+
+    This implementation uses ffmpeg, so it is expected to be efficient. The
+    sampled frames are piped from ffmpeg as raw video, without any
+    intermediate image files. When `output_patt` is provided, each frame is
+    written to disk as soon as it is decoded, so memory usage is constant in
+    the number of frames.
+
+    When a VideoIndex is available, the frames are read via an
+    FFmpegVideoReader that seeks to each group of frames using the index, so
+    only the GOPs containing the requested frames are decoded. Otherwise, the
+    frames are selected by frame number in a single pass over the video via
+    ffmpeg's `select` filter, which is exact for variable frame rate videos.
+
+    Args:
+        video_path: the path to a video
+        frames: a sorted list of frame numbers to sample
+        output_patt: an optional output pattern like "/path/to/frames-%d.png"
+            specifying where to write the sampled frames. If omitted, the
+            frames are instead returned in an in-memory array
+        index: an optional VideoIndex for the video. By default, a previously
+            persisted index is used, if one exists
+        build_index: whether to build (and persist) a VideoIndex for the
+            video if `index` is not provided and no persisted index exists.
+            Indexing does not decode the video, so this is worthwhile when
+            many sparse frames are requested. The default is False
+
+    Returns:
+        a numpy array of size [num_frames, height, width, 3] containing the
+        sampled frames if output_patt is None, and None otherwise
+
+    Raises:
+        VideoReaderError: if any of the frames could not be sampled
+    '''
+    width, height = VideoStreamInfo.build_for(video_path).frame_size
+    if output_patt is None:
+        imgs = np.empty((len(frames), height, width, 3), dtype="uint8")
+    else:
+        imgs = None
+
+    if len(frames) == 0:
+        return imgs
+
+    if index is None:
+        index = _try_get_video_index(video_path, build=build_index)
+
+    if index:
+        num_read = 0
+        with FFmpegVideoReader(video_path, frames=frames, index=index) as vr:
+            if imgs is not None:
+                try:
+                    num_read = len(vr.read_batch(len(frames), out=imgs))
+                except StopIteration:
+                    pass
+            else:
+                for img in vr:
+                    etai.write(img, output_patt % vr.frame_number)
+                    num_read += 1
+
+        if num_read < len(frames):
+            raise VideoReaderError(
+                "Failed to sample frame %d from '%s'" % (
+                    frames[num_read], video_path))
+
+        return imgs
+
+    sampled = _iter_select_frames(
+        video_path, frames, (height, width, 3), imgs=imgs)
+    if imgs is not None:
+        for _ in sampled:
+            pass
+        return imgs
+
+    for fn, img in zip(frames, sampled):
+        etai.write(img, output_patt % fn)
+    return None
+
+
+# The maximum length of a select filter to pass on the command line. Longer
+# filters are passed via a filter script
+_MAX_SELECT_FILTER_LEN = 65536
+
+
+def _iter_select_frames(video_path, frames, frame_shape, imgs=None):
+    # Generates the given frames of the video, selected in a single pass via
+    # a `select` filter. Frames are read into consecutive elements of `imgs`,
+    # if provided, or else into a single buffer that is reused for each frame
+    buf = None
+    if imgs is None:
+        buf = np.empty(frame_shape, dtype="uint8")
+
+    # Select consecutive runs of frames via `between()` rather than one
+    # `eq()` term per frame
+    select = FrameRanges.from_list(frames).to_select_filter()
+
+    with etau.TempDir() as d:
+        if len(select) > _MAX_SELECT_FILTER_LEN:
+            filter_path = os.path.join(d, "select.txt")
+            with open(filter_path, "wt") as f:
+                f.write(select)
+            filter_opts = ["-filter_script:v", filter_path]
+        else:
+            filter_opts = ["-vf", select]
+
+        ffmpeg = FFmpeg(
+            out_opts=filter_opts + [
+                "-vsync", "0",                  # do not duplicate frames
+                "-frames:v", str(len(frames)),  # stop after the last frame
+                "-f", "image2pipe",             # pipe frames to stdout
+                "-vcodec", "rawvideo",          # output will be raw video
+                "-pix_fmt", "rgb24",            # pixel format
+            ])
+        ffmpeg.run(video_path, "-")
+        try:
+            for idx in range(len(frames)):
+                img = imgs[idx] if imgs is not None else buf
+                if ffmpeg.read_into(img) != img.nbytes:
+                    raise VideoReaderError(
+                        "Failed to sample frame %d from '%s'" % (
+                            frames[idx], video_path))
+                yield img
+        finally:
+            ffmpeg.close()
+
+
+def sample_scene_changes(
+        video_path, method="diff", threshold=None, hold=0, max_gap=None,
+        size=(64, -1), return_mask=False):
+    '''Adaptively samples the frames of the video at which its content
+    changes.
+
+    The supported methods are:
+        - "diff": each frame is compared to the most recently sampled frame
+            via the mean absolute difference of their (downscaled) grayscale
+            pixels, normalized to [0, 1], and the frame is sampled when the
+            difference exceeds `threshold`. Since frames are compared to the
+            last sampled frame rather than to their predecessor, gradual
+            changes are also detected. The default threshold is 0.02
+        - "scene": the scene change score of ffmpeg's `select` filter, which
+            is in [0, 1], is computed for each frame, and the frames whose
+            score exceeds `threshold` are sampled. This method detects
+            abrupt changes such as shot boundaries. The default threshold is
+            0.1
+
+    The first frame of the video is always sampled. The returned FrameRanges
+    can be passed directly as the `frames` of a VideoReader, VideoProcessor,
+    or `eta.core.features.VideoFramesFeaturizer.featurize()`, so that only
+    the interesting frames of mostly-static videos are processed.
+
+    Args:
+        video_path: the path to a video
+        method: the sampling method, "diff" (the default) or "scene"
+        threshold: the change threshold in [0, 1] above which frames are
+            sampled. By default, a method-specific threshold is used
+        hold: a number of additional frames to sample after each sampled
+            frame. The default is 0
+        max_gap: an optional maximum number of consecutive frames to skip,
+            so that static content is still sampled at a low rate
+        size: the (width, height) to which to resize the frames before
+            comparing them. At most one dimension can be -1, in which case
+            the aspect ratio is preserved. The default is (64, -1)
+        return_mask: whether to return a boolean mask over all frames of the
+            video, whose length is the number of frames that were decoded,
+            rather than a FrameRanges. The default is False
+
+    Returns:
+        a FrameRanges instance describing the sampled frames, or, if
+        `return_mask` is True, a boolean numpy array indicating which frames
+        were sampled
+
+    Raises:
+        ValueError: if the method is not supported
+    '''
+    if method not in _DEFAULT_SCENE_CHANGE_THRESHOLDS:
+        raise ValueError("Unsupported scene change method '%s'" % method)
+    if threshold is None:
+        threshold = _DEFAULT_SCENE_CHANGE_THRESHOLDS[method]
+
+    if method == "diff":
+        mask = _sample_frame_diffs(video_path, threshold, max_gap, size)
+    else:
+        mask = get_scene_scores(video_path, size=size) > threshold
+        if mask.size:
+            mask[0] = True
+        _fill_sampling_gaps(mask, max_gap)
+
+    if hold:
+        # Sample the `hold` frames following each sampled frame
+        inds = np.arange(mask.size)
+        last = np.maximum.accumulate(np.where(mask, inds, -(hold + 1)))
+        mask = inds - last <= hold
+
+    logger.debug(
+        "Sampled %d of %d frames of '%s'", np.count_nonzero(mask), mask.size,
+        video_path)
+    if return_mask:
+        return mask
+    return FrameRanges.from_mask(mask)
+
+
+def get_scene_scores(video_path, size=(64, -1)):
+    '''Computes the scene change score of each frame of the video via the
+    `scene` variable of ffmpeg's `select` filter.
+
+    Args:
+        video_path: the path to a video
+        size: an optional (width, height) to which to resize the frames before
+            scoring them. At most one dimension can be -1, in which case the
+            aspect ratio is preserved. The default is (64, -1)
+
+    Returns:
+        a numpy array containing the score in [0, 1] of each frame, which
+        measures how much the frame differs from the previous frame. The
+        score of the first frame is 1
+
+    Raises:
+        ExecutableRuntimeError: if ffmpeg exits with an error
+    '''
+    filters = []
+    if size:
+        filters.append("scale={0}:{1}".format(*size))
+    filters.append("select='gte(scene\\,0)',metadata=print:file=-")
+
+    ffmpeg = FFmpeg(out_opts=["-vf", ",".join(filters), "-an", "-f", "null"])
+    ffmpeg.run(video_path, "-")
+    chunks = []
+    while True:
+        chunk = ffmpeg.read(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    ffmpeg.close(check=True)
+
+    key = "lavfi.scene_score="
+    scores = np.array([
+        float(line[len(key):])
+        for line in b"".join(chunks).decode("utf-8").splitlines()
+        if line.startswith(key)])
+    if scores.size:
+        scores[0] = 1.0
+    return scores
+
+
+# The default thresholds used by `sample_scene_changes()`
+_DEFAULT_SCENE_CHANGE_THRESHOLDS = {"diff": 0.02, "scene": 0.1}
+
+
+def _sample_frame_diffs(video_path, threshold, max_gap, size):
+    mask = []
+    ref = None
+    gap = 0
+    with FFmpegVideoReader(
+            video_path, size=size, pix_fmt="gray", prefetch=16) as vr:
+        for img in vr:
+            img = img.astype(np.int16)
+            sample = (
+                ref is None or
+                (max_gap is not None and gap >= max_gap) or
+                np.mean(np.abs(img - ref)) > 255.0 * threshold)
+            if sample:
+                ref = img
+                gap = 0
+            else:
+                gap += 1
+            mask.append(sample)
+
+    return np.array(mask, dtype=bool)
+
+
+def _fill_sampling_gaps(mask, max_gap):
+    # Samples additional frames so that at most `max_gap` consecutive frames
+    # are skipped
+    if max_gap is None:
+        return
+
+    inds = np.append(np.flatnonzero(mask), mask.size)
+    for first, end in zip(inds[:-1] + 1, inds[1:]):
+        mask[(first + max_gap):end:(max_gap + 1)] = True
+
+
+def sample_first_frames(arg, k, size=None):
+    '''Samples the first k frames in a video.
+
+    Args:
+        arg: can be either the path to the input video or an array of frames
+            of size [num_frames, height, width, num_channels]
+        k: number of frames to extract
+        size: an optional [width, height] to resize the sampled frames. By
+            default, the native dimensions of the frames are used
+
+    Returns:
+        A numpy array of size [k, height, width, num_channels]
+    '''
+    # Read frames ...
+    if isinstance(arg, six.string_types):
+        # ... from disk, resizing during decoding
+        with FFmpegVideoReader(arg, frames="1-%d" % k, size=size) as vr:
+            return np.array([img for img in vr])
+
+    # ... from tensor
+    imgs = arg[:k]
+
+    # Resize frames, if necessary
+    if size:
+        imgs = [etai.resize(img, *size) for img in imgs]
+
+    return np.array(imgs)
+
+
+def uniformly_sample_frames(arg, k, size=None):
+    '''Uniformly samples k frames from the video, always including the first
+    and last frames.
+
+    Args:
+        arg: can be either the path to the input video or an array of frames
+            of size [num_frames, height, width, num_channels]
+        k: the number of frames to extract
+        size: an optional [width, height] to resize the sampled frames. By
+            default, the native dimensions of the frames are used
+
+    Returns:
+        A numpy array of size [k, height, width, num_channels]
+    '''
+    is_video_file = isinstance(arg, six.string_types)
+
+    # Compute 1-based frames
+    num_frames = get_frame_count(arg) if is_video_file else len(arg)
+    frames = [int(round(i)) for i in np.linspace(1, min(num_frames, k), k)]
+
+    # Read frames ...
+    if is_video_file:
+        # ... from disk, resizing during decoding
+        with FFmpegVideoReader(arg, frames=frames, size=size) as vr:
+            return np.array([img for img in vr])
+
+    # ... from tensor
+    imgs = [arg[f - 1] for f in frames]
+
+    # Resize frames, if necessary
+    if size:
+        imgs = [etai.resize(img, *size) for img in imgs]
+
+    return np.array(imgs)
+
+
+def sliding_window_sample_frames(arg, k, stride, size=None, cache=None):
+    '''Samples clips from the video using a sliding window of the given
+    length and stride.
+
+    Args:
+        arg: can be either the path to the input video or an array of frames
+            of size [num_frames, height, width, num_channels]
+        k: the size of each window
+        stride: the stride for sliding window
+        size: an optional [width, height] to resize the sampled frames. By
+            default, the native dimensions of the frames are used
+        cache: an optional FrameCache from which to read the (native) frames
+            of the video. Only applicable when `arg` is a video path. Videos
+            that are too large to be cached are streamed instead
+
+    Returns:
+        A numpy array of size [XXXX, k, height, width, num_channels]
+    '''
+    is_video_file = isinstance(arg, six.string_types)
+
+    # Determine clip indices
+    if is_video_file and cache is not None:
+        frames = _get_cached_frames(arg, cache)
+        if frames is not None:
+            arg = frames
+            is_video_file = False
+    num_frames = get_frame_count(arg) if is_video_file else len(arg)
+    delta = np.arange(1, k + 1)
+    offsets = np.array(list(range(0, num_frames + 1 - k, stride)))
+    clip_inds = offsets[:, np.newaxis] + delta[np.newaxis, :]
+    frames = np.unique(clip_inds)
+    if not frames.size:
+        return np.array([])
+
+    # Read frames ...
+    if is_video_file:
+        # ... from disk
+        with FFmpegVideoReader(arg, frames=frames.tolist()) as vr:
+            imgs = np.empty((len(frames),) + vr.frame_shape, dtype="uint8")
+            imgs = vr.read_batch(len(frames), out=imgs)
+    else:
+        # ... from tensor
+        imgs = np.asarray(arg)[frames - 1]
+
+    # Resize frames, if necessary
+    if size:
+        imgs = np.array([etai.resize(img, *size) for img in imgs])
+
+    # Generate clips tensor by indexing the sampled frames
+    return imgs[np.searchsorted(frames, clip_inds)]
+
+
+def iter_sliding_window_clips(
+        arg, k, stride, batch_size=32, size=None, cache=None, prefetch=False):
+    '''Generates batches of clips from the video using a sliding window of the
+    given length and stride.
+
+    This function generates the same clips as `sliding_window_sample_frames`,
+    but only the frames spanned by the current batch of clips are held in
+    memory, in a rolling buffer, and each batch is a strided view into that
+    buffer, so no frame is copied more than once, regardless of the overlap
+    between the windows. Thus memory usage is bounded by `batch_size`
+    rather than by the length of the video.
+
+    Note that, unless `prefetch` is True, each batch is only valid until the
+    next batch is generated. Make a copy of a batch (e.g., via
+    `np.array(batch)`) to retain it.
+
+    Args:
+        arg: can be either the path to the input video or an array of frames
+            of size [num_frames, height, width, num_channels]
+        k: the size of each window
+        stride: the stride for sliding window
+        batch_size: the maximum number of clips per batch. The default is 32
+        size: an optional [width, height] to resize the sampled frames. By
+            default, the native dimensions of the frames are used
+        cache: an optional FrameCache from which to read the (native) frames
+            of the video. Only applicable when `arg` is a video path. Videos
+            that are too large to be cached are streamed instead
+        prefetch: whether to generate the next batch in a background thread
+            while the current batch is being processed. In this case, each
+            batch is a copy that remains valid indefinitely. By default, this
+            is False
+
+    Returns:
+        a generator that yields read-only arrays of size
+            [<= batch_size, k, height, width, num_channels]
+    '''
+    batches = _iter_sliding_window_clips(
+        arg, k, stride, batch_size=batch_size, size=size, cache=cache)
+    if prefetch:
+        batches = _prefetch_batches(batches)
+
+    return batches
+
+
+def _get_cached_frames(video_path, cache):
+    # Returns the cached frames of the video, or None if the video is too
+    # large to be cached, in which case it should be streamed instead. The
+    # frames are cached at their native size, so that they can be resized
+    # via `eta.core.image.resize()` exactly as when they are streamed
+    try:
+        return cache.get(video_path)
+    except FrameCacheError as e:
+        logger.info("%s; streaming the video instead", e)
+        return None
+
+
+def _iter_sliding_window_clips(arg, k, stride, batch_size, size, cache):
+    stride = int(stride)
+    if isinstance(arg, six.string_types) and cache is not None:
+        frames = _get_cached_frames(arg, cache)
+        if frames is not None:
+            arg = frames
+    is_video_file = isinstance(arg, six.string_types)
+
+    num_frames = get_frame_count(arg) if is_video_file else len(arg)
+    num_clips = max(0, (num_frames - k) // stride + 1)
+    if num_clips == 0:
+        return
+
+    # The frames spanned by the windows are packed into the buffer so that the
+    # windows are evenly spaced by `step` rows
+    step = min(stride, k)
+    if stride < k:
+        frames = FrameRanges([(1, (num_clips - 1) * stride + k)])
+    else:
+        offsets = np.arange(num_clips) * stride
+        frames = FrameRanges(np.stack([offsets + 1, offsets + k], axis=1))
+
+    if is_video_file and not size:
+        reader = FFmpegVideoReader(arg, frames=frames)
+        frame_shape = reader.frame_shape
+
+        def read_fcn(out):
+            try:
+                return len(reader.read_batch(len(out), out=out))
+            except StopIteration:
+                return 0
+    elif is_video_file:
+        # Frames are decoded at their native size and resized via
+        # `eta.core.image.resize()`, as in `sliding_window_sample_frames`
+        reader = FFmpegVideoReader(arg, frames=frames)
+        frame_shape = etai.resize(
+            np.zeros(reader.frame_shape, dtype="uint8"), *size).shape
+
+        def read_fcn(out):
+            for idx in range(len(out)):
+                try:
+                    img = reader.read()
+                except StopIteration:
+                    return idx
+                out[idx] = etai.resize(img, *size)
+            return len(out)
+    else:
+        reader = None
+        frame_iter = iter(frames)
+        frame_shape = arg.shape[1:]
+        if size:
+            frame_shape = etai.resize(arg[0], *size).shape
+
+        def read_fcn(out):
+            for idx in range(len(out)):
+                img = arg[next(frame_iter) - 1]
+                out[idx] = etai.resize(img, *size) if size else img
+            return len(out)
+
+    buf = np.empty(
+        ((batch_size - 1) * step + k,) + tuple(frame_shape), dtype="uint8")
+    carry = 0
+    try:
+        for start in range(0, num_clips, batch_size):
+            num = min(batch_size, num_clips - start)
+            num_rows = (num - 1) * step + k
+            num_read = read_fcn(buf[carry:num_rows])
+            if num_read < num_rows - carry:
+                # The video was shorter than reported
+                num_rows = carry + num_read
+                num = (num_rows - k) // step + 1
+                if num <= 0:
+                    break
+
+            batch = np.lib.stride_tricks.as_strided(
+                buf, shape=(num, k) + buf.shape[1:],
+                strides=(step * buf.strides[0],) + buf.strides)
+            batch.flags.writeable = False
+            yield batch
+
+            # Keep the frames that overlap with the next batch of windows
+            carry = k - step
+            buf[:carry] = buf[(num_rows - carry):num_rows]
+            if num < batch_size:
+                break
+    finally:
+        if reader is not None:
+            reader.close()
+
+
+def _prefetch_batches(batches):
+    # Copies of the batches are generated in a background thread, one batch
+    # ahead of the consumer
+    prefetcher = _FramePrefetcher(
+        lambda: np.array(next(batches)), lambda: None, 1)
+    try:
+        while True:
+            try:
+                batch, _ = prefetcher.get()
+            except StopIteration:
+                return
+
+            yield batch
+    finally:
+        prefetcher.close()
+        batches.close()
+
+
+class VideoProcessor(object):
+    '''Class for reading a video and writing a new video frame-by-frame.
+
+    The typical usage is:
+    ```
+    with VideoProcessor(...) as p:
+        for img in p:
+            new_img = ... # process img
+            p.write(new_img)
+    ```
+
+    When the frames are written unmodified, e.g., when generating clips, the
+    `out_passthrough` option can be used to write the output video and clips
+    via `smart_cut()` when the processor is closed, which copies the encoded
+    frames from the input video rather than re-encoding them.
+    '''
+
+    def __init__(
+            self,
+            inpath,
+            frames=None,
+            in_use_ffmpeg=True,
+            in_prefetch=None,
+            out_use_ffmpeg=True,
+            out_images_path=None,
+            out_video_path=None,
+            out_clips_path=None,
+            out_fps=None,
+            out_size=None,
+            out_opts=None,
+            out_queue_size=None,
+            out_passthrough=False):
+        '''Constructs a new VideoProcessor instance.
+
+        Args:
+            inpath: path to the input video. Passed directly to a VideoReader
+            frames: an optional string or FrameRanges specifying the range(s)
+                of frames to process, e.g., the frames sampled by
+                `sample_scene_changes()`. Passed directly to a VideoReader
+            in_use_ffmpeg: whether to use FFmpegVideoReader to read input
+                videos rather than OpenCVVideoReader
+            in_prefetch: an optional number of input frames to decode ahead
+                in a background thread. Passed directly to a VideoReader
+            out_use_ffmpeg: whether to use FFmpegVideoWriter to write output
                 videos rather than OpenCVVideoWriter
             out_images_path: a path like "/path/to/frames/%05d.png" with one
                 placeholder that specifies where to save frames as individual
@@ -1427,15 +4328,30 @@ class VideoProcessor(object):
             out_opts: a list of output video options for FFmpeg. Passed
                 directly to FFmpegVideoWriter. Only applicable when
                 out_use_ffmpeg = True
+            out_queue_size: an optional maximum number of frames to queue for
+                each output video writer, which are then encoded by a
+                background thread. Passed directly to the VideoWriter(s)
+                used for `out_video_path` and `out_clips_path`. By default,
+                frames are encoded synchronously
+            out_passthrough: whether to write `out_video_path` and
+                `out_clips_path` by stream copying the input video via
+                `smart_cut()` when the processor is closed, rather than by
+                encoding the written frames. In this mode, only the frames
+                returned by process() may be written, unmodified, and each
+                clip spans from the first to the last frame written in its
+                range. Only supported for video files, and `out_fps` and
+                `out_size` must match the input video. The default is False
 
         Raises:
             VideoProcessorError: if insufficient options are supplied to
                 construct a VideoWriter
         '''
         if in_use_ffmpeg:
-            self._reader = FFmpegVideoReader(inpath, frames=frames)
+            self._reader = FFmpegVideoReader(
+                inpath, frames=frames, prefetch=in_prefetch)
         else:
-            self._reader = OpenCVVideoReader(inpath, frames=frames)
+            self._reader = OpenCVVideoReader(
+                inpath, frames=frames, prefetch=in_prefetch)
         self._video_clip_writer = None
         self._video_writer = None
         self._write_images = bool(out_images_path)
@@ -1443,26 +4359,233 @@ class VideoProcessor(object):
         self._write_clips = bool(out_clips_path)
 
         self.inpath = inpath
-        self.frames = frames
-        self.in_use_ffmpeg = in_use_ffmpeg
-        self.out_use_ffmpeg = out_use_ffmpeg
-        self.out_images_path = out_images_path
-        self.out_video_path = out_video_path
-        self.out_clips_path = out_clips_path
-        if out_fps is not None and out_fps > 0:
-            self.out_fps = out_fps
-        elif self._reader.frame_rate > 0:
-            self.out_fps = self._reader.frame_rate
+        self.frames = frames
+        self.in_use_ffmpeg = in_use_ffmpeg
+        self.in_prefetch = in_prefetch
+        self.out_use_ffmpeg = out_use_ffmpeg
+        self.out_images_path = out_images_path
+        self.out_video_path = out_video_path
+        self.out_clips_path = out_clips_path
+        if out_fps is not None and out_fps > 0:
+            self.out_fps = out_fps
+        elif self._reader.frame_rate > 0:
+            self.out_fps = self._reader.frame_rate
+        else:
+            raise VideoProcessorError(
+                "The inferred frame rate '%s' cannot be used. You must " +
+                "manually specify a frame rate" % str(self._reader.frame_rate))
+        self.out_size = out_size if out_size else self._reader.frame_size
+        self.out_opts = out_opts
+        self.out_queue_size = out_queue_size
+        self.out_passthrough = out_passthrough
+        self._passthrough_ranges = []
+        self._img = None
+
+        if self.out_passthrough:
+            self._validate_passthrough()
+        elif self._write_video:
+            self._video_writer = self._new_video_writer(
+                self.out_video_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.process()
+
+    @property
+    def input_frame_size(self):
+        '''The (width, height) of each input frame.'''
+        return self._reader.frame_size
+
+    @property
+    def output_frame_size(self):
+        '''The (width, height) of each output frame.'''
+        return self.out_size
+
+    @property
+    def input_frame_rate(self):
+        '''The input frame rate.'''
+        return self._reader.frame_rate
+
+    @property
+    def output_frame_rate(self):
+        '''The output frame rate.'''
+        return self.out_fps
+
+    @property
+    def frame_number(self):
+        '''The current frame number, or -1 if no frames have been read.'''
+        return self._reader.frame_number
+
+    @property
+    def frame_range(self):
+        '''The (first, last) frames for the current range, or (-1, -1) if no
+        frames have been read.
+        '''
+        return self._reader.frame_range
+
+    @property
+    def is_new_frame_range(self):
+        '''Whether the current frame is the first in a new range.'''
+        return self._reader.is_new_frame_range
+
+    @property
+    def total_frame_count(self):
+        '''The total number of frames in the video.'''
+        return self._reader.total_frame_count
+
+    def process(self):
+        '''Returns the next frame.'''
+        img = self._reader.read()
+        if self.out_passthrough:
+            self._img = img
+        elif self._write_clips and self._reader.is_new_frame_range:
+            self._reset_video_clip_writer()
+        return img
+
+    def write(self, img):
+        '''Writes the given image to the output writer(s).
+
+        Raises:
+            VideoProcessorError: if a modified frame is written in pass-through
+                mode
+        '''
+        if self._write_images:
+            etai.write(img, self.out_images_path % self._reader.frame_number)
+        if self.out_passthrough:
+            if self._write_video or self._write_clips:
+                self._record_passthrough_frame(img)
+            return
+        if self._write_video:
+            self._video_writer.write(img)
+        if self._write_clips:
+            self._video_clip_writer.write(img)
+
+    def close(self):
+        '''Closes the video processor.'''
+        self._reader.close()
+        if self._video_writer is not None:
+            self._video_writer.close()
+        if self._video_clip_writer is not None:
+            self._video_clip_writer.close()
+        if self._passthrough_ranges:
+            self._write_passthrough_outputs()
+
+    def _validate_passthrough(self):
+        if not is_supported_video_file(self.inpath):
+            raise VideoProcessorError(
+                "Pass-through mode is only supported for video files")
+        if self.out_fps != self._reader.frame_rate:
+            raise VideoProcessorError(
+                "Pass-through mode requires the output frame rate to match "
+                "the input frame rate")
+        if tuple(self.out_size) != tuple(self._reader.frame_size):
+            raise VideoProcessorError(
+                "Pass-through mode requires the output frame size to match "
+                "the input frame size")
+
+    def _record_passthrough_frame(self, img):
+        if img is not self._img and not np.array_equal(img, self._img):
+            raise VideoProcessorError(
+                "Only unmodified frames can be written in pass-through mode")
+
+        frame_number = self._reader.frame_number
+        frame_range = self._reader.frame_range
+        if (self._passthrough_ranges and
+                self._passthrough_ranges[-1][0] == frame_range):
+            self._passthrough_ranges[-1][2] = frame_number
+        else:
+            self._passthrough_ranges.append(
+                [frame_range, frame_number, frame_number])
+
+    def _write_passthrough_outputs(self):
+        ranges = [(first, last) for _, first, last in self._passthrough_ranges]
+        out_clips_paths = None
+        if self._write_clips:
+            out_clips_paths = [
+                self.out_clips_path % tuple(frame_range)
+                for frame_range, _, _ in self._passthrough_ranges]
+
+        self._passthrough_ranges = []
+        smart_cut(
+            self.inpath, ranges,
+            out_video_path=self.out_video_path if self._write_video else None,
+            out_clips_paths=out_clips_paths, out_opts=self.out_opts)
+
+    def _reset_video_clip_writer(self):
+        if self._video_clip_writer is not None:
+            self._video_clip_writer.close()
+
+        outpath = self.out_clips_path % self._reader.frame_range
+        self._video_clip_writer = self._new_video_writer(outpath)
+
+    def _new_video_writer(self, outpath):
+        if self.out_use_ffmpeg:
+            return FFmpegVideoWriter(
+                outpath, self.out_fps, self.out_size, out_opts=self.out_opts,
+                queue_size=self.out_queue_size)
+
+        return OpenCVVideoWriter(
+            outpath, self.out_fps, self.out_size,
+            queue_size=self.out_queue_size)
+
+
+class VideoProcessorError(Exception):
+    pass
+
+
+class VideoReader(object):
+    '''Base class for reading videos.
+
+    Subclasses must implement the `_read()` and `_close()` methods, which
+    read the next frame from the decoder and close the decoder, respectively.
+
+    When `prefetch` is provided, a background thread decodes frames into a
+    bounded queue of that size, so that decoding overlaps with the consumer's
+    own processing. The `frame_number`, `frame_range`, and
+    `is_new_frame_range` properties always describe the last frame returned
+    to the consumer.
+    '''
+
+    def __init__(self, inpath, frames, prefetch=None):
+        self.inpath = inpath
+        if frames is None:
+            self.frames = "1-%d" % self.total_frame_count
+            self._ranges = FrameRanges.from_str(self.frames)
+        elif isinstance(frames, six.string_types):
+            # Frames string
+            if frames == "*":
+                frames = "1-%d" % self.total_frame_count
+            self.frames = frames
+            self._ranges = FrameRanges.from_str(frames)
+        elif isinstance(frames, list):
+            # Frames list
+            self._ranges = FrameRanges.from_list(frames)
+            self.frames = self._ranges.to_str()
+        elif isinstance(frames, FrameRanges):
+            # FrameRanges. A copy is iterated so that the caller's instance
+            # can be reused, e.g., when sampled via `sample_scene_changes()`
+            self._ranges = FrameRanges(frames.intervals)
+            self.frames = frames.to_str()
+        elif isinstance(frames, FrameRange):
+            # FrameRange
+            self._ranges = frames
+            self.frames = frames.to_str()
         else:
-            raise VideoProcessorError(
-                "The inferred frame rate '%s' cannot be used. You must " +
-                "manually specify a frame rate" % str(self._reader.frame_rate))
-        self.out_size = out_size if out_size else self._reader.frame_size
-        self.out_opts = out_opts
+            raise VideoReaderError("Invalid frames %s" % frames)
 
-        if self._write_video:
-            self._video_writer = self._new_video_writer(
-                self.out_video_path)
+        self._prefetcher = None
+        self._prefetch_state = (-1, (-1, -1), False)
+        if prefetch:
+            self._prefetcher = _FramePrefetcher(
+                self._read, self._get_frame_state, prefetch)
 
     def __enter__(self):
         return self
@@ -1474,197 +4597,907 @@ class VideoProcessor(object):
         return self
 
     def __next__(self):
-        return self.process()
+        return self.read()
+
+    @property
+    def is_prefetching(self):
+        '''Whether frames are being decoded by a background thread.'''
+        return self._prefetcher is not None
+
+    @property
+    def frame_number(self):
+        '''The current frame number, or -1 if no frames have been read.'''
+        if self.is_prefetching:
+            return self._prefetch_state[0]
+        return self._ranges.frame
+
+    @property
+    def frame_range(self):
+        '''The (first, last) frames for the current range, or (-1, -1) if no
+        frames have been read.
+        '''
+        if self.is_prefetching:
+            return self._prefetch_state[1]
+        return self._ranges.frame_range
+
+    @property
+    def is_new_frame_range(self):
+        '''Whether the current frame is the first in a new range.'''
+        if self.is_prefetching:
+            return self._prefetch_state[2]
+        return self._ranges.is_new_frame_range
+
+    @property
+    def encoding_str(self):
+        raise NotImplementedError("subclass must implement encoding_str")
+
+    @property
+    def frame_size(self):
+        raise NotImplementedError("subclass must implement frame_size")
+
+    @property
+    def frame_rate(self):
+        raise NotImplementedError("subclass must implement frame_rate")
+
+    @property
+    def total_frame_count(self):
+        raise NotImplementedError("subclass must implement total_frame_count")
+
+    def read(self):
+        '''Reads the next frame.
+
+        Returns:
+            img: the next frame
+
+        Raises:
+            StopIteration: if there are no more frames to process
+            VideoReaderError: if unable to load the next frame from file
+        '''
+        if self.is_prefetching:
+            img, self._prefetch_state = self._prefetcher.get()
+            return img
+        return self._read()
+
+    def close(self):
+        '''Closes the video reader.'''
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+        self._close()
+
+    def _get_frame_state(self):
+        return (
+            self._ranges.frame,
+            self._ranges.frame_range,
+            self._ranges.is_new_frame_range,
+        )
+
+    def _read(self):
+        raise NotImplementedError("subclass must implement _read()")
+
+    def _close(self):
+        raise NotImplementedError("subclass must implement _close()")
+
+
+class VideoReaderError(Exception):
+    '''Exception raised when an error occured while reading a video.'''
+    pass
+
+
+class _FramePrefetcher(object):
+    '''Reads frames in a background thread into a bounded queue.'''
+
+    _END = object()
+
+    def __init__(self, read_fcn, get_state_fcn, size):
+        '''Creates a _FramePrefetcher instance and starts its thread.
+
+        Args:
+            read_fcn: a function that returns the next frame, or raises
+                StopIteration when there are no more frames
+            get_state_fcn: a function that returns the state of the reader
+                after `read_fcn` is called
+            size: the maximum number of frames to prefetch
+        '''
+        self._read_fcn = read_fcn
+        self._get_state_fcn = get_state_fcn
+        self._queue = queue.Queue(maxsize=size)
+        self._stopped = threading.Event()
+        self._done = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def get(self):
+        '''Returns the next (img, state) tuple.
+
+        Raises:
+            StopIteration: if there are no more frames
+        '''
+        if self._done:
+            raise StopIteration
+
+        item = self._queue.get()
+        if item is self._END:
+            self._done = True
+            raise StopIteration
+        if isinstance(item, Exception):
+            self._done = True
+            raise item
+
+        return item
+
+    def close(self):
+        '''Stops the background thread.'''
+        self._stopped.set()
+        while self._thread.is_alive():
+            # Unblock the thread if it is waiting on a full queue
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._thread.join(0.05)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                item = (self._read_fcn(), self._get_state_fcn())
+            except StopIteration:
+                item = self._END
+            except Exception as e:
+                item = e
+
+            self._put(item)
+            if not isinstance(item, tuple):
+                return
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+
+class FFmpegVideoReader(VideoReader):
+    '''Class for reading video using ffmpeg.
+
+    The input video can be a standalone video file like "/path/to/video.mp4"
+    or a directory of frames like "/path/to/frames/%05d.png". This path is
+    passed directly to ffmpeg.
+
+    A frames string like "1-5,10-15" can optionally be passed to only read
+    certain frame ranges. When the gap before the next frame to read exceeds
+    `seek_threshold` frames, ffmpeg is restarted with an input-side seek,
+    which jumps to the nearest preceding keyframe and then decodes accurately
+    up to the requested frame, so sparse reads of long videos only pay for
+    the frames that are requested. ffmpeg is started lazily when the first
+    frame is read, so when the first requested frame is far enough into the
+    video, decoding starts directly at a seek.
+
+    Seeking requires a VideoIndex for the video, whose exact frame
+    timestamps make seeks accurate for videos with variable frame rates. By
+    default, a previously persisted index is used if one exists; otherwise,
+    an index is built in memory (without being persisted) when the first gap
+    of at least `seek_threshold` frames is encountered. Indexing reads but
+    does not decode the video, so it is much cheaper than decoding the
+    skipped frames. A seek is only performed when the nearest preceding
+    keyframe of the next frame is at least `seek_threshold` frames ahead,
+    i.e., when seeking avoids decoding at least that many frames. When the
+    video cannot be indexed, frames are decoded and discarded rather than
+    seeked over, unless `cfr_seek` is True, in which case seek timestamps
+    are computed from the frame rate of the video, which is only accurate
+    for videos with a constant frame rate.
+
+    The frames can optionally be cropped, resampled, resized, and/or converted
+    to grayscale by ffmpeg during decoding, which is much more efficient than
+    decoding full resolution RGB frames and post-processing them in Python.
+    In this case, `frame_size`, `frame_rate`, and `total_frame_count`
+    describe the output frames, and all frame numbers refer to the output
+    frames.
+
+    This class uses 1-based indexing for all frame operations.
+    '''
+
+    def __init__(
+            self, inpath, frames=None, seek_threshold=300, prefetch=None,
+            size=None, crop=None, fps=None, pix_fmt="rgb24", index=None,
+            cfr_seek=False, stream_info=None):
+        '''Constructs a new VideoReader with ffmpeg backend.
+
+        Args:
+            inpath: path to the input video, which can be a standalone video
+                file like "/path/to/video.mp4" or a directory of frames like
+                "/path/to/frames/%05d.png". This path is passed directly to
+                ffmpeg
+            frames: one of the following optional quantities specifying a
+                collection of frames to process:
+                    - None (all frames - the default)
+                    - "*" (all frames)
+                    - a string like "1-3,6,8-10"
+                    - a list like [1, 2, 3, 6, 8, 9, 10]
+                    - a FrameRange or FrameRanges instance
+            seek_threshold: the minimum number of frames that must be skipped
+                before seeking is used rather than decoding and discarding the
+                intermediate frames. Seeking is only used for video files. Set
+                this to None to disable seeking. The default is 300
+            prefetch: an optional number of frames to decode ahead of the
+                consumer in a background thread. By default, frames are
+                decoded synchronously when they are read
+            size: an optional (width, height) to which to resize the frames
+                during decoding. At most one dimension can be -1, in which
+                case the aspect ratio is preserved
+            crop: an optional (x, y, width, height) region, in pixels, to crop
+                from the native frames during decoding. Cropping is applied
+                before resizing
+            fps: an optional frame rate at which to resample the video during
+                decoding. Seeking is disabled when this option is used
+            pix_fmt: the output pixel format, which can be "rgb24" (the
+                default) or "gray". Grayscale frames are returned as
+                [height, width] arrays
+            index: the VideoIndex to use when seeking. Can be a VideoIndex,
+                True to load or build (and persist) the index via
+                `get_video_index()`, or False to not use an index. By
+                default, a previously persisted index is used if one exists,
+                and otherwise an index is built in memory. The index is only
+                loaded or built when the first potential seek is encountered
+            cfr_seek: whether to seek using the frame rate of the video when
+                no VideoIndex is available. This is only accurate for videos
+                with a constant frame rate. The default is False
+            stream_info: an optional VideoStreamInfo for the video. By
+                default, the stream info is built via
+                `VideoStreamInfo.build_for()`
+
+        Raises:
+            VideoReaderError: if an unsupported pixel format was requested
+        '''
+        self._index = index
+        self._cfr_seek = cfr_seek
+        self._stream_info = stream_info or VideoStreamInfo.build_for(inpath)
+        self._crop = crop
+        self._fps = fps
+        self._pix_fmt = pix_fmt
+        self._frame_size = _compute_frame_size(
+            self._stream_info.frame_size, size, crop)
+        self._frame_shape = _compute_frame_shape(self._frame_size, pix_fmt)
+        self._ffmpeg = None  # started when the first frame is read
+        self._seek_threshold = seek_threshold
+        self._can_seek = (
+            seek_threshold is not None and fps is None and
+            is_supported_video_file(inpath))
+        self._pipe_frame_number = 0
+        self._skip_buffer = None
+        self._batch_buffer = None
+        self._batch_frame_numbers = []
+
+        super(FFmpegVideoReader, self).__init__(
+            inpath, frames, prefetch=prefetch)
+
+    @property
+    def encoding_str(self):
+        '''Return the video encoding string.'''
+        return self._stream_info.encoding_str
+
+    @property
+    def frame_size(self):
+        '''The (width, height) of each frame.'''
+        return self._frame_size
+
+    @property
+    def frame_rate(self):
+        '''The frame rate.'''
+        if self._fps:
+            return self._fps
+        return self._stream_info.frame_rate
+
+    @property
+    def total_frame_count(self):
+        '''The total number of frames in the video, or 0 if it could not be
+        determined.
+
+        When the video is being resampled, this count is an estimate.
+        '''
+        count = self._stream_info.total_frame_count
+        if self._fps and count:
+            count = int(round(
+                count * self._fps / self._stream_info.frame_rate))
+        return count
+
+    @property
+    def frame_shape(self):
+        '''The shape of the arrays returned for each frame, i.e.,
+        (height, width, 3) for RGB frames and (height, width) for grayscale
+        frames.
+        '''
+        return self._frame_shape
+
+    @property
+    def batch_frame_numbers(self):
+        '''The frame numbers of the frames returned by the last call to
+        `read_batch()`.
+        '''
+        return self._batch_frame_numbers
+
+    def read_batch(self, n, out=None):
+        '''Reads the next batch of (up to) n frames.
+
+        The frames are read directly from the ffmpeg pipe into the output
+        array, so no intermediate copies of the frames are made (when
+        prefetching, each frame is copied once from the prefetch queue). The
+        frame numbers of the returned frames are available via the
+        `batch_frame_numbers` property.
+
+        Args:
+            n: the maximum number of frames to read
+            out: an optional uint8 array of size [>= n] + `frame_shape` in
+                which to store the frames. By default, a buffer owned by the
+                reader is used, which is overwritten by the next call to this
+                method
+
+        Returns:
+            imgs: a [k] + `frame_shape` view into `out` containing the next
+                k <= n frames. Fewer than n frames are returned only when the
+                frames to process are exhausted
+
+        Raises:
+            StopIteration: if there are no more frames to process
+            VideoReaderError: if `out` has the wrong shape, or if unable to
+                load the next frame from file
+        '''
+        if out is None:
+            if self._batch_buffer is None or len(self._batch_buffer) < n:
+                self._batch_buffer = np.empty(
+                    (n,) + self._frame_shape, dtype="uint8")
+            out = self._batch_buffer
+        elif len(out) < n or out.shape[1:] != self._frame_shape:
+            raise VideoReaderError(
+                "Expected an output buffer of size [>= %d] + %s; found %s" % (
+                    n, str(self._frame_shape), str(out.shape)))
+
+        frame_numbers = []
+        for idx in range(n):
+            try:
+                if self.is_prefetching:
+                    out[idx] = self.read()
+                else:
+                    self._read_next(out[idx])
+            except StopIteration:
+                break
+            frame_numbers.append(self.frame_number)
+
+        if not frame_numbers:
+            raise StopIteration
+
+        self._batch_frame_numbers = frame_numbers
+        return out[:len(frame_numbers)]
+
+    def iter_batches(self, n, out=None):
+        '''Returns an iterator over batches of (up to) n frames.
+
+        Each batch is generated by `read_batch()`, so, when `out` is omitted,
+        each batch is only valid until the next batch is generated.
+
+        Args:
+            n: the number of frames per batch
+            out: an optional uint8 array of size [>= n] + `frame_shape` in
+                which to store each batch
+
+        Returns:
+            an iterator that yields [k] + `frame_shape` arrays of frames
+        '''
+        while True:
+            try:
+                yield self.read_batch(n, out=out)
+            except StopIteration:
+                return
+
+    def _read(self):
+        img = np.empty(self._frame_shape, dtype="uint8")
+        self._read_next(img)
+        return img
+
+    def _close(self):
+        if self._ffmpeg is not None:
+            self._ffmpeg.close()
+
+    def _new_ffmpeg(self, in_opts=None):
+        ref_size = self._stream_info.frame_size
+        if self._crop:
+            ref_size = tuple(self._crop[2:])
+        size = self._frame_size if self._frame_size != ref_size else None
+        return FFmpeg(
+            fps=self._fps,
+            size=size,
+            crop=self._crop,
+            in_opts=in_opts,
+            out_opts=[
+                "-f", 'image2pipe',         # pipe frames to stdout
+                "-vcodec", "rawvideo",      # output will be raw video
+                "-pix_fmt", self._pix_fmt,  # pixel format
+            ],
+        )
+
+    def _read_next(self, img):
+        frame_number = next(self._ranges)
+        num_skip = frame_number - self._pipe_frame_number - 1
+        if self._should_seek(frame_number, num_skip):
+            self._seek(frame_number)
+            num_skip = 0
+        elif self._ffmpeg is None:
+            self._ffmpeg = self._new_ffmpeg()
+            self._ffmpeg.run(self.inpath, "-")
+
+        for _ in range(num_skip):
+            self._grab()
+        self._retrieve(img)
+
+    def _get_index(self):
+        if self._index is None or self._index is True:
+            try:
+                index = get_video_index(
+                    self.inpath, build=self._index is True)
+                if index is None:
+                    # Index the video without persisting the index
+                    logger.debug("Indexing video '%s'", self.inpath)
+                    index = VideoIndex.build_for(self.inpath)
+                self._index = index
+            except Exception as e:
+                logger.warning(
+                    "Unable to index '%s'; seeking without an index: %s",
+                    self.inpath, e)
+                self._index = False
+        return self._index
+
+    def _should_seek(self, frame_number, num_skip):
+        if not self._can_seek or num_skip < self._seek_threshold:
+            return False
+
+        index = self._get_index()
+        if index:
+            if frame_number > index.num_frames:
+                return False
+            keyframe = index.get_keyframe(frame_number)
+            return keyframe - self._pipe_frame_number > self._seek_threshold
+
+        return self._cfr_seek and self.frame_rate > 0
+
+    def _seek(self, frame_number):
+        # Seek to halfway between the previous frame and the target frame so
+        # that the first decoded frame is exactly `frame_number` despite any
+        # floating point error in the timestamps
+        index = self._get_index()
+        if index:
+            timestamp = index.get_seek_timestamp(frame_number)
+        else:
+            timestamp = max(0.0, (frame_number - 1.5) / self.frame_rate)
+        logger.debug("Seeking to frame %d (%.3fs)", frame_number, timestamp)
+        if self._ffmpeg is not None:
+            self._ffmpeg.close()
+        self._ffmpeg = self._new_ffmpeg(in_opts=["-ss", "%.6f" % timestamp])
+        self._ffmpeg.run(self.inpath, "-")
+        self._pipe_frame_number = frame_number - 1
+
+    def _grab(self):
+        # Skipped frames are read into a reusable scratch buffer
+        if self._skip_buffer is None:
+            self._skip_buffer = np.empty(self._frame_shape, dtype="uint8")
+        self._retrieve(self._skip_buffer)
+
+    def _retrieve(self, img):
+        try:
+            num_bytes = self._ffmpeg.read_into(img)
+        except Exception:
+            raise VideoReaderError(
+                "Failed to grab frame %d" % self._ranges.frame)
+        if num_bytes != img.nbytes:
+            # The stream ended before the expected number of frames. This is
+            # expected when `total_frame_count` is an estimate, e.g., when
+            # resampling the video
+            logger.debug(
+                "Video '%s' ended after %d frames; expected %d frames",
+                self.inpath, self._pipe_frame_number, self.total_frame_count)
+            raise StopIteration
+        self._pipe_frame_number += 1
+
+
+_PIX_FMT_CHANNELS = {"rgb24": 3, "gray": 1}
+
+
+def _compute_frame_size(native_size, size, crop):
+    frame_size = native_size
+    if crop:
+        frame_size = tuple(crop[2:])
+    if size:
+        # Compute explicit dimensions here so that the size of the frames
+        # generated by ffmpeg is known exactly
+        size = etai.parse_frame_size(size)
+        frame_size = etai.infer_missing_dims(size, frame_size)
+    return tuple(int(d) for d in frame_size)
+
+
+def _compute_frame_shape(frame_size, pix_fmt):
+    try:
+        num_channels = _PIX_FMT_CHANNELS[pix_fmt]
+    except KeyError:
+        raise VideoReaderError("Unsupported pixel format '%s'" % pix_fmt)
+
+    width, height = frame_size
+    if num_channels == 1:
+        return (height, width)
+    return (height, width, num_channels)
+
+
+class ParallelVideoReader(VideoReader):
+    '''Class for reading a single video using multiple ffmpeg processes in
+    parallel.
+
+    The video is split into segments of roughly `segment_size` frames that
+    each start on a keyframe, and a pool of `num_workers` worker threads
+    decodes the requested frames of the segments concurrently, each using its
+    own `FFmpegVideoReader`. Each segment reader seeks directly to the
+    keyframe at the start of its segment, so no frames are decoded twice.
+    The VideoIndex of the video, which is built if necessary, and its stream
+    info are loaded once and shared by all segment readers. If the video
+    cannot be indexed, the requested frames are decoded sequentially by a
+    single `FFmpegVideoReader`, since segments could not be decoded
+    independently without seeking.
+
+    By default, frames are returned in order. In this mode, each in-flight
+    segment buffers at most `queue_size` decoded frames, so larger queues
+    allow the workers to get further ahead of the consumer at the cost of
+    memory. When `ordered` is False, frames are returned as soon as they are
+    decoded, and the `frame_number`, `frame_range`, and `is_new_frame_range`
+    properties describe the frame that was just returned.
+
+    This class uses 1-based indexing for all frame operations.
+    '''
+
+    def __init__(
+            self, inpath, frames=None, num_workers=None, segment_size=1024,
+            queue_size=64, ordered=True, size=None, crop=None,
+            pix_fmt="rgb24"):
+        '''Constructs a new ParallelVideoReader.
+
+        Args:
+            inpath: path to the input video file
+            frames: one of the following optional quantities specifying a
+                collection of frames to process:
+                    - None (all frames - the default)
+                    - "*" (all frames)
+                    - a string like "1-3,6,8-10"
+                    - a list like [1, 2, 3, 6, 8, 9, 10]
+                    - a FrameRange or FrameRanges instance
+            num_workers: the number of segments to decode in parallel. By
+                default, the number of CPUs is used
+            segment_size: the approximate number of frames in each segment.
+                The default is 1024
+            queue_size: the maximum number of decoded frames to buffer per
+                in-flight segment. The default is 64
+            ordered: whether to return the frames in order (True) or as soon
+                as they are decoded (False). The default is True
+            size: an optional (width, height) to which to resize the frames
+                during decoding. Passed directly to FFmpegVideoReader
+            crop: an optional (x, y, width, height) region to crop from the
+                frames during decoding. Passed directly to FFmpegVideoReader
+            pix_fmt: the output pixel format. Passed directly to
+                FFmpegVideoReader
+        '''
+        self._stream_info = VideoStreamInfo.build_for(inpath)
+        self._index = _try_get_video_index(inpath, build=True)
+        self._reader_kwargs = {
+            "size": size, "crop": crop, "pix_fmt": pix_fmt,
+            "index": self._index or False, "stream_info": self._stream_info}
+        self._frame_size = _compute_frame_size(
+            self._stream_info.frame_size, size, crop)
+        self._frame_shape = _compute_frame_shape(self._frame_size, pix_fmt)
+        self._state = (-1, (-1, -1), False)
+
+        super(ParallelVideoReader, self).__init__(inpath, frames)
+
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.ordered = ordered
+        intervals = FrameRanges.from_str(self.frames).intervals
+        self._range_tuples = [tuple(r) for r in intervals.tolist()]
+        self._range_firsts = [r[0] for r in self._range_tuples]
+        if self._index is not None:
+            self._segments = _split_ranges_at_keyframes(
+                self._range_tuples, self._index, segment_size)
+        else:
+            # Without an index, segments cannot seek to their first frames,
+            # so each worker would decode the video from its beginning.
+            # Decode all frames in a single segment instead
+            self._segments = [self._range_tuples]
+        if ordered:
+            self._queues = [
+                queue.Queue(maxsize=queue_size) for _ in self._segments]
+        else:
+            self._queues = [
+                queue.Queue(maxsize=queue_size * self.num_workers)]
+        self._seg_idx = 0
+        self._num_done = 0
+        self._next_segment = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._threads = []
+        for _ in range(min(self.num_workers, len(self._segments))):
+            thread = threading.Thread(target=self._run_worker)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    @property
+    def encoding_str(self):
+        '''Return the video encoding string.'''
+        return self._stream_info.encoding_str
 
     @property
-    def input_frame_size(self):
-        '''The (width, height) of each input frame.'''
-        return self._reader.frame_size
+    def frame_size(self):
+        '''The (width, height) of each frame.'''
+        return self._frame_size
 
     @property
-    def output_frame_size(self):
-        '''The (width, height) of each output frame.'''
-        return self.out_size
+    def frame_shape(self):
+        '''The shape of the arrays returned for each frame.'''
+        return self._frame_shape
 
     @property
-    def input_frame_rate(self):
-        '''The input frame rate.'''
-        return self._reader.frame_rate
+    def frame_rate(self):
+        '''The frame rate.'''
+        return self._stream_info.frame_rate
 
     @property
-    def output_frame_rate(self):
-        '''The output frame rate.'''
-        return self.out_fps
+    def total_frame_count(self):
+        '''The total number of frames in the video, or 0 if it could not be
+        determined.
+        '''
+        return self._stream_info.total_frame_count
 
     @property
     def frame_number(self):
         '''The current frame number, or -1 if no frames have been read.'''
-        return self._reader.frame_number
+        return self._state[0]
 
     @property
     def frame_range(self):
         '''The (first, last) frames for the current range, or (-1, -1) if no
         frames have been read.
         '''
-        return self._reader.frame_range
+        return self._state[1]
 
     @property
     def is_new_frame_range(self):
         '''Whether the current frame is the first in a new range.'''
-        return self._reader.is_new_frame_range
-
-    @property
-    def total_frame_count(self):
-        '''The total number of frames in the video.'''
-        return self._reader.total_frame_count
-
-    def process(self):
-        '''Returns the next frame.'''
-        img = self._reader.read()
-        if self._write_clips and self._reader.is_new_frame_range:
-            self._reset_video_clip_writer()
-        return img
+        return self._state[2]
+
+    def _read(self):
+        while True:
+            if self.ordered:
+                if self._seg_idx >= len(self._segments):
+                    raise StopIteration
+                item = self._queues[self._seg_idx].get()
+            else:
+                if self._num_done >= len(self._segments):
+                    raise StopIteration
+                item = self._queues[0].get()
+
+            if item is _SEGMENT_END:
+                self._seg_idx += 1
+                self._num_done += 1
+                continue
+            if isinstance(item, Exception):
+                self._seg_idx = self._num_done = len(self._segments)
+                raise item
+
+            frame_number, img = item
+            self._set_state(frame_number)
+            return img
+
+    def _close(self):
+        self._stopped.set()
+        for thread in self._threads:
+            while thread.is_alive():
+                # Unblock any workers that are waiting on full queues
+                for q in self._queues:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+                thread.join(0.05)
+
+    def _set_state(self, frame_number):
+        idx = bisect.bisect_right(self._range_firsts, frame_number) - 1
+        frame_range = self._range_tuples[idx]
+        self._state = (
+            frame_number, frame_range, frame_number == frame_range[0])
+
+    def _run_worker(self):
+        while not self._stopped.is_set():
+            with self._lock:
+                idx = self._next_segment
+                self._next_segment += 1
+            if idx >= len(self._segments):
+                return
+
+            q = self._queues[idx] if self.ordered else self._queues[0]
+            try:
+                with FFmpegVideoReader(
+                        self.inpath, frames=FrameRanges(self._segments[idx]),
+                        **self._reader_kwargs) as r:
+                    for img in r:
+                        if not self._put(q, (r.frame_number, img)):
+                            return
+            except Exception as e:
+                self._put(q, e)
+                return
+
+            self._put(q, _SEGMENT_END)
+
+    def _put(self, q, item):
+        while not self._stopped.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
 
-    def write(self, img):
-        '''Writes the given image to the output writer(s).'''
-        if self._write_images:
-            etai.write(img, self.out_images_path % self._reader.frame_number)
-        if self._write_video:
-            self._video_writer.write(img)
-        if self._write_clips:
-            self._video_clip_writer.write(img)
 
-    def close(self):
-        '''Closes the video processor.'''
-        self._reader.close()
-        if self._video_writer is not None:
-            self._video_writer.close()
-        if self._video_clip_writer is not None:
-            self._video_clip_writer.close()
+_SEGMENT_END = object()
 
-    def _reset_video_clip_writer(self):
-        if self._video_clip_writer is not None:
-            self._video_clip_writer.close()
 
-        outpath = self.out_clips_path % self._reader.frame_range
-        self._video_clip_writer = self._new_video_writer(outpath)
+def _try_get_video_index(inpath, build=False):
+    if not is_supported_video_file(inpath):
+        return None
+    try:
+        return get_video_index(inpath, build=build)
+    except Exception as e:
+        logger.warning("Unable to index '%s': %s", inpath, e)
+        return None
 
-    def _new_video_writer(self, outpath):
-        if self.out_use_ffmpeg:
-            return FFmpegVideoWriter(
-                outpath, self.out_fps, self.out_size, out_opts=self.out_opts)
 
-        return OpenCVVideoWriter(
-            outpath, self.out_fps, self.out_size)
+def _split_ranges_at_keyframes(ranges, index, segment_size):
+    # Splits the (first, last) ranges into lists of ranges that lie within
+    # segments of the video of roughly `segment_size` frames that each start
+    # on a keyframe
+    if not ranges:
+        return []
 
+    num_segments = max(1, -(-index.num_frames // segment_size))
+    bounds = _get_segment_ranges(index, num_segments)
 
-class VideoProcessorError(Exception):
-    pass
+    # Frames beyond the end of the index belong to the last segment
+    bounds[-1] = (bounds[-1][0], max(bounds[-1][1], ranges[-1][1]))
 
+    frames = FrameRanges(ranges)
+    segments = []
+    for first, last in bounds:
+        segment = frames.intersection(FrameRanges([(first, last)]))
+        if segment.num_ranges:
+            segments.append([tuple(r) for r in segment.intervals.tolist()])
+    return segments
 
-class VideoReader(object):
-    '''Base class for reading videos.'''
 
-    def __init__(self, inpath, frames):
-        self.inpath = inpath
-        if frames is None:
-            self.frames = "1-%d" % self.total_frame_count
-            self._ranges = FrameRanges.from_str(self.frames)
-        elif isinstance(frames, six.string_types):
-            # Frames string
-            if frames == "*":
-                frames = "1-%d" % self.total_frame_count
-            self.frames = frames
-            self._ranges = FrameRanges.from_str(frames)
-        elif isinstance(frames, list):
-            # Frames list
-            self._ranges = FrameRanges.from_list(frames)
-            self.frames = self._ranges.to_str()
-        elif isinstance(frames, (FrameRange, FrameRanges)):
-            # FrameRange or FrameRanges
-            self._ranges = frames
-            self.frames = frames.to_str()
-        else:
-            raise VideoReaderError("Invalid frames %s" % frames)
+class OpenCVVideoReader(VideoReader):
+    '''Class for reading video using OpenCV.
 
-    def __enter__(self):
-        return self
+    The input video can be a standalone video file like "/path/to/video.mp4"
+    or a directory of frames like "/path/to/frames/%05d.png". This path is
+    passed directly to cv2.VideoCapture. So, for example, if you specify a
+    directory of frames, the frame numbering must start from 0-3.
 
-    def __exit__(self, *args):
-        self.close()
+    A frames string like "1-5,10-15" can optionally be passed to only read
+    certain frame ranges.
 
-    def __iter__(self):
-        return self
+    This class uses 1-based indexing for all frame operations.
+    '''
 
-    def __next__(self):
-        return self.read()
+    def __init__(self, inpath, frames=None, prefetch=None):
+        '''Constructs a new VideoReader with OpenCV backend.
 
-    @property
-    def frame_number(self):
-        '''The current frame number, or -1 if no frames have been read.'''
-        return self._ranges.frame
+        Args:
+            inpath: path to the input video, which can be a standalone video
+                file like "/path/to/video.mp4" or a directory of frames like
+                "/path/to/frames/%05d.png". This path is passed directly to
+                cv2.VideoCapture
+            frames: one of the following optional quantities specifying a
+                collection of frames to process:
+                    - None (all frames - the default)
+                    - "*" (all frames)
+                    - a string like "1-3,6,8-10"
+                    - a list like [1, 2, 3, 6, 8, 9, 10]
+                    - a FrameRange or FrameRanges instance
+            prefetch: an optional number of frames to decode ahead of the
+                consumer in a background thread. By default, frames are
+                decoded synchronously when they are read
 
-    @property
-    def frame_range(self):
-        '''The (first, last) frames for the current range, or (-1, -1) if no
-        frames have been read.
+        Raises:
+            VideoReaderError: if the input video could not be opened.
         '''
-        return self._ranges.frame_range
+        self._cap = cv2.VideoCapture(inpath)
+        if not self._cap.isOpened():
+            raise VideoReaderError("Unable to open '%s'" % inpath)
 
-    @property
-    def is_new_frame_range(self):
-        '''Whether the current frame is the first in a new range.'''
-        return self._ranges.is_new_frame_range
+        super(OpenCVVideoReader, self).__init__(
+            inpath, frames, prefetch=prefetch)
 
     @property
     def encoding_str(self):
-        raise NotImplementedError("subclass must implement encoding_str")
+        '''Return the video encoding string.'''
+        try:
+            # OpenCV 3
+            code = int(self._cap.get(cv2.CAP_PROP_FOURCC))
+        except AttributeError:
+            # OpenCV 2
+            code = int(self._cap.get(cv2.cv.CV_CAP_PROP_FOURCC))
+        return FOURCC.int_to_str(code)
 
     @property
     def frame_size(self):
-        raise NotImplementedError("subclass must implement frame_size")
+        '''The (width, height) of each frame.'''
+        try:
+            # OpenCV 3
+            return (
+                int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            )
+        except AttributeError:
+            # OpenCV 2
+            return (
+                int(self._cap.get(cv2.cv.CV_CAP_PROP_FRAME_WIDTH)),
+                int(self._cap.get(cv2.cv.CV_CAP_PROP_FRAME_HEIGHT)),
+            )
 
     @property
     def frame_rate(self):
-        raise NotImplementedError("subclass must implement frame_rate")
+        '''The frame rate.'''
+        try:
+            # OpenCV 3
+            return float(self._cap.get(cv2.CAP_PROP_FPS))
+        except AttributeError:
+            # OpenCV 2
+            return float(self._cap.get(cv2.cv.CV_CAP_PROP_FPS))
 
     @property
     def total_frame_count(self):
-        raise NotImplementedError("subclass must implement total_frame_count")
-
-    def read(self):
-        raise NotImplementedError("subclass must implement read()")
-
-    def close(self):
-        raise NotImplementedError("subclass must implement close()")
+        '''The total number of frames in the video.'''
+        try:
+            # OpenCV 3
+            return int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        except AttributeError:
+            # OpenCV 2
+            return int(self._cap.get(cv2.cv.CV_CAP_PROP_FRAME_COUNT))
 
+    def _read(self):
+        for idx in range(max(0, self._ranges.frame), next(self._ranges)):
+            if not self._cap.grab():
+                raise VideoReaderError(
+                    "Failed to grab frame %d" % (idx + 1))
+        return etai.bgr_to_rgb(self._cap.retrieve()[1])
 
-class VideoReaderError(Exception):
-    '''Exception raised when an error occured while reading a video.'''
-    pass
+    def _close(self):
+        self._cap.release()
 
 
-class FFmpegVideoReader(VideoReader):
-    '''Class for reading video using ffmpeg.
+class CachedVideoReader(VideoReader):
+    '''Class for reading video frames from a FrameCache.
 
-    The input video can be a standalone video file like "/path/to/video.mp4"
-    or a directory of frames like "/path/to/frames/%05d.png". This path is
-    passed directly to ffmpeg.
+    The video is decoded into the cache the first time it is read (with the
+    given decoding parameters), and all subsequent readers, in this process
+    or any other process using the same cache directory, share the pages of
+    the memory-mapped frames without decoding the video again.
 
-    A frames string like "1-5,10-15" can optionally be passed to only read
-    certain frame ranges.
+    The frames returned by this reader are read-only views into the cache.
 
     This class uses 1-based indexing for all frame operations.
     '''
 
-    def __init__(self, inpath, frames=None):
-        '''Constructs a new VideoReader with ffmpeg backend.
+    def __init__(
+            self, inpath, frames=None, cache=None, size=None, pix_fmt="rgb24",
+            prefetch=None):
+        '''Constructs a new CachedVideoReader.
 
         Args:
-            inpath: path to the input video, which can be a standalone video
-                file like "/path/to/video.mp4" or a directory of frames like
-                "/path/to/frames/%05d.png". This path is passed directly to
-                ffmpeg
+            inpath: path to the input video file
             frames: one of the following optional quantities specifying a
                 collection of frames to process:
                     - None (all frames - the default)
@@ -1672,19 +5505,21 @@ class FFmpegVideoReader(VideoReader):
                     - a string like "1-3,6,8-10"
                     - a list like [1, 2, 3, 6, 8, 9, 10]
                     - a FrameRange or FrameRanges instance
+            cache: the FrameCache to use. By default, the cache returned by
+                `get_frame_cache()` is used
+            size: an optional (width, height) to which to resize the frames
+                when they are decoded into the cache
+            pix_fmt: the pixel format in which to cache the frames, "rgb24"
+                (the default) or "gray"
+            prefetch: an optional number of frames to read ahead of the
+                consumer in a background thread
         '''
+        cache = cache or get_frame_cache()
         self._stream_info = VideoStreamInfo.build_for(inpath)
-        self._ffmpeg = FFmpeg(
-            out_opts=[
-                "-f", 'image2pipe',         # pipe frames to stdout
-                "-vcodec", "rawvideo",      # output will be raw video
-                "-pix_fmt", "rgb24",        # pixel format
-            ],
-        )
-        self._ffmpeg.run(inpath, "-")
-        self._raw_frame = None
+        self._frames = cache.get(inpath, size=size, pix_fmt=pix_fmt)
 
-        super(FFmpegVideoReader, self).__init__(inpath, frames)
+        super(CachedVideoReader, self).__init__(
+            inpath, frames, prefetch=prefetch)
 
     @property
     def encoding_str(self):
@@ -1694,7 +5529,12 @@ class FFmpegVideoReader(VideoReader):
     @property
     def frame_size(self):
         '''The (width, height) of each frame.'''
-        return self._stream_info.frame_size
+        return self._frames.shape[2], self._frames.shape[1]
+
+    @property
+    def frame_shape(self):
+        '''The shape of the arrays returned for each frame.'''
+        return self._frames.shape[1:]
 
     @property
     def frame_rate(self):
@@ -1703,160 +5543,350 @@ class FFmpegVideoReader(VideoReader):
 
     @property
     def total_frame_count(self):
-        '''The total number of frames in the video, or 0 if it could not be
-        determined.
+        '''The total number of frames in the video.'''
+        return len(self._frames)
+
+    @property
+    def frames_array(self):
+        '''The read-only [N, height, width, (channels)] memory-mapped array of
+        all frames of the video.
         '''
-        return self._stream_info.total_frame_count
+        return self._frames
 
-    def read(self):
-        '''Reads the next frame.
+    def get_frame(self, frame_number):
+        '''Returns the given frame, regardless of the frames being processed.
+
+        Args:
+            frame_number: the frame number
 
         Returns:
-            img: the next frame
+            a read-only view of the frame
 
         Raises:
-            StopIteration: if there are no more frames to process
-            VideoReaderError: if unable to load the next frame from file
+            VideoReaderError: if the frame number is out of range
         '''
-        for _ in range(max(0, self.frame_number), next(self._ranges)):
-            if not self._grab():
-                raise VideoReaderError(
-                    "Failed to grab frame %d" % self.frame_number)
-        return self._retrieve()
+        if frame_number < 1 or frame_number > len(self._frames):
+            raise VideoReaderError(
+                "Frame %d is out of range [1, %d]" % (
+                    frame_number, len(self._frames)))
+        return self._frames[frame_number - 1]
+
+    def _read(self):
+        return self.get_frame(next(self._ranges))
+
+    def _close(self):
+        pass
+
+
+class FrameCache(object):
+    '''A cache of decoded video frames stored as memory-mapped .npy files.
+
+    Each video is decoded once per set of decoding parameters into a
+    [N, height, width, channels] (or [N, height, width] for grayscale) uint8
+    .npy file, which is then memory-mapped by all readers. Since the frames
+    are shared via the OS page cache, multiple consumers and multiple
+    processes can read the same video concurrently without copying or
+    re-decoding it.
+
+    Entries are keyed by the real path, size, and modification time of each
+    video and by the decoding parameters, so modified videos are decoded
+    again. When the total size of the cache exceeds `max_bytes`, the least
+    recently used entries are deleted. Videos whose decoded frames alone
+    would exceed `max_bytes` are never cached; `get()` raises a
+    FrameCacheError for them, and `open()` streams them from the video
+    instead.
+
+    Cache files are written to a temporary path and then atomically renamed
+    into place, so it is safe for multiple processes to share a cache
+    directory. Processes that request the same uncached video at the same
+    time may each decode it, and an entry that is evicted by another
+    process while it is being opened is decoded again.
+    '''
 
-    def close(self):
-        '''Closes the video reader.'''
-        self._ffmpeg.close()
+    def __init__(self, cache_dir, max_bytes=None):
+        '''Constructs a FrameCache.
 
-    def _grab(self):
-        try:
-            width, height = self.frame_size
-            self._raw_frame = self._ffmpeg.read(width * height * 3)
+        Args:
+            cache_dir: the directory in which to store the cached frames
+            max_bytes: an optional maximum total size of the cache, in bytes
+        '''
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def get_path(self, video_path, size=None, pix_fmt="rgb24"):
+        '''Returns the path of the cache file for the given video and
+        decoding parameters.
+
+        Args:
+            video_path: the path to the video
+            size: an optional (width, height) to which to resize the frames
+            pix_fmt: the pixel format of the frames, "rgb24" (the default) or
+                "gray"
+
+        Returns:
+            the path to the .npy cache file
+        '''
+        realpath = os.path.realpath(video_path)
+        stat = os.stat(realpath)
+        frame_size = _compute_frame_size(
+            VideoStreamInfo.build_for(video_path).frame_size, size, None)
+        key = "%s|%d|%r|%dx%d|%s" % (
+            realpath, stat.st_size, stat.st_mtime, frame_size[0],
+            frame_size[1], pix_fmt)
+        name = os.path.splitext(os.path.basename(realpath))[0]
+        return os.path.join(
+            self.cache_dir, "%s-%s.npy" % (
+                name, hashlib.md5(key.encode("utf-8")).hexdigest()))
+
+    def get_entry_size(self, video_path, size=None, pix_fmt="rgb24"):
+        '''Estimates the size of the cache entry for the given video and
+        decoding parameters.
+
+        Args:
+            video_path: the path to the video
+            size: an optional (width, height) to which to resize the frames
+            pix_fmt: the pixel format of the frames, "rgb24" (the default) or
+                "gray"
+
+        Returns:
+            the estimated size of the entry, in bytes
+        '''
+        frame_size = _compute_frame_size(
+            VideoStreamInfo.build_for(video_path).frame_size, size, None)
+        frame_shape = _compute_frame_shape(frame_size, pix_fmt)
+        return get_frame_count(video_path) * int(np.prod(frame_shape))
+
+    def can_cache(self, video_path, size=None, pix_fmt="rgb24"):
+        '''Determines whether the given video can be cached with the given
+        decoding parameters, i.e., whether its estimated entry size does not
+        exceed `max_bytes`.
+
+        Args:
+            video_path: the path to the video
+            size: an optional (width, height) to which to resize the frames
+            pix_fmt: the pixel format of the frames, "rgb24" (the default) or
+                "gray"
+
+        Returns:
+            True/False
+        '''
+        if self.max_bytes is None:
             return True
-        except Exception:
-            return False
+        entry_size = self.get_entry_size(
+            video_path, size=size, pix_fmt=pix_fmt)
+        return entry_size <= self.max_bytes
 
-    def _retrieve(self):
-        width, height = self.frame_size
-        try:
-            vec = np.fromstring(self._raw_frame, dtype="uint8")
-            return vec.reshape((height, width, 3))
-        except ValueError:
-            logger.warning(
-                "Unable to parse frame %d of %d; returning all zeros frame "
-                "instead", self.frame_number, self.total_frame_count)
-            return np.zeros((height, width, 3), dtype="uint8")
+    def get(self, video_path, size=None, pix_fmt="rgb24"):
+        '''Returns the frames of the given video, decoding them into the cache
+        if necessary.
+
+        Args:
+            video_path: the path to the video
+            size: an optional (width, height) to which to resize the frames
+            pix_fmt: the pixel format of the frames, "rgb24" (the default) or
+                "gray"
 
+        Returns:
+            a read-only memory-mapped array of the frames
 
-class OpenCVVideoReader(VideoReader):
-    '''Class for reading video using OpenCV.
+        Raises:
+            FrameCacheError: if the video is not cached and its decoded
+                frames would exceed `max_bytes`
+        '''
+        path = self.get_path(video_path, size=size, pix_fmt=pix_fmt)
+        if os.path.isfile(path):
+            try:
+                # Record the access for LRU eviction
+                os.utime(path, None)
+                return np.load(path, mmap_mode="r")
+            except (IOError, OSError):
+                # The entry was evicted by another process
+                logger.debug("Frame cache entry '%s' was evicted", path)
+
+        if not self.can_cache(video_path, size=size, pix_fmt=pix_fmt):
+            raise FrameCacheError(
+                "The decoded frames of '%s' would exceed the maximum frame "
+                "cache size of %d bytes" % (video_path, self.max_bytes))
+
+        frames = self._decode(video_path, path, size, pix_fmt)
+        self.evict(keep=path)
+        return frames
 
-    The input video can be a standalone video file like "/path/to/video.mp4"
-    or a directory of frames like "/path/to/frames/%05d.png". This path is
-    passed directly to cv2.VideoCapture. So, for example, if you specify a
-    directory of frames, the frame numbering must start from 0-3.
+    def open(self, video_path, frames=None, size=None, pix_fmt="rgb24"):
+        '''Returns a CachedVideoReader for the given video.
 
-    A frames string like "1-5,10-15" can optionally be passed to only read
-    certain frame ranges.
+        If the video is too large to be cached, an FFmpegVideoReader that
+        decodes the video without caching it is returned instead.
 
-    This class uses 1-based indexing for all frame operations.
-    '''
+        Args:
+            video_path: the path to the video
+            frames: an optional frames specification. Passed directly to the
+                VideoReader
+            size: an optional (width, height) to which to resize the frames
+            pix_fmt: the pixel format of the frames, "rgb24" (the default) or
+                "gray"
 
-    def __init__(self, inpath, frames=None):
-        '''Constructs a new VideoReader with OpenCV backend.
+        Returns:
+            a CachedVideoReader or FFmpegVideoReader
+        '''
+        if not os.path.isfile(self.get_path(
+                video_path, size=size, pix_fmt=pix_fmt)) and not (
+                    self.can_cache(video_path, size=size, pix_fmt=pix_fmt)):
+            logger.info(
+                "'%s' is too large for the frame cache; streaming it instead",
+                video_path)
+            return FFmpegVideoReader(
+                video_path, frames=frames, size=size, pix_fmt=pix_fmt)
+
+        return CachedVideoReader(
+            video_path, frames=frames, cache=self, size=size,
+            pix_fmt=pix_fmt)
+
+    def evict(self, max_bytes=None, keep=None):
+        '''Deletes the least recently used entries until the total size of
+        the cache is at most `max_bytes`.
 
         Args:
-            inpath: path to the input video, which can be a standalone video
-                file like "/path/to/video.mp4" or a directory of frames like
-                "/path/to/frames/%05d.png". This path is passed directly to
-                cv2.VideoCapture
-            frames: one of the following optional quantities specifying a
-                collection of frames to process:
-                    - None (all frames - the default)
-                    - "*" (all frames)
-                    - a string like "1-3,6,8-10"
-                    - a list like [1, 2, 3, 6, 8, 9, 10]
-                    - a FrameRange or FrameRanges instance
-
-        Raises:
-            VideoReaderError: if the input video could not be opened.
+            max_bytes: the maximum total size of the cache, in bytes. By
+                default, `self.max_bytes` is used
+            keep: an optional path of a cache file that must not be deleted
         '''
-        self._cap = cv2.VideoCapture(inpath)
-        if not self._cap.isOpened():
-            raise VideoReaderError("Unable to open '%s'" % inpath)
+        max_bytes = max_bytes if max_bytes is not None else self.max_bytes
+        if max_bytes is None:
+            return
 
-        super(OpenCVVideoReader, self).__init__(inpath, frames)
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*.npy")):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(e[1] for e in entries)
+        for _, num_bytes, path in sorted(entries):
+            if total_bytes <= max_bytes:
+                break
+            if path == keep:
+                continue
+            logger.debug("Evicting '%s' from frame cache", path)
+            try:
+                # Processes that have the file mapped retain access to it
+                os.remove(path)
+                total_bytes -= num_bytes
+            except OSError:
+                pass
+
+    def clear(self):
+        '''Deletes all entries from the cache.'''
+        self.evict(max_bytes=0)
+
+    def _decode(self, video_path, path, size, pix_fmt):
+        # Decodes the video into the cache and returns the memory-mapped
+        # frames. The frames are mapped before the entry is renamed into
+        # place, so they remain valid even if another process evicts it
+        logger.info("Decoding '%s' into frame cache", video_path)
+        etau.ensure_dir(self.cache_dir)
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+
+        num_frames = get_frame_count(video_path)
+        if num_frames <= 0:
+            raise FrameCacheError(
+                "Unable to determine the number of frames of '%s'" %
+                video_path)
 
-    @property
-    def encoding_str(self):
-        '''Return the video encoding string.'''
         try:
-            # OpenCV 3
-            code = int(self._cap.get(cv2.CAP_PROP_FOURCC))
-        except AttributeError:
-            # OpenCV 2
-            code = int(self._cap.get(cv2.cv.CV_CAP_PROP_FOURCC))
-        return FOURCC.int_to_str(code)
+            with FFmpegVideoReader(
+                    video_path, frames="1-%d" % num_frames, size=size,
+                    pix_fmt=pix_fmt) as r:
+                shape = (num_frames,) + r.frame_shape
+                arr = np.lib.format.open_memmap(
+                    tmp_path, mode="w+", dtype=np.uint8, shape=shape)
+                count = 0
+                try:
+                    while count < num_frames:
+                        # Frames are decoded directly into the memory map
+                        n = min(64, num_frames - count)
+                        count += len(
+                            r.read_batch(n, out=arr[count:(count + n)]))
+                except StopIteration:
+                    pass
+
+            if count == 0:
+                raise FrameCacheError(
+                    "Unable to decode any frames of '%s'" % video_path)
+
+            if count < num_frames:
+                # Shrink the entry to the frames that were actually decoded
+                logger.warning(
+                    "Only %d of %d frames of '%s' could be decoded", count,
+                    num_frames, video_path)
+                trunc_path = "%s.%d.trunc" % (path, os.getpid())
+                with open(trunc_path, "wb") as f:
+                    np.save(f, arr[:count])
+                del arr
+                os.remove(tmp_path)
+                tmp_path = trunc_path
+            else:
+                arr.flush()
+                del arr
 
-    @property
-    def frame_size(self):
-        '''The (width, height) of each frame.'''
-        try:
-            # OpenCV 3
-            return (
-                int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
-            )
-        except AttributeError:
-            # OpenCV 2
-            return (
-                int(self._cap.get(cv2.cv.CV_CAP_PROP_FRAME_WIDTH)),
-                int(self._cap.get(cv2.cv.CV_CAP_PROP_FRAME_HEIGHT)),
-            )
+            frames = np.load(tmp_path, mmap_mode="r")
+            os.rename(tmp_path, path)
+        except:
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+            raise
 
-    @property
-    def frame_rate(self):
-        '''The frame rate.'''
-        try:
-            # OpenCV 3
-            return float(self._cap.get(cv2.CAP_PROP_FPS))
-        except AttributeError:
-            # OpenCV 2
-            return float(self._cap.get(cv2.cv.CV_CAP_PROP_FPS))
+        return frames
 
-    @property
-    def total_frame_count(self):
-        '''The total number of frames in the video.'''
-        try:
-            # OpenCV 3
-            return int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        except AttributeError:
-            # OpenCV 2
-            return int(self._cap.get(cv2.cv.CV_CAP_PROP_FRAME_COUNT))
 
-    def read(self):
-        '''Reads the next frame.
+class FrameCacheError(Exception):
+    '''Exception raised when a video cannot be cached by a FrameCache.'''
+    pass
 
-        Returns:
-            img: the next frame
 
-        Raises:
-            StopIteration: if there are no more frames to process
-            VideoReaderError: if unable to load the next frame from file
-        '''
-        for idx in range(max(0, self.frame_number), next(self._ranges)):
-            if not self._cap.grab():
-                raise VideoReaderError(
-                    "Failed to grab frame %d" % (idx + 1))
-        return etai.bgr_to_rgb(self._cap.retrieve()[1])
+_FRAME_CACHE = None
 
-    def close(self):
-        '''Closes the video reader.'''
-        self._cap.release()
+
+def get_frame_cache():
+    '''Gets the default FrameCache.
+
+    The cache is configured by the `frame_cache_dir` and
+    `frame_cache_max_bytes` ETA config settings. If no directory is
+    configured, a directory in the system's temporary directory is used.
+
+    Returns:
+        the FrameCache instance
+    '''
+    global _FRAME_CACHE
+    if _FRAME_CACHE is None:
+        cache_dir = eta.config.frame_cache_dir or os.path.join(
+            tempfile.gettempdir(), "eta-frame-cache")
+        max_bytes = eta.config.frame_cache_max_bytes
+        _FRAME_CACHE = FrameCache(
+            cache_dir, max_bytes=max_bytes if max_bytes > 0 else None)
+    return _FRAME_CACHE
 
 
 class VideoWriter(object):
-    '''Base class for writing videos.'''
+    '''Base class for writing videos.
+
+    Subclasses must implement the `_write()` and `_close()` methods, which
+    write a frame to the encoder and close the encoder, respectively.
+
+    When `queue_size` is provided, frames passed to `write()` are placed in a
+    bounded queue of that size and written to the encoder by a background
+    thread, so that a slow encoder only blocks the caller when the queue is
+    full. In this mode, the caller must not modify a frame after passing it to
+    `write()`. Statistics about how often the caller was blocked are available
+    via the `backpressure_stats` property.
+    '''
+
+    def __init__(self, queue_size=None):
+        self._feeder = None
+        if queue_size:
+            self._feeder = _FrameFeeder(self._write, queue_size)
 
     def __enter__(self):
         return self
@@ -1864,21 +5894,143 @@ class VideoWriter(object):
     def __exit__(self, *args):
         self.close()
 
+    @property
+    def is_async(self):
+        '''Whether frames are written to the encoder by a background
+        thread.
+        '''
+        return self._feeder is not None
+
+    @property
+    def backpressure_stats(self):
+        '''A dictionary of statistics describing how often `write()` was
+        blocked waiting for the encoder, or None if the writer is not
+        asynchronous.
+        '''
+        if not self.is_async:
+            return None
+        return self._feeder.get_stats()
+
     def write(self, img):
-        raise NotImplementedError("subclass must implement write()")
+        '''Appends the image to the output video.
+
+        Args:
+            img: an image in ETA format (RGB)
+
+        Raises:
+            VideoWriterError: if the background thread failed to write a
+                previous frame
+        '''
+        if self.is_async:
+            self._feeder.put(img)
+        else:
+            self._write(img)
 
     def close(self):
-        raise NotImplementedError("subclass must implement close()")
+        '''Closes the video writer.
+
+        In asynchronous mode, this method blocks until all queued frames have
+        been written.
+
+        Raises:
+            VideoWriterError: if the background thread failed to write a frame
+        '''
+        try:
+            if self.is_async:
+                self._feeder.close()
+                logger.debug(
+                    "Video writer backpressure stats: %s",
+                    self.backpressure_stats)
+        finally:
+            self._close()
+
+    def _write(self, img):
+        raise NotImplementedError("subclass must implement _write()")
+
+    def _close(self):
+        raise NotImplementedError("subclass must implement _close()")
 
 
 class VideoWriterError(Exception):
     pass
 
 
+class _FrameFeeder(object):
+    '''Writes frames from a bounded queue in a background thread.'''
+
+    _END = object()
+
+    def __init__(self, write_fcn, size):
+        '''Creates a _FrameFeeder instance and starts its thread.
+
+        Args:
+            write_fcn: a function that writes a frame
+            size: the maximum number of frames to queue
+        '''
+        self._write_fcn = write_fcn
+        self._queue = queue.Queue(maxsize=size)
+        self._error = None
+        self._num_frames = 0
+        self._num_blocked = 0
+        self._blocked_time = 0.0
+        self._max_queue_size = 0
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def put(self, img):
+        '''Queues the frame for writing, blocking if the queue is full.'''
+        self._raise_if_error()
+        try:
+            self._queue.put_nowait(img)
+        except queue.Full:
+            self._num_blocked += 1
+            with etau.Timer() as t:
+                self._queue.put(img)
+            self._blocked_time += t.elapsed_time
+
+        self._num_frames += 1
+        self._max_queue_size = max(self._max_queue_size, self._queue.qsize())
+
+    def close(self):
+        '''Waits for all queued frames to be written and stops the thread.'''
+        self._queue.put(self._END)
+        self._thread.join()
+        self._raise_if_error()
+
+    def get_stats(self):
+        '''Returns a dictionary of backpressure statistics.'''
+        return {
+            "num_frames": self._num_frames,
+            "num_blocked_writes": self._num_blocked,
+            "blocked_time": self._blocked_time,
+            "max_queue_size": self._max_queue_size,
+        }
+
+    def _raise_if_error(self):
+        if self._error is not None:
+            raise VideoWriterError(
+                "Failed to write frame: %s" % str(self._error))
+
+    def _run(self):
+        while True:
+            img = self._queue.get()
+            if img is self._END:
+                return
+
+            # After an error, keep draining the queue so that put() never
+            # blocks forever
+            if self._error is None:
+                try:
+                    self._write_fcn(img)
+                except Exception as e:
+                    self._error = e
+
+
 class FFmpegVideoWriter(VideoWriter):
     '''Class for writing videos using ffmpeg.'''
 
-    def __init__(self, outpath, fps, size, out_opts=None):
+    def __init__(self, outpath, fps, size, out_opts=None, queue_size=None):
         '''Constructs a VideoWriter with ffmpeg backend.
 
         Args:
@@ -1887,6 +6039,9 @@ class FFmpegVideoWriter(VideoWriter):
             fps: the frame rate
             size: the (width, height) of each frame
             out_opts: an optional list of output options for FFmpeg
+            queue_size: an optional maximum number of frames to queue for
+                writing by a background thread. By default, frames are
+                written synchronously
         '''
         self.outpath = outpath
         self.fps = fps
@@ -1904,16 +6059,13 @@ class FFmpegVideoWriter(VideoWriter):
         )
         self._ffmpeg.run("-", self.outpath)
 
-    def write(self, img):
-        '''Appends the image to the output video.
+        super(FFmpegVideoWriter, self).__init__(queue_size=queue_size)
 
-        Args:
-            img: an image in ETA format (RGB)
-        '''
-        self._ffmpeg.stream(img.tostring())
+    def _write(self, img):
+        # The array buffer is written directly to avoid a `tostring()` copy
+        self._ffmpeg.stream(np.ascontiguousarray(img, dtype="uint8"))
 
-    def close(self):
-        '''Closes the video writer.'''
+    def _close(self):
         self._ffmpeg.close()
 
 
@@ -1923,7 +6075,7 @@ class OpenCVVideoWriter(VideoWriter):
     Uses the default encoding scheme for the extension of the output path.
     '''
 
-    def __init__(self, outpath, fps, size):
+    def __init__(self, outpath, fps, size, queue_size=None):
         '''Constructs a VideoWriter with OpenCV backend.
 
         Args:
@@ -1931,6 +6083,9 @@ class OpenCVVideoWriter(VideoWriter):
                 and the directory is created if necessary
             fps: the frame rate
             size: the (width, height) of each frame
+            queue_size: an optional maximum number of frames to queue for
+                writing by a background thread. By default, frames are
+                written synchronously
 
         Raises:
             VideoWriterError: if the writer failed to open
@@ -1945,16 +6100,12 @@ class OpenCVVideoWriter(VideoWriter):
         if not self._writer.isOpened():
             raise VideoWriterError("Unable to open '%s'" % self.outpath)
 
-    def write(self, img):
-        '''Appends the image to the output video.
+        super(OpenCVVideoWriter, self).__init__(queue_size=queue_size)
 
-        Args:
-            img: an image in ETA format
-        '''
+    def _write(self, img):
         self._writer.write(etai.rgb_to_bgr(img))
 
-    def close(self):
-        '''Closes the video writer.'''
+    def _close(self):
         # self._writer.release()  # warns to use a separate thread
         threading.Thread(target=self._writer.release, args=()).start()
 
@@ -2060,6 +6211,7 @@ class FFmpeg(object):
             fps=None,
             size=None,
             scale=None,
+            crop=None,
             global_opts=None,
             in_opts=None,
             out_opts=None):
@@ -2073,6 +6225,8 @@ class FFmpeg(object):
                 preserved
             scale: an optional positive number by which to scale the input
                 video (e.g., 0.5 or 2)
+            crop: an optional (x, y, width, height) region, in pixels, to crop
+                from the input frames. Cropping is applied before resizing
             global_opts: an optional list of global options for ffmpeg. By
                 default, self.DEFAULT_GLOBAL_OPTS is used
             in_opts: an optional list of input options for ffmpeg
@@ -2083,7 +6237,7 @@ class FFmpeg(object):
         self.is_input_streaming = False
         self.is_output_streaming = False
 
-        self._filter_opts = self._gen_filter_opts(fps, size, scale)
+        self._filter_opts = self._gen_filter_opts(fps, size, scale, crop)
         self._global_opts = global_opts or self.DEFAULT_GLOBAL_OPTS
         self._in_opts = in_opts or []
         self._out_opts = out_opts
@@ -2153,7 +6307,8 @@ class FFmpeg(object):
                 raise etau.ExecutableRuntimeError(self.cmd, err)
 
     def stream(self, string):
-        '''Writes the string to ffmpeg's stdin stream.
+        '''Writes the string (or any other bytes-like object, such as a
+        C-contiguous numpy array) to ffmpeg's stdin stream.
 
         Raises:
             FFmpegStreamingError: if input streaming mode is not active
@@ -2172,19 +6327,69 @@ class FFmpeg(object):
             raise FFmpegStreamingError("Not currently output streaming")
         return self._p.stdout.read(num_bytes)
 
-    def close(self):
-        '''Closes a streaming ffmpeg program, if necessary.'''
+    def read_into(self, arr):
+        '''Reads bytes from ffmpeg's stdout stream directly into the given
+        array, until the array is full or the stream ends.
+
+        Args:
+            arr: a C-contiguous numpy array
+
+        Returns:
+            the number of bytes read, which is less than `arr.nbytes` only if
+                the stream ended
+
+        Raises:
+            FFmpegStreamingError: if output streaming mode is not active or
+                the array is not C-contiguous
+        '''
+        if not self.is_output_streaming:
+            raise FFmpegStreamingError("Not currently output streaming")
+        if not arr.flags.c_contiguous:
+            raise FFmpegStreamingError("Expected a C-contiguous array")
+        view = memoryview(arr.reshape(-1).view(np.uint8))
+        num_bytes = 0
+        while num_bytes < arr.nbytes:
+            n = self._p.stdout.readinto(view[num_bytes:])
+            if not n:
+                break
+            num_bytes += n
+        return num_bytes
+
+    def close(self, check=False):
+        '''Closes a streaming ffmpeg program, if necessary.
+
+        Args:
+            check: whether to raise an error if the streaming ffmpeg program
+                exited with a non-zero status. By default, the status is not
+                checked, since programs that are closed before they finish
+                streaming may exit with an error
+
+        Raises:
+            ExecutableRuntimeError: if `check` is True and the ffmpeg binary
+                exited with a non-zero status
+        '''
+        err = None
+        returncode = 0
         if self.is_input_streaming or self.is_output_streaming:
             self._p.stdin.close()
             self._p.stdout.close()
+            if check:
+                err = self._p.stderr.read()
             self._p.wait()
+            returncode = self._p.returncode
         self._p = None
         self.is_input_streaming = False
         self.is_output_streaming = False
 
+        if check and returncode != 0:
+            raise etau.ExecutableRuntimeError(self.cmd, err)
+
     @staticmethod
-    def _gen_filter_opts(fps, size, scale):
+    def _gen_filter_opts(fps, size, scale, crop=None):
         filters = []
+        if crop:
+            x, y, width, height = crop
+            filters.append("crop={0}:{1}:{2}:{3}".format(width, height, x, y))
         if fps is not None and fps > 0:
             filters.append("fps={0}".format(fps))
         if size:
@@ -2240,28 +6445,42 @@ class FOURCC(object):
 
 
 class FrameRanges(object):
-    '''A monotonically increasing and disjoint series of frames.'''
+    '''A monotonically increasing and disjoint series of frames.
+
+    The ranges are stored as an [N, 2] numpy array of (first, last) intervals,
+    so membership tests take O(log N) time and set operations (union,
+    intersection, and difference) are vectorized.
+
+    FrameRanges instances are also iterators over their frames.
+    '''
 
     def __init__(self, ranges):
         '''Constructs a frame range series from a list of (first, last) tuples,
-        which must be disjoint and monotonically increasing.
+        or an [N, 2] array of intervals, which must be disjoint and
+        monotonically increasing.
 
         Raises:
+            FrameRangeError: if a range has last < first
             FrameRangesError: if the series is not disjoint and monotonically
                 increasing
         '''
-        self._idx = 0
-        self._ranges = []
-        self._started = False
+        intervals = np.array(list(ranges), dtype=np.int64).reshape(-1, 2)
+
+        bad = np.flatnonzero(intervals[:, 1] < intervals[:, 0])
+        if bad.size:
+            raise FrameRangeError(
+                "Expected first:%d <= last:%d" % tuple(intervals[bad[0]]))
 
-        end = -1
-        for first, last in ranges:
-            if first <= end:
-                raise FrameRangesError(
-                    "Expected first:%d > last:%d" % (first, end))
+        bad = np.flatnonzero(intervals[1:, 0] <= intervals[:-1, 1])
+        if bad.size:
+            raise FrameRangesError(
+                "Expected first:%d > last:%d" % (
+                    intervals[bad[0] + 1, 0], intervals[bad[0], 1]))
 
-            self._ranges.append(FrameRange(first, last))
-            end = last
+        intervals.flags.writeable = False
+        self._intervals = intervals
+        self._idx = 0
+        self._frame = -1
 
     def __iter__(self):
         return self
@@ -2272,54 +6491,192 @@ class FrameRanges(object):
         Raises:
             StopIteration: if there are no more frames to process
         '''
-        self._started = True
-        try:
-            frame = next(self._ranges[self._idx])
-        except StopIteration:
+        if self._idx >= len(self._intervals):
+            raise StopIteration
+
+        if self._frame < 0:
+            self._frame = int(self._intervals[0, 0])
+        elif self._frame < self._intervals[self._idx, 1]:
+            self._frame += 1
+        elif self._idx + 1 < len(self._intervals):
+            self._idx += 1
+            self._frame = int(self._intervals[self._idx, 0])
+        else:
             self._idx += 1
-            return next(self)
-        except IndexError:
             raise StopIteration
 
-        return frame
+        return self._frame
+
+    def __contains__(self, frame_number):
+        idx = np.searchsorted(
+            self._intervals[:, 0], frame_number, side="right") - 1
+        return idx >= 0 and frame_number <= self._intervals[idx, 1]
 
     @property
     def frame(self):
         '''The current frame number, or -1 if no frames have been read.'''
-        if self._started:
-            return self._ranges[self._idx].idx
-
-        return -1
+        return self._frame
 
     @property
     def frame_range(self):
         '''The (first, last) values for the current range, or (-1, -1) if no
         frames have been read.
         '''
-        if self._started:
-            return self._ranges[self._idx].first, self._ranges[self._idx].last
+        if self._frame >= 0:
+            idx = min(self._idx, len(self._intervals) - 1)
+            return tuple(int(v) for v in self._intervals[idx])
 
         return (-1, -1)
 
     @property
     def is_new_frame_range(self):
         '''Whether the current frame is the first in a new range.'''
-        if self._started:
-            return self._ranges[self._idx].is_first_frame
+        if self._frame >= 0:
+            return self._frame == self.frame_range[0]
 
         return False
 
+    @property
+    def intervals(self):
+        '''A read-only [N, 2] array of the (first, last) frame ranges.'''
+        return self._intervals
+
+    @property
+    def num_ranges(self):
+        '''The number of frame ranges.'''
+        return len(self._intervals)
+
+    @property
+    def num_frames(self):
+        '''The total number of frames in the ranges.'''
+        return int(np.sum(self._intervals[:, 1] - self._intervals[:, 0] + 1))
+
+    def contains(self, frame_numbers):
+        '''Determines whether the given frames are in the ranges.
+
+        Args:
+            frame_numbers: an array-like of frame numbers
+
+        Returns:
+            a boolean numpy array with the same shape as `frame_numbers`
+        '''
+        frame_numbers = np.asarray(frame_numbers)
+        if not self._intervals.size:
+            return np.zeros(frame_numbers.shape, dtype=bool)
+
+        idx = np.searchsorted(
+            self._intervals[:, 0], frame_numbers, side="right") - 1
+        lasts = self._intervals[np.maximum(idx, 0), 1]
+        return (idx >= 0) & (frame_numbers <= lasts)
+
+    def union(self, other):
+        '''Returns the union of these ranges and the given ranges.
+
+        Args:
+            other: a FrameRanges instance
+
+        Returns:
+            a new FrameRanges instance
+        '''
+        return self._combine(other, np.logical_or)
+
+    def intersection(self, other):
+        '''Returns the intersection of these ranges and the given ranges.
+
+        Args:
+            other: a FrameRanges instance
+
+        Returns:
+            a new FrameRanges instance
+        '''
+        return self._combine(other, np.logical_and)
+
+    def difference(self, other):
+        '''Returns the frames in these ranges that are not in the given
+        ranges.
+
+        Args:
+            other: a FrameRanges instance
+
+        Returns:
+            a new FrameRanges instance
+        '''
+        return self._combine(other, lambda a, b: a & ~b)
+
+    def to_array(self):
+        '''Return a numpy array of the frames in the frame ranges.'''
+        firsts = self._intervals[:, 0]
+        lengths = self._intervals[:, 1] - firsts + 1
+        if not lengths.size:
+            return np.zeros(0, dtype=np.int64)
+
+        # Each frame is its range's first frame plus its offset in the range
+        offsets = np.arange(lengths.sum()) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(firsts, lengths) + offsets
+
     def to_list(self):
         '''Return a list of frames in the frame ranges.'''
-        frames = []
-        for r in self._ranges:
-            frames += r.to_list()
-
-        return frames
+        return self.to_array().tolist()
 
     def to_str(self):
         '''Return a string representation of the frame ranges.'''
-        return ",".join([r.to_str() for r in self._ranges])
+        return ",".join([
+            "%d" % first if first == last else "%d-%d" % (first, last)
+            for first, last in self._intervals])
+
+    def to_select_filter(self):
+        '''Returns an ffmpeg `select` filter that selects the frames in the
+        ranges.
+
+        Each range is expressed as a single `between()` (or `eq()`) term, so
+        the filter is compact even when the ranges contain many frames.
+
+        Returns:
+            a filter string like "select='between(n\\,0\\,4)+eq(n\\,9)'"
+        '''
+        terms = []
+        for first, last in self._intervals:
+            if first == last:
+                terms.append("eq(n\\,%d)" % (first - 1))
+            else:
+                terms.append("between(n\\,%d\\,%d)" % (first - 1, last - 1))
+
+        return "select='%s'" % "+".join(terms)
+
+    def to_trim_filter(self):
+        '''Returns an ffmpeg filtergraph that extracts the frames in the ranges
+        via `trim` filters and concatenates them.
+
+        Unlike `to_select_filter()`, the timestamps of the output frames are
+        made contiguous, which is useful when encoding the output as a video.
+
+        Returns:
+            a filtergraph string for use with ffmpeg's `-filter_complex`
+            option, whose output is labeled "[out]"
+        '''
+        chains = []
+        labels = []
+        for idx, (first, last) in enumerate(self._intervals):
+            chains.append(
+                "[0:v]trim=start_frame=%d:end_frame=%d,"
+                "setpts=PTS-STARTPTS[v%d]" % (first - 1, last, idx))
+            labels.append("[v%d]" % idx)
+
+        chains.append(
+            "%sconcat=n=%d:v=1:a=0[out]" % ("".join(labels), len(labels)))
+        return ";".join(chains)
+
+    def _combine(self, other, op):
+        a = self._intervals
+        b = other.intervals
+
+        # Evaluate membership on each half-open [first, last + 1) boundary
+        points = np.unique(np.concatenate(
+            [a[:, 0], a[:, 1] + 1, b[:, 0], b[:, 1] + 1]))
+        in_a = _count_open_intervals(a, points) > 0
+        in_b = _count_open_intervals(b, points) > 0
+        return FrameRanges(_state_to_intervals(points, op(in_a, in_b)))
 
     @classmethod
     def from_str(cls, frames_str):
@@ -2344,12 +6701,93 @@ class FrameRanges(object):
         '''Constructs a FrameRanges object from a frames list.
 
         Args:
-            frames_list: a list like [1, 2, 3, 6, 8, 9, 10]
+            frames_list: a list (or numpy array) like [1, 2, 3, 6, 8, 9, 10]
 
         Raises:
             FrameRangesError: if the frames list is invalid
         '''
-        return cls(_list_to_ranges(frames_list))
+        frames = np.unique(np.asarray(frames_list, dtype=np.int64))
+        if not frames.size:
+            return cls([])
+
+        breaks = np.flatnonzero(np.diff(frames) != 1)
+        firsts = frames[np.concatenate([[0], breaks + 1])]
+        lasts = frames[np.concatenate([breaks, [-1]])]
+        return cls(np.stack([firsts, lasts], axis=1))
+
+    @classmethod
+    def from_mask(cls, mask):
+        '''Constructs a FrameRanges object from a per-frame boolean mask.
+
+        Args:
+            mask: a boolean array-like whose i-th element indicates whether
+                frame i + 1 is included
+
+        Returns:
+            a FrameRanges instance
+        '''
+        mask = np.asarray(mask, dtype=bool)
+        edges = np.diff(np.concatenate([[False], mask, [False]]).astype(int))
+        firsts = np.flatnonzero(edges == 1) + 1
+        lasts = np.flatnonzero(edges == -1)
+        return cls(np.stack([firsts, lasts], axis=1))
+
+    @classmethod
+    def from_event_detection(cls, detection):
+        '''Constructs a FrameRanges object from an EventDetection.
+
+        Args:
+            detection: an `eta.core.events.EventDetection` instance
+
+        Returns:
+            a FrameRanges instance
+        '''
+        return cls.from_mask(detection.bools)
+
+    @classmethod
+    def from_event_series(cls, series):
+        '''Constructs a FrameRanges object from an EventSeries. Unsorted
+        events are sorted, and overlapping events are merged. Events that are
+        merely adjacent, e.g., "1-5" and "6-10", remain separate ranges.
+
+        Args:
+            series: an `eta.core.events.EventSeries` instance
+
+        Returns:
+            a FrameRanges instance
+        '''
+        intervals = np.array(
+            [(e.start, e.stop) for e in series.events],
+            dtype=np.int64).reshape(-1, 2)
+        if not intervals.size:
+            return cls(intervals)
+
+        intervals = intervals[np.argsort(intervals[:, 0], kind="mergesort")]
+
+        # An event starts a new range unless it overlaps a previous event
+        last_stops = np.maximum.accumulate(intervals[:, 1])
+        starts = np.flatnonzero(np.concatenate(
+            [[True], intervals[1:, 0] > last_stops[:-1]]))
+        return cls(np.stack([
+            intervals[starts, 0],
+            np.maximum.reduceat(intervals[:, 1], starts)], axis=1))
+
+
+def _count_open_intervals(intervals, points):
+    # Number of [first, last + 1) intervals containing each point. The
+    # intervals need not be sorted or disjoint
+    return (
+        np.searchsorted(np.sort(intervals[:, 0]), points, side="right") -
+        np.searchsorted(np.sort(intervals[:, 1] + 1), points, side="right"))
+
+
+def _state_to_intervals(points, state):
+    # Converts the membership states on the half-open segments starting at the
+    # given sorted points into an [N, 2] array of (first, last) intervals
+    prev = np.concatenate([[False], state[:-1]])
+    firsts = points[state & ~prev]
+    lasts = points[~state & prev] - 1
+    return np.stack([firsts, lasts], axis=1)
 
 
 class FrameRangesError(Exception):
@@ -117,18 +117,22 @@ class ParametersConfig(Config):
 def _clip_videos(clip_config):
     for data in clip_config.data:
         frames = _get_frames(data, clip_config.parameters)
-        _clip_video(data, frames)
+        if data.output_video_clips_path:
+            # No per-frame processing is needed, so extract the clips directly
+            _extract_clips(data, frames)
+        else:
+            _clip_video(data, frames)
 
 
 def _get_frames(data, parameters):
     if data.event_detection_path:
         # Get frames from per-frame detections
         detections = etae.EventDetection.from_json(data.event_detection_path)
-        frames = detections.to_series().to_str()
+        frames = etav.FrameRanges.from_event_detection(detections).to_str()
     elif data.event_series_path:
         # Get frames from clip series
         series = etae.EventSeries.from_json(data.event_series_path)
-        frames = series.to_str()
+        frames = etav.FrameRanges.from_event_series(series).to_str()
     else:
         # Manually specified frames
         frames = parameters.frames
@@ -136,6 +140,64 @@ def _get_frames(data, parameters):
     return frames
 
 
+def _extract_clips(data, frames):
+    logger.info("Extracting video clips for '%s'", data.input_path)
+
+    index = etav._try_get_video_index(data.input_path, build=True)
+    if index is None:
+        logger.warning(
+            "No index available for '%s'; assuming a constant frame rate",
+            data.input_path)
+
+    if frames is None or frames == "*":
+        if index is not None:
+            num_frames = index.num_frames
+        else:
+            num_frames = etav.get_frame_count(data.input_path)
+        frames = "1-%d" % num_frames
+
+    ranges = etav.FrameRanges.from_str(frames)
+    if not ranges.num_ranges:
+        logger.info("No clips to extract")
+        return
+
+    fps = etav.get_frame_rate(data.input_path) if index is None else None
+
+    clips = []
+    for first, last in ranges.intervals.tolist():
+        if index is not None and first > index.num_frames:
+            logger.warning(
+                "Skipping clip %d-%d, which starts after the last frame %d",
+                first, last, index.num_frames)
+            continue
+
+        start_time, duration = _get_clip_times(first, last, index, fps)
+        outpath = data.output_video_clips_path % (first, last)
+        clips.append((start_time, duration, outpath))
+
+    etav.extract_clips(data.input_path, clips)
+
+
+def _get_clip_times(first, last, index, fps):
+    if index is None:
+        # Assume a constant frame rate. The clips start and end halfway
+        # between frames so that rounding of the frame timestamps does not
+        # matter
+        start_time = max(0.0, (first - 1.5) / fps)
+        end_time = (last - 0.5) / fps
+        return start_time, end_time - start_time
+
+    # The seek timestamps lie halfway between frames, so the clips start and
+    # end on exactly the requested frames, even if the frame rate varies
+    start_time = index.get_seek_timestamp(first)
+    if last < index.num_frames:
+        duration = index.get_seek_timestamp(last + 1) - start_time
+    else:
+        duration = None  # through the end of the video
+
+    return start_time, duration
+
+
 def _clip_video(data, frames):
     logger.info("Generating video clips for '%s'", data.input_path)
 
@@ -24,7 +24,10 @@ from builtins import *
 # pragma pylint: enable=wildcard-import
 
 import logging
+import multiprocessing
+import multiprocessing.pool
 import sys
+import time
 
 from eta.core.config import Config
 import eta.core.image as etai
@@ -38,6 +41,11 @@ import eta.core.ziputils as etaz
 logger = logging.getLogger(__name__)
 
 
+# The default number of ffmpeg threads to allocate to each video when
+# formatting multiple videos in parallel
+_DEFAULT_THREADS_PER_JOB = 2
+
+
 class FormatterConfig(etam.BaseModuleConfig):
     '''Formatter configuration settings.
 
@@ -131,6 +139,20 @@ class ParametersConfig(Config):
             constraint is applied to them
         ffmpeg_out_opts (eta.core.types.Array): [None] An array of ffmpeg
             output options
+        max_threads (eta.core.types.Number): [None] The total number of
+            ffmpeg threads to use across all videos being formatted in
+            parallel. Each ffmpeg process is limited to its share of the
+            threads for decoding, filtering, and encoding. By default, the
+            number of CPUs is used
+        num_workers (eta.core.types.Number): [None] The maximum number of
+            videos to format in parallel. By default, one video is formatted
+            per two threads of `max_threads`
+        num_segments (eta.core.types.Number): [None] The number of segments
+            into which to split each video so that its segments can be
+            encoded concurrently. Videos are split at keyframes, and the
+            `max_threads` allocated to each video are divided among its
+            segments. Only applicable when the frame rate is not changed and
+            the output is a video
     '''
 
     def __init__(self, d):
@@ -141,31 +163,79 @@ class ParametersConfig(Config):
         self.max_size = self.parse_array(d, "max_size", default=None)
         self.ffmpeg_out_opts = self.parse_array(
             d, "ffmpeg_out_opts", default=None)
+        self.max_threads = self.parse_number(d, "max_threads", default=None)
+        self.num_workers = self.parse_number(d, "num_workers", default=None)
+        self.num_segments = self.parse_number(
+            d, "num_segments", default=None)
 
 
 def _format_videos(config):
     parameters = config.parameters
+
+    # Gather the videos to format
+    jobs = []
+    output_zips = []
     for data in config.data:
         if data.is_zip:
-            _process_zip(data.input_zip, data.output_zip, parameters)
+            input_paths = etaz.extract_zip(data.input_zip)
+            output_paths = etaz.make_parallel_files(
+                data.output_zip, input_paths)
+            jobs.extend(zip(input_paths, output_paths))
+            output_zips.append(data.output_zip)
         else:
-            _process_video(data.input_path, data.output_path, parameters)
+            jobs.append((data.input_path, data.output_path))
 
+    _process_videos(jobs, parameters)
 
-def _process_zip(input_zip, output_zip, parameters):
-    input_paths = etaz.extract_zip(input_zip)
-    output_paths = etaz.make_parallel_files(output_zip, input_paths)
+    # Collect zip outputs
+    for output_zip in output_zips:
+        etaz.make_zip(output_zip)
 
-    # Iterate over videos
-    for input_path, output_path in zip(input_paths, output_paths):
-        _process_video(input_path, output_path, parameters)
 
-    # Collect outputs
-    etaz.make_zip(output_zip)
+def _process_videos(jobs, parameters):
+    if not jobs:
+        return
 
+    # Process the longest videos first so that they don't straggle at the end
+    stream_infos = etav.probe_many([input_path for input_path, _ in jobs])
+    jobs = sorted(
+        [(i, o, si) for (i, o), si in zip(jobs, stream_infos)],
+        key=lambda job: -_get_duration(job[2]))
+
+    # Divide the thread budget among the workers
+    max_threads = int(parameters.max_threads or multiprocessing.cpu_count())
+    num_workers = int(
+        parameters.num_workers or max_threads // _DEFAULT_THREADS_PER_JOB)
+    num_workers = max(1, min(num_workers, len(jobs)))
+    threads = max(1, max_threads // num_workers)
+    logger.info(
+        "Formatting %d video(s) using %d worker(s) with %d ffmpeg thread(s) "
+        "each", len(jobs), num_workers, threads)
+
+    def _process(job):
+        input_path, output_path, stream_info = job
+        _process_video(
+            input_path, output_path, parameters, stream_info=stream_info,
+            threads=threads)
+
+    if num_workers == 1:
+        for job in jobs:
+            _process(job)
+        return
 
-def _process_video(input_path, output_path, parameters):
-    stream_info = etav.VideoStreamInfo.build_for(input_path)
+    pool = multiprocessing.pool.ThreadPool(num_workers)
+    try:
+        for _ in pool.imap_unordered(_process, jobs):
+            pass
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _process_video(
+        input_path, output_path, parameters, stream_info=None, threads=None):
+    if stream_info is None:
+        stream_info = etav.VideoStreamInfo.build_for(input_path)
     ifps = stream_info.frame_rate
     isize = stream_info.frame_size
 
@@ -218,9 +288,98 @@ def _process_video(input_path, output_path, parameters):
         logger.info("*** resizing to %s", str(osize))
     else:
         osize = None  # omit unused argument
-    ffmpeg = etav.FFmpeg(
-        fps=ofps, size=osize, out_opts=parameters.ffmpeg_out_opts)
-    ffmpeg.run(input_path, output_path)
+    num_segments = int(parameters.num_segments or 1)
+    index = None
+    if num_segments > 1 and ofps is None and etav.is_supported_video_file(
+            output_path):
+        index = _get_segment_index(
+            input_path, _get_out_opts(
+                parameters.ffmpeg_out_opts, output_path, None))
+
+    if index is not None:
+        logger.info("*** encoding in %d segments", num_segments)
+        if threads:
+            threads = max(1, threads // num_segments)
+    else:
+        num_segments = 1
+
+    if threads:
+        logger.info("*** using %d ffmpeg thread(s) per process", threads)
+    global_opts, in_opts = _get_thread_opts(threads)
+    out_opts = _get_out_opts(parameters.ffmpeg_out_opts, output_path, threads)
+    start_time = time.time()
+    if num_segments > 1:
+        etav.transcode_in_segments(
+            input_path, output_path, num_segments, size=osize,
+            global_opts=global_opts, in_opts=in_opts, out_opts=out_opts,
+            index=index)
+    else:
+        ffmpeg = etav.FFmpeg(
+            fps=ofps, size=osize, global_opts=global_opts, in_opts=in_opts,
+            out_opts=out_opts)
+        ffmpeg.run(input_path, output_path)
+    _log_throughput(input_path, stream_info, time.time() - start_time)
+
+
+def _get_segment_index(input_path, out_opts):
+    # Returns the VideoIndex with which to encode the video in segments, or
+    # None if it must be encoded serially
+    try:
+        if "-an" not in out_opts and etav.has_audio(input_path):
+            # Segment encoding does not retain audio
+            logger.info(
+                "'%s' has audio that must be retained, so it will be "
+                "encoded serially", input_path)
+            return None
+
+        return etav.get_video_index(input_path)
+    except etav.FFprobeError as e:
+        logger.warning(
+            "Unable to index '%s', so it will be encoded serially: %s",
+            input_path, e)
+        return None
+
+
+def _get_thread_opts(threads):
+    # Limits the decoder (input `-threads`) and filter graph
+    # (`-filter_threads`) threads of each ffmpeg process, in addition to the
+    # encoder threads, which are limited by `_get_out_opts()`
+    if not threads:
+        return None, None
+
+    global_opts = etav.FFmpeg.DEFAULT_GLOBAL_OPTS + [
+        "-filter_threads", str(threads)]
+    in_opts = ["-threads", str(threads)]
+    return global_opts, in_opts
+
+
+def _get_out_opts(out_opts, output_path, threads):
+    if out_opts is None and etav.is_supported_video_file(output_path):
+        out_opts = etav.FFmpeg.DEFAULT_VIDEO_OUT_OPTS
+    out_opts = list(out_opts or [])
+    if threads and "-threads" not in out_opts:
+        out_opts += ["-threads", str(threads)]
+    return out_opts
+
+
+def _get_duration(stream_info):
+    try:
+        return float(stream_info.get_raw_value("duration"))
+    except (KeyError, ValueError):
+        pass
+
+    try:
+        return stream_info.total_frame_count / stream_info.frame_rate
+    except (etav.VideoStreamInfoError, ZeroDivisionError):
+        return 0.0
+
+
+def _log_throughput(input_path, stream_info, elapsed):
+    elapsed = max(elapsed, 1e-6)
+    logger.info(
+        "Formatted '%s' in %.1fs (%.1f frames/sec, %.1fx realtime)",
+        input_path, elapsed, stream_info.total_frame_count / elapsed,
+        _get_duration(stream_info) / elapsed)
 
 
 def run(config_path, pipeline_config_path=None):
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+'''
+A module for adaptively sampling the frames of videos at which their content
+changes.
+
+Info:
+    type: eta.core.types.Module
+    version: 0.1.0
+
+Copyright 2017-2018, Voxel51, Inc.
+voxel51.com
+
+Brian Moore, brian@voxel51.com
+'''
+# pragma pylint: disable=redefined-builtin
+# pragma pylint: disable=unused-wildcard-import
+# pragma pylint: disable=wildcard-import
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from builtins import *
+# pragma pylint: enable=redefined-builtin
+# pragma pylint: enable=unused-wildcard-import
+# pragma pylint: enable=wildcard-import
+
+import logging
+import sys
+
+import numpy as np
+
+from eta.core.config import Config
+import eta.core.events as etae
+import eta.core.module as etam
+import eta.core.video as etav
+
+
+logger = logging.getLogger(__name__)
+
+
+class SceneChangeSamplerConfig(etam.BaseModuleConfig):
+    '''Scene change sampler configuration settings.
+
+    Attributes:
+        data (DataConfig)
+        parameters (ParametersConfig)
+    '''
+
+    def __init__(self, d):
+        super(SceneChangeSamplerConfig, self).__init__(d)
+        self.data = self.parse_object_array(d, "data", DataConfig)
+        self.parameters = self.parse_object(d, "parameters", ParametersConfig)
+
+
+class DataConfig(Config):
+    '''Data configuration settings.
+
+    Inputs:
+        video (eta.core.types.Video): The input video
+
+    Outputs:
+        event_detection (eta.core.types.EventDetection): Per-frame binary
+            labels indicating the sampled frames
+    '''
+
+    def __init__(self, d):
+        self.video = self.parse_string(d, "video")
+        self.event_detection = self.parse_string(d, "event_detection")
+
+
+class ParametersConfig(Config):
+    '''Parameter configuration settings.
+
+    Parameters:
+        method (eta.core.types.String): ["diff"] The method used to detect
+            changes. Supported values are "diff", which compares each frame
+            to the last sampled frame, and "scene", which uses ffmpeg's scene
+            change score
+        threshold (eta.core.types.Number): [None] The change threshold in
+            [0, 1] above which frames are sampled. By default, a
+            method-specific threshold is used
+        hold (eta.core.types.Number): [0] The number of additional frames to
+            sample after each sampled frame
+        max_gap (eta.core.types.Number): [None] The maximum number of
+            consecutive frames to skip
+        size (eta.core.types.Array): [[64, -1]] The (width, height) to which
+            to resize the frames before comparing them. Dimensions can be
+            -1, in which case the input aspect ratio is preserved
+    '''
+
+    def __init__(self, d):
+        self.method = self.parse_string(d, "method", default="diff")
+        self.threshold = self.parse_number(d, "threshold", default=None)
+        self.hold = self.parse_number(d, "hold", default=0)
+        self.max_gap = self.parse_number(d, "max_gap", default=None)
+        self.size = self.parse_array(d, "size", default=[64, -1])
+
+
+def _sample_scene_changes(sampler_config):
+    parameters = sampler_config.parameters
+    max_gap = parameters.max_gap
+    if max_gap is not None:
+        max_gap = int(max_gap)
+
+    for data in sampler_config.data:
+        logger.info("Sampling scene changes of '%s'", data.video)
+        mask = etav.sample_scene_changes(
+            data.video, method=parameters.method,
+            threshold=parameters.threshold, hold=int(parameters.hold),
+            max_gap=max_gap, size=parameters.size, return_mask=True)
+
+        detection = etae.EventDetection(mask)
+        logger.info(
+            "Sampled %d of %d frames", np.count_nonzero(mask), mask.size)
+
+        logger.info("Writing event detection to '%s'", data.event_detection)
+        detection.write_json(data.event_detection)
+
+
+def run(config_path, pipeline_config_path=None):
+    '''Run the sample_scene_changes module.
+
+    Args:
+        config_path: path to a SceneChangeSamplerConfig file
+        pipeline_config_path: optional path to a PipelineConfig file
+    '''
+    sampler_config = SceneChangeSamplerConfig.from_json(config_path)
+    etam.setup(sampler_config, pipeline_config_path=pipeline_config_path)
+    _sample_scene_changes(sampler_config)
+
+
+if __name__ == "__main__":
+    run(*sys.argv[1:])
@@ -62,9 +62,13 @@ class DataConfig(Config):
 
 
 def _get_stream_info(stream_info_config):
-    for data_config in stream_info_config.data:
-        logger.info("Reading stream info for %s", data_config.video)
-        vsi = etav.VideoStreamInfo.build_for(data_config.video)
+    data = stream_info_config.data
+    logger.info("Reading stream info for %d video(s)", len(data))
+    vsis = etav.probe_many([data_config.video for data_config in data])
+    for data_config, vsi in zip(data, vsis):
+        logger.info(
+            "Writing stream info for %s to %s", data_config.video,
+            data_config.stream_info)
         vsi.write_json(data_config.stream_info)
 
 
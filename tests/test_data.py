@@ -0,0 +1,105 @@
+'''
+Tests for the `eta.core.data` module.
+
+Copyright 2017-2018, Voxel51, Inc.
+voxel51.com
+'''
+# pragma pylint: disable=redefined-builtin
+# pragma pylint: disable=unused-wildcard-import
+# pragma pylint: disable=wildcard-import
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from builtins import *
+# pragma pylint: enable=redefined-builtin
+# pragma pylint: enable=unused-wildcard-import
+# pragma pylint: enable=wildcard-import
+
+import unittest
+
+import eta.core.data as etad
+
+
+def _make_schema():
+    return etad.AttributeContainerSchema(schema={
+        "color": etad.CategoricalAttributeSchema(
+            "color", categories=["red", "green"]),
+        "speed": etad.NumericAttributeSchema("speed", range=(0, 10)),
+        "moving": etad.BooleanAttributeSchema("moving"),
+    })
+
+
+def _validate(schema, attrs):
+    # Returns the class and message of the error raised when validating the
+    # attributes one at a time, or None if they are valid
+    try:
+        for attr in attrs:
+            schema.validate_attribute(attr)
+    except Exception as e:
+        return e.__class__, str(e)
+    return None
+
+
+def _validate_compiled(schema, attrs):
+    try:
+        schema.compile().validate_attributes(attrs)
+    except Exception as e:
+        return e.__class__, str(e)
+    return None
+
+
+class CompiledAttributeContainerSchemaTest(unittest.TestCase):
+
+    def test_valid_attributes(self):
+        attrs = [
+            etad.CategoricalAttribute("color", "red"),
+            etad.NumericAttribute("speed", 0),
+            etad.NumericAttribute("speed", 10),
+            etad.BooleanAttribute("moving", True),
+            etad.CategoricalAttribute("color", "green"),
+        ]
+        self.assertIsNone(_validate_compiled(_make_schema(), attrs))
+        self.assertIsNone(_validate_compiled(_make_schema(), []))
+
+    def test_errors_match_uncompiled_schema(self):
+        valid = [
+            etad.CategoricalAttribute("color", "red"),
+            etad.NumericAttribute("speed", 5),
+        ]
+        invalid = [
+            etad.CategoricalAttribute("color", "blue"),
+            etad.NumericAttribute("speed", 10.5),
+            etad.NumericAttribute("speed", -1),
+            etad.NumericAttribute("color", 1),
+            etad.CategoricalAttribute("speed", "fast"),
+            etad.CategoricalAttribute("size", "large"),
+        ]
+        schema = _make_schema()
+        for attr in invalid:
+            attrs = valid + [attr] + valid
+            error = _validate(schema, attrs)
+            self.assertIsNotNone(error)
+            self.assertEqual(_validate_compiled(schema, attrs), error)
+
+    def test_empty_numeric_range(self):
+        schema = etad.AttributeContainerSchema(schema={
+            "speed": etad.NumericAttributeSchema("speed")})
+        attrs = [etad.NumericAttribute("speed", 1)]
+        error = _validate(schema, attrs)
+        self.assertIsNotNone(error)
+        self.assertEqual(_validate_compiled(schema, attrs), error)
+
+    def test_compiled_schema_is_a_snapshot(self):
+        schema = _make_schema()
+        compiled = schema.compile()
+        schema.schema["color"].categories.add("blue")
+        with self.assertRaises(etad.AttributeContainerSchemaError):
+            compiled.validate_attributes(
+                [etad.CategoricalAttribute("color", "blue")])
+        schema.compile().validate_attributes(
+            [etad.CategoricalAttribute("color", "blue")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+'''
+Tests for the `eta.core.serial` module.
+
+Copyright 2017-2018, Voxel51, Inc.
+voxel51.com
+'''
+# pragma pylint: disable=redefined-builtin
+# pragma pylint: disable=unused-wildcard-import
+# pragma pylint: disable=wildcard-import
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from builtins import *
+# pragma pylint: enable=redefined-builtin
+# pragma pylint: enable=unused-wildcard-import
+# pragma pylint: enable=wildcard-import
+
+import os
+import unittest
+
+import numpy as np
+
+import eta.core.data as etad
+import eta.core.events as etae
+import eta.core.geometry as etag
+import eta.core.objects as etao
+import eta.core.serial as etas
+import eta.core.utils as etau
+
+
+class BinaryFileTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        chunks = [b"first", b"", b"third" * 1000]
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "data.etab")
+            with etas.BinaryFileWriter(path) as writer:
+                writer.header["version"] = 1
+                writer.write_chunk(chunks[0], first=1, last=10)
+                writer.write_chunk(chunks[1], first=11, last=20)
+                writer.write_chunk(chunks[2])
+
+            with etas.BinaryFileReader(path) as reader:
+                self.assertEqual(reader.header, {"version": 1})
+                self.assertEqual(reader.num_chunks, 3)
+                self.assertEqual(
+                    [reader.read_chunk(idx) for idx in (2, 0, 1)],
+                    [chunks[2], chunks[0], chunks[1]])
+
+    def test_find_chunks(self):
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "data.etab")
+            with etas.BinaryFileWriter(path) as writer:
+                writer.write_chunk(b"a", first=1, last=10)
+                writer.write_chunk(b"b", first=11, last=20)
+                writer.write_chunk(b"c")
+
+            with etas.BinaryFileReader(path) as reader:
+                self.assertEqual(reader.find_chunks(5, 5), [0, 2])
+                self.assertEqual(reader.find_chunks(10, 11), [0, 1, 2])
+                self.assertEqual(reader.find_chunks(21, 30), [2])
+
+    def test_invalid_files(self):
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "data.etab")
+            with etas.BinaryFileWriter(path) as writer:
+                writer.write_chunk(b"data")
+            with open(path, "rb") as f:
+                data = f.read()
+
+            with open(path, "wb") as f:
+                f.write(data[:-4])
+            with self.assertRaises(etas.BinaryFileError):
+                etas.BinaryFileReader(path)
+
+            with open(path, "wb") as f:
+                f.write(b"{}")
+            with self.assertRaises(etas.BinaryFileError):
+                etas.BinaryFileReader(path)
+
+    def test_failed_writes_are_discarded(self):
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "data.etab")
+            with self.assertRaises(ValueError):
+                with etas.BinaryFileWriter(path) as writer:
+                    writer.write_chunk(b"a", first=1, last=10)
+                    raise ValueError("Failed to write chunk")
+
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+
+class SerializableBinaryTest(unittest.TestCase):
+
+    def test_default_round_trip(self):
+        attr = etad.CategoricalAttribute("color", "red", confidence=0.5)
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "attr.etab")
+            attr.write_binary(path)
+            attr2 = etad.Attribute.from_binary(path)
+        self.assertEqual(attr2.serialize(), attr.serialize())
+
+    def test_event_detection_round_trip(self):
+        bools = [True, False, False, True, True] * 3 + [False]
+        detection = etae.EventDetection(bools)
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "detection.etab")
+            detection.write_binary(path)
+            detection2 = etae.EventDetection.from_binary(path)
+        self.assertEqual(
+            np.asarray(detection2.bools, dtype=bool).tolist(), bools)
+
+    def test_detected_objects_round_trip(self):
+        objects = etao.DetectedObjectContainer()
+        for frame_number in range(1, 8):
+            objects.add(etao.DetectedObject(
+                "car", etag.BoundingBox(
+                    etag.RelativePoint(0.1, 0.2),
+                    etag.RelativePoint(0.3, 0.4)),
+                frame_number=frame_number))
+
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "objects.etab")
+            objects.write_binary(path, objects_per_chunk=3)
+            with etas.BinaryFileReader(path) as reader:
+                self.assertEqual(
+                    [(c["first"], c["last"]) for c in reader.chunks],
+                    [(1, 3), (4, 6), (7, 7)])
+            objects2 = etao.DetectedObjectContainer.from_binary(path)
+        self.assertEqual(objects2.serialize(), objects.serialize())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,747 @@
+'''
+Tests for the `eta.core.video` module.
+
+Copyright 2017-2018, Voxel51, Inc.
+voxel51.com
+'''
+# pragma pylint: disable=redefined-builtin
+# pragma pylint: disable=unused-wildcard-import
+# pragma pylint: disable=wildcard-import
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+from builtins import *
+# pragma pylint: enable=redefined-builtin
+# pragma pylint: enable=unused-wildcard-import
+# pragma pylint: enable=wildcard-import
+
+import json
+import os
+import unittest
+
+import numpy as np
+
+import eta.core.data as etad
+import eta.core.events as etae
+import eta.core.geometry as etag
+import eta.core.objects as etao
+import eta.core.utils as etau
+import eta.core.video as etav
+
+
+def _make_series(*ranges):
+    return etae.EventSeries([etae.Event(a, b) for a, b in ranges])
+
+
+class FrameRangesTest(unittest.TestCase):
+
+    def test_str_round_trip(self):
+        ranges = etav.FrameRanges.from_str("1-3,6,8-10")
+        self.assertEqual(ranges.to_str(), "1-3,6,8-10")
+        self.assertEqual(ranges.num_ranges, 3)
+        self.assertEqual(ranges.num_frames, 7)
+        self.assertEqual(ranges.to_list(), [1, 2, 3, 6, 8, 9, 10])
+
+    def test_invalid_ranges(self):
+        with self.assertRaises(etav.FrameRangeError):
+            etav.FrameRanges([(5, 4)])
+        with self.assertRaises(etav.FrameRangesError):
+            etav.FrameRanges([(1, 5), (5, 10)])
+        with self.assertRaises(etav.FrameRangesError):
+            etav.FrameRanges([(6, 10), (1, 5)])
+
+    def test_from_list(self):
+        ranges = etav.FrameRanges.from_list([10, 1, 2, 3, 6, 8, 9, 2])
+        self.assertEqual(ranges.to_str(), "1-3,6,8-10")
+        self.assertEqual(etav.FrameRanges.from_list([]).num_ranges, 0)
+
+    def test_from_mask(self):
+        mask = [True, True, False, False, True, False, True]
+        ranges = etav.FrameRanges.from_mask(mask)
+        self.assertEqual(ranges.to_str(), "1-2,5,7")
+        self.assertEqual(ranges.contains(np.arange(1, 8)).tolist(), mask)
+
+    def test_contains(self):
+        ranges = etav.FrameRanges.from_str("3-5,9")
+        self.assertEqual(
+            ranges.contains([1, 3, 5, 6, 9, 10]).tolist(),
+            [False, True, True, False, True, False])
+        self.assertIn(4, ranges)
+        self.assertNotIn(8, ranges)
+
+    def test_contains_empty(self):
+        ranges = etav.FrameRanges([])
+        self.assertEqual(ranges.contains([1, 2]).tolist(), [False, False])
+        self.assertEqual(ranges.contains(np.zeros((2, 3))).shape, (2, 3))
+        self.assertNotIn(1, ranges)
+
+    def test_set_algebra(self):
+        a = etav.FrameRanges.from_str("1-10,20-30")
+        b = etav.FrameRanges.from_str("5-25,40")
+        self.assertEqual(a.union(b).to_str(), "1-30,40")
+        self.assertEqual(a.intersection(b).to_str(), "5-10,20-25")
+        self.assertEqual(a.difference(b).to_str(), "1-4,26-30")
+        self.assertEqual(b.difference(a).to_str(), "11-19,40")
+
+    def test_set_algebra_matches_sets(self):
+        rng = np.random.RandomState(0)
+        for _ in range(20):
+            a = rng.rand(100) < 0.5
+            b = rng.rand(100) < 0.5
+            ra = etav.FrameRanges.from_mask(a)
+            rb = etav.FrameRanges.from_mask(b)
+            sa = set(ra.to_list())
+            sb = set(rb.to_list())
+            self.assertEqual(ra.union(rb).to_list(), sorted(sa | sb))
+            self.assertEqual(
+                ra.intersection(rb).to_list(), sorted(sa & sb))
+            self.assertEqual(ra.difference(rb).to_list(), sorted(sa - sb))
+
+    def test_iteration(self):
+        ranges = etav.FrameRanges.from_str("2-3,7")
+        frames = []
+        new_ranges = []
+        for frame_number in ranges:
+            frames.append(frame_number)
+            new_ranges.append(ranges.is_new_frame_range)
+        self.assertEqual(frames, [2, 3, 7])
+        self.assertEqual(new_ranges, [True, False, True])
+        self.assertEqual(ranges.frame_range, (7, 7))
+
+    def test_select_filter(self):
+        ranges = etav.FrameRanges.from_str("1-5,10")
+        self.assertEqual(
+            ranges.to_select_filter(),
+            "select='between(n\\,0\\,4)+eq(n\\,9)'")
+
+
+class FrameRangesFromEventSeriesTest(unittest.TestCase):
+
+    def test_adjacent_events_are_not_merged(self):
+        series = _make_series((1, 5), (6, 10), (20, 30))
+        ranges = etav.FrameRanges.from_event_series(series)
+        self.assertEqual(ranges.to_str(), series.to_str())
+        self.assertEqual(ranges.num_ranges, 3)
+
+    def test_overlapping_events_are_merged(self):
+        series = _make_series((20, 30), (1, 5), (3, 8), (8, 9))
+        ranges = etav.FrameRanges.from_event_series(series)
+        self.assertEqual(ranges.to_str(), "1-9,20-30")
+
+    def test_nested_events_are_merged(self):
+        series = _make_series((1, 10), (2, 3), (4, 12))
+        ranges = etav.FrameRanges.from_event_series(series)
+        self.assertEqual(ranges.to_str(), "1-12")
+
+    def test_empty_series(self):
+        ranges = etav.FrameRanges.from_event_series(_make_series())
+        self.assertEqual(ranges.num_ranges, 0)
+
+
+class SmartCutEncodingTest(unittest.TestCase):
+
+    def test_matches_h264_parameters(self):
+        out_opts = etav._get_matching_h264_out_opts({
+            "codec_name": "h264", "profile": "Main", "pix_fmt": "yuv420p",
+            "width": 640, "height": 360, "level": 31})
+        self.assertEqual(
+            out_opts[out_opts.index("-profile:v") + 1], "main")
+        self.assertEqual(out_opts[out_opts.index("-level") + 1], "3.1")
+        self.assertEqual(out_opts[out_opts.index("-s") + 1], "640x360")
+        self.assertEqual(
+            out_opts[out_opts.index("-pix_fmt") + 1], "yuv420p")
+
+    def test_unmatchable_streams_are_not_copied(self):
+        self.assertIsNone(etav._get_matching_h264_out_opts({
+            "codec_name": "h264", "profile": "High 10",
+            "pix_fmt": "yuv420p10le", "width": 640, "height": 360}))
+        self.assertIsNone(etav._get_matching_h264_out_opts({
+            "codec_name": "hevc", "profile": "Main", "pix_fmt": "yuv420p",
+            "width": 640, "height": 360}))
+
+
+class _FakeFrameCache(etav.FrameCache):
+    # A FrameCache whose "videos" are decoded into arrays of zeros, so that
+    # its bookkeeping can be tested without ffmpeg
+
+    def __init__(self, cache_dir, max_bytes=None, num_frames=4):
+        super(_FakeFrameCache, self).__init__(cache_dir, max_bytes=max_bytes)
+        self.num_frames = num_frames
+        self.num_decodes = 0
+
+    def get_path(self, video_path, size=None, pix_fmt="rgb24"):
+        return os.path.join(self.cache_dir, "%s.npy" % video_path)
+
+    def get_entry_size(self, video_path, size=None, pix_fmt="rgb24"):
+        return self.num_frames * 2 * 2 * 3
+
+    def _decode(self, video_path, path, size, pix_fmt):
+        self.num_decodes += 1
+        etau.ensure_dir(self.cache_dir)
+        np.save(path, np.zeros((self.num_frames, 2, 2, 3), dtype=np.uint8))
+        return np.load(path, mmap_mode="r")
+
+
+class FrameCacheTest(unittest.TestCase):
+
+    def test_entries_are_decoded_once(self):
+        with etau.TempDir() as cache_dir:
+            cache = _FakeFrameCache(cache_dir)
+            self.assertEqual(cache.get("video").shape, (4, 2, 2, 3))
+            self.assertEqual(cache.get("video").shape, (4, 2, 2, 3))
+            self.assertEqual(cache.num_decodes, 1)
+
+    def test_entries_larger_than_cache_are_refused(self):
+        with etau.TempDir() as cache_dir:
+            cache = _FakeFrameCache(cache_dir, max_bytes=47)
+            self.assertFalse(cache.can_cache("video"))
+            with self.assertRaises(etav.FrameCacheError):
+                cache.get("video")
+            self.assertEqual(cache.num_decodes, 0)
+            self.assertFalse(os.path.exists(cache.get_path("video")))
+
+    def test_entries_that_fit_are_cached(self):
+        with etau.TempDir() as cache_dir:
+            cache = _FakeFrameCache(cache_dir, max_bytes=48)
+            self.assertTrue(cache.can_cache("video"))
+            cache.get("video")
+            self.assertEqual(cache.num_decodes, 1)
+
+    def test_videos_without_frame_counts_are_not_cached(self):
+        get_frame_count = etav.get_frame_count
+        etav.get_frame_count = lambda *args, **kwargs: 0
+        try:
+            with etau.TempDir() as cache_dir:
+                cache = etav.FrameCache(cache_dir)
+                with self.assertRaises(etav.FrameCacheError):
+                    cache._decode(
+                        "frames/%05d.png",
+                        os.path.join(cache_dir, "frames.npy"), None, "rgb24")
+        finally:
+            etav.get_frame_count = get_frame_count
+
+
+def _make_frame_labels(frame_number, value):
+    frame_labels = etav.VideoFrameLabels(frame_number)
+    frame_labels.add_frame_attribute(
+        etad.CategoricalAttribute("label", value))
+    return frame_labels
+
+
+class VideoLabelsJSONTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "labels.json")
+            with etav.VideoLabelsJSONWriter(path) as writer:
+                for frame_number in range(1, 11):
+                    writer.add_frame(_make_frame_labels(
+                        frame_number, 'a "{[\\%d' % frame_number))
+
+            with etav.VideoLabelsJSONReader(path, chunk_size=7) as reader:
+                frames = [fl.serialize() for fl in reader]
+
+            labels = etav.VideoLabels.from_json(path)
+            self.assertEqual(
+                frames, [labels[fn].serialize() for fn in range(1, 11)])
+
+    def test_read_frames(self):
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "labels.json")
+            with etav.VideoLabelsJSONWriter(path) as writer:
+                for frame_number in range(1, 11):
+                    writer.add_frame(_make_frame_labels(
+                        frame_number, '}"]\\'))
+
+            for ascending in (True, False):
+                with etav.VideoLabelsJSONReader(
+                        path, frames="2-3,7", ascending=ascending,
+                        chunk_size=5) as reader:
+                    frame_numbers = [fl.frame_number for fl in reader]
+                self.assertEqual(frame_numbers, [2, 3, 7])
+
+    def test_unrequested_frames_are_not_decoded(self):
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "labels.json")
+            with open(path, "wt") as f:
+                f.write(
+                    '{"frames": {"1": {"frame_number": 1}, '
+                    '"2": {"not a": ["frame", "}"]}, '
+                    '"3": {"frame_number": 3}, "4": not JSON')
+
+            with etav.VideoLabelsJSONReader(
+                    path, frames="1,3", ascending=True,
+                    chunk_size=3) as reader:
+                frame_numbers = [fl.frame_number for fl in reader]
+            self.assertEqual(frame_numbers, [1, 3])
+
+    def test_read_frames_out_of_order(self):
+        labels = etav.VideoLabels()
+        for frame_number in (5, 1, 9, 3):
+            labels.add_frame(_make_frame_labels(frame_number, "label"))
+
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "labels.json")
+            labels.write_json(path)
+
+            with etav.VideoLabelsJSONReader(path, frames="1-3") as reader:
+                frame_numbers = [fl.frame_number for fl in reader]
+            self.assertEqual(frame_numbers, [1, 3])
+
+            with etav.VideoLabelsJSONReader(
+                    path, frames="1-9", ascending=True) as reader:
+                with self.assertRaises(etav.VideoLabelsJSONError):
+                    list(reader)
+
+
+class _FakeVideoIndex(object):
+
+    def __init__(self, num_frames, keyframes):
+        self.num_frames = num_frames
+        self.keyframes = np.array(keyframes, dtype=np.int64)
+
+
+class SplitRangesAtKeyframesTest(unittest.TestCase):
+
+    def test_segments_start_on_keyframes(self):
+        index = _FakeVideoIndex(100, [1, 30, 61, 90])
+        segments = etav._split_ranges_at_keyframes([(1, 100)], index, 25)
+        self.assertEqual(
+            segments, [[(1, 29)], [(30, 60)], [(61, 89)], [(90, 100)]])
+
+    def test_requested_ranges_are_split_at_segments(self):
+        index = _FakeVideoIndex(100, [1, 30, 61, 90])
+        segments = etav._split_ranges_at_keyframes(
+            [(5, 10), (55, 65), (95, 120)], index, 50)
+        self.assertEqual(
+            segments, [[(5, 10), (55, 60)], [(61, 65), (95, 120)]])
+
+    def test_no_keyframes(self):
+        index = _FakeVideoIndex(100, [1])
+        segments = etav._split_ranges_at_keyframes(
+            [(5, 10), (50, 60)], index, 10)
+        self.assertEqual(segments, [[(5, 10), (50, 60)]])
+
+
+class StreamInfoCacheTest(unittest.TestCase):
+
+    def test_invalid_entries_are_dropped(self):
+        with etau.TempDir() as tmp_dir:
+            video_path = os.path.join(tmp_dir, "video.mp4")
+            with open(video_path, "wb") as f:
+                f.write(b"video")
+
+            path, size, mtime = etav._get_stream_info_cache_key(video_path)
+            stream_info = {"codec_name": "h264"}
+            entries = [
+                {"path": path, "size": size, "mtime": mtime,
+                 "stream_info": stream_info},
+                {"path": "missing-size", "mtime": mtime, "stream_info": {}},
+                {"path": "missing-mtime", "size": size, "stream_info": {}},
+                {"path": "bad-info", "size": size, "mtime": mtime,
+                 "stream_info": None},
+                {"path": path, "size": str(size), "mtime": mtime,
+                 "stream_info": {}},
+            ]
+            cache_path = os.path.join(tmp_dir, "cache.jsonl")
+            with open(cache_path, "wt") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+                f.write('{"path": "truncated", "si')
+
+            cache = etav.StreamInfoCache(cache_path=cache_path)
+            self.assertEqual(len(cache), 1)
+            self.assertEqual(cache.get(video_path), stream_info)
+
+
+def _make_video_labels():
+    labels = etav.VideoLabels()
+    labels.add_frame_attribute(
+        etad.CategoricalAttribute("weather", "rain"), 1)
+    labels.add_frame_attribute(
+        etad.NumericAttribute("speed", 0.2, confidence=0.9), 1)
+    labels.add_frame_attribute(
+        etad.CategoricalAttribute("weather", "rain"), 3)
+
+    def _make_car(frame_number):
+        car = etao.DetectedObject(
+            "car", etag.BoundingBox(
+                etag.RelativePoint(0.1, 0.2), etag.RelativePoint(0.3, 0.4)),
+            confidence=0.75, index=2, frame_number=frame_number)
+        car.add_attribute(etad.CategoricalAttribute("color", "red"))
+        return car
+
+    def _make_person():
+        return etao.DetectedObject(
+            "person", etag.BoundingBox(
+                etag.RelativePoint(0.5, 0.5), etag.RelativePoint(0.6, 0.9)),
+            score=0.125, index_in_frame=0)
+
+    labels.add_objects(etao.DetectedObjectContainer(
+        objects=[_make_car(1), _make_person()]), 1)
+    labels.add_object(_make_person(), 2)
+    labels.add_object(_make_car(5), 5)
+    return labels
+
+
+def _serialize_frames(labels):
+    return [labels[frame_number].serialize() for frame_number in labels]
+
+
+def _normalize_schema(d):
+    # Categories are stored in sets, so their serialized order is arbitrary
+    if isinstance(d, dict):
+        return {k: _normalize_schema(v) for k, v in d.items()}
+    if isinstance(d, list):
+        return sorted(d)
+    return d
+
+
+class VideoLabelsSchemaTest(unittest.TestCase):
+
+    def test_labels_satisfy_their_active_schema(self):
+        labels = _make_video_labels()
+        labels.set_schema(labels.get_active_schema())
+        self.assertTrue(labels.has_schema)
+
+    def test_invalid_labels_are_rejected(self):
+        labels = _make_video_labels()
+        labels.set_schema(labels.get_active_schema())
+        with self.assertRaises(etad.AttributeContainerSchemaError):
+            labels.add_frame_attribute(
+                etad.CategoricalAttribute("weather", "sun"), 4)
+        with self.assertRaises(etad.AttributeContainerSchemaError):
+            labels.add_frame_attribute(
+                etad.NumericAttribute("speed", 0.5), 4)
+        with self.assertRaises(etad.AttributeSchemaError):
+            labels.add_frame_attribute(
+                etad.NumericAttribute("weather", 0.2), 4)
+
+        obj = labels[1].objects.objects[0]
+        obj.label = "truck"
+        with self.assertRaises(etav.VideoLabelsSchemaError):
+            labels.add_object(obj, 4)
+        self.assertFalse(labels.has_frame(4))
+
+    def test_set_schema_validates_existing_labels(self):
+        labels = _make_video_labels()
+        schema = labels.get_active_schema()
+        labels.add_frame_attribute(
+            etad.CategoricalAttribute("weather", "sun"), 4)
+        with self.assertRaises(etad.AttributeContainerSchemaError):
+            labels.set_schema(schema)
+
+    def test_add_frames_is_atomic(self):
+        labels = _make_video_labels()
+        labels.set_schema(labels.get_active_schema())
+        good = _make_frame_labels(6, "rain")
+        good.attrs.attrs[0].name = "weather"
+        bad = _make_frame_labels(7, "sun")
+        bad.attrs.attrs[0].name = "weather"
+        with self.assertRaises(etad.AttributeContainerSchemaError):
+            labels.add_frames([good, bad])
+        self.assertFalse(labels.has_frame(6))
+
+        labels.add_frames([good])
+        self.assertTrue(labels.has_frame(6))
+
+    def test_assigned_schema_is_enforced(self):
+        labels = _make_video_labels()
+        labels.freeze_schema()
+        car = labels[1].objects.objects[0]
+
+        schema = etav.VideoLabelsSchema()
+        schema.add_object_label("person")
+        labels.schema = schema
+        with self.assertRaises(etav.VideoLabelsSchemaError):
+            labels.add_object(car, 4)
+
+        labels.schema.add_object_attributes("car", car.attrs)
+        labels.add_object(car, 4)
+        self.assertTrue(labels.has_frame(4))
+
+    def test_active_schema_is_maintained(self):
+        labels = _make_video_labels()
+        labels.get_active_schema()
+        labels.add_frame_attribute(
+            etad.CategoricalAttribute("weather", "sun"), 4)
+        labels.add_frames([_make_frame_labels(6, "x")])
+        labels.add_frame(_make_frame_labels(1, "y"))
+        labels.delete_frame(2)
+        self.assertEqual(
+            _normalize_schema(labels.get_active_schema().serialize()),
+            _normalize_schema(
+                etav.VideoLabelsSchema.build_active_schema(labels)
+                .serialize()))
+
+    def test_active_schema_reflects_in_place_edits(self):
+        labels = _make_video_labels()
+        labels.get_active_schema()
+        labels.get_frame(1).add_object(etao.DetectedObject(
+            "bus", etag.BoundingBox(
+                etag.RelativePoint(0.1, 0.1), etag.RelativePoint(0.2, 0.2))))
+        labels.frames[7] = etav.VideoFrameLabels(7)
+        labels.frames[7].add_frame_attribute(
+            etad.CategoricalAttribute("time", "night"))
+        schema = labels.get_active_schema()
+        self.assertTrue(schema.has_object_label("bus"))
+        self.assertTrue(schema.has_frame_attribute("time"))
+
+
+class ColumnarVideoLabelsTest(unittest.TestCase):
+
+    def test_video_labels_round_trip(self):
+        labels = _make_video_labels()
+        columnar = etav.ColumnarVideoLabels.from_video_labels(labels)
+        self.assertEqual(len(columnar), 4)
+        self.assertEqual(columnar.num_objects, 4)
+        self.assertEqual(
+            _serialize_frames(columnar.to_video_labels()),
+            _serialize_frames(labels))
+
+    def test_json_round_trip(self):
+        labels = _make_video_labels()
+        columnar = etav.ColumnarVideoLabels.from_video_labels(labels)
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "labels.json")
+            columnar.write_json(path)
+            columnar2 = etav.ColumnarVideoLabels.from_json(path)
+        self.assertEqual(
+            _serialize_frames(columnar2.to_video_labels()),
+            _serialize_frames(labels))
+
+    def test_bytes_round_trip(self):
+        labels = _make_video_labels()
+        columnar = etav.ColumnarVideoLabels.from_video_labels(labels)
+        columnar2 = etav.ColumnarVideoLabels.from_bytes(columnar.to_bytes())
+        for name in etav.ColumnarVideoLabels._ARRAY_ATTRS:
+            self.assertTrue(np.array_equal(
+                getattr(columnar, name), getattr(columnar2, name),
+                equal_nan=name in ("obj_confidences", "obj_scores")))
+        self.assertEqual(
+            _serialize_frames(columnar2.to_video_labels()),
+            _serialize_frames(labels))
+
+    def test_queries(self):
+        columnar = etav.ColumnarVideoLabels.from_video_labels(
+            _make_video_labels())
+        self.assertEqual(columnar.find_objects(labels="car").tolist(), [0, 3])
+        self.assertEqual(
+            columnar.find_objects(labels=["car", "person"], frames="2-5")
+            .tolist(), [2, 3])
+        self.assertEqual(
+            columnar.find_objects(frames=etav.FrameRanges([])).tolist(), [])
+        self.assertEqual(
+            columnar.find_objects(min_confidence=0.5).tolist(), [0, 3])
+        self.assertEqual(columnar.count_objects().tolist(), [2, 1, 0, 1])
+        self.assertEqual(
+            columnar.count_objects(labels="person").tolist(), [1, 1, 0, 0])
+        self.assertEqual(columnar.get_frame_object_inds(1).tolist(), [0, 1])
+        self.assertFalse(columnar.has_frame(4))
+        self.assertEqual(len(columnar.get_frame(4).objects), 0)
+
+
+class VideoLabelsBinaryTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        labels = _make_video_labels()
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "labels.etab")
+            labels.write_binary(path, frames_per_chunk=2)
+            labels2 = etav.VideoLabels.from_binary(path)
+        self.assertEqual(
+            _serialize_frames(labels2), _serialize_frames(labels))
+
+    def test_values_are_not_rounded(self):
+        labels = etav.VideoLabels()
+        labels.add_object(etao.DetectedObject(
+            "car", etag.BoundingBox(
+                etag.RelativePoint(0.1234567891, 0.2),
+                etag.RelativePoint(0.3, 0.4)),
+            confidence=0.91234567891, score=1.0 / 3), 1)
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "labels.etab")
+            labels.write_binary(path)
+            labels2 = etav.VideoLabels.from_binary(path)
+        self.assertEqual(
+            _serialize_frames(labels2), _serialize_frames(labels))
+
+    def test_read_frames(self):
+        labels = _make_video_labels()
+        with etau.TempDir() as tmp_dir:
+            path = os.path.join(tmp_dir, "labels.etab")
+            labels.write_binary(path, frames_per_chunk=2)
+            labels2 = etav.VideoLabels.from_binary(path, frames="2-3")
+            self.assertEqual(sorted(labels2.frames), [2, 3])
+            self.assertEqual(
+                labels2[3].serialize(), labels[3].serialize())
+
+            with etav.VideoLabelsBinaryReader(path) as reader:
+                self.assertTrue(reader.has_frame(5))
+                self.assertFalse(reader.has_frame(4))
+                self.assertEqual(
+                    reader[5].serialize(), labels[5].serialize())
+                self.assertEqual(
+                    [fl.frame_number for fl in reader], [1, 2, 3, 5])
+
+
+def _make_gps_metadata(waypoints):
+    return etav.VideoMetadata(
+        frame_rate=1, total_frame_count=101, duration=100,
+        gps_waypoints=[
+            etav.GPSWaypoint(lat, lon, frame_number)
+            for frame_number, lat, lon in waypoints])
+
+
+class VideoMetadataGPSTest(unittest.TestCase):
+
+    def test_no_gps(self):
+        metadata = etav.VideoMetadata()
+        self.assertIsNone(metadata.get_gps_location(frame_number=1))
+        self.assertIsNone(metadata.get_gps_locations(frame_numbers=[1]))
+
+    def test_nearest(self):
+        # Waypoints need not be sorted
+        metadata = _make_gps_metadata(
+            [(21, 2.0, 20.0), (1, 1.0, 10.0), (41, 3.0, 30.0)])
+        locations = metadata.get_gps_locations(
+            frame_numbers=[-5, 1, 10, 11, 12, 31, 41, 100])
+        self.assertEqual(
+            locations[:, 0].tolist(),
+            [1.0, 1.0, 1.0, 1.0, 2.0, 2.0, 3.0, 3.0])
+        self.assertEqual(
+            metadata.get_gps_location(frame_number=30), (2.0, 20.0))
+        self.assertEqual(
+            metadata.get_gps_location(timestamp=40), (3.0, 30.0))
+
+    def test_linear(self):
+        metadata = _make_gps_metadata([(1, 0.0, 10.0), (11, 10.0, 30.0)])
+        locations = metadata.get_gps_locations(
+            frame_numbers=[0, 1, 6, 11, 20], method="linear")
+        np.testing.assert_allclose(
+            locations,
+            [[0, 10], [0, 10], [5, 20], [10, 30], [10, 30]])
+
+        locations = metadata.get_gps_locations(
+            timestamps=[2.5], method="linear")
+        np.testing.assert_allclose(locations, [[2.5, 15]])
+
+    def test_great_circle(self):
+        metadata = _make_gps_metadata(
+            [(1, 0.0, 0.0), (11, 0.0, 90.0), (21, 90.0, 90.0)])
+        locations = metadata.get_gps_locations(
+            frame_numbers=[1, 6, 11, 16, 21], method="great_circle")
+        np.testing.assert_allclose(
+            locations, [[0, 0], [0, 45], [0, 90], [45, 90], [90, 90]],
+            atol=1e-9)
+
+    def test_single_waypoint(self):
+        metadata = _make_gps_metadata([(5, 1.0, 2.0)])
+        for method in ("nearest", "linear", "great_circle"):
+            locations = metadata.get_gps_locations(
+                frame_numbers=[1, 5, 10], method=method)
+            self.assertEqual(locations.tolist(), [[1.0, 2.0]] * 3)
+
+    def test_unsupported_method(self):
+        metadata = _make_gps_metadata([(1, 0.0, 0.0), (11, 1.0, 1.0)])
+        with self.assertRaises(ValueError):
+            metadata.get_gps_locations(frame_numbers=[1], method="cubic")
+        metadata = _make_gps_metadata([(5, 1.0, 2.0)])
+        with self.assertRaises(ValueError):
+            metadata.get_gps_locations(frame_numbers=[1], method="cubic")
+
+
+class _FakeFFmpeg(object):
+    # Streams 10 fps video whose frames are filled with their frame numbers
+    # (mod 256), starting at the frame seeked to via the "-ss" input option
+
+    def __init__(self, num_frames, in_opts=None):
+        self.num_frames = num_frames
+        self.frame_number = 1
+        if in_opts:
+            self.frame_number = int(np.floor(float(in_opts[1]) * 10)) + 2
+
+    def run(self, inpath, outpath):
+        pass
+
+    def read_into(self, arr):
+        if self.frame_number > self.num_frames:
+            return 0
+        arr[...] = self.frame_number % 256
+        self.frame_number += 1
+        return arr.nbytes
+
+    def close(self):
+        pass
+
+
+class _FakeFFmpegVideoReader(etav.FFmpegVideoReader):
+    # An FFmpegVideoReader that records its seeks and reads from _FakeFFmpeg
+
+    NUM_FRAMES = 1000
+
+    def __init__(self, inpath, **kwargs):
+        self.seeks = []
+        self.num_processes = 0
+        stream_info = etav.VideoStreamInfo({
+            "width": 4, "height": 2, "avg_frame_rate": "10/1",
+            "nb_frames": str(self.NUM_FRAMES), "codec_tag_string": "avc1"})
+        super(_FakeFFmpegVideoReader, self).__init__(
+            inpath, stream_info=stream_info, **kwargs)
+
+    def _new_ffmpeg(self, in_opts=None):
+        self.num_processes += 1
+        if in_opts:
+            self.seeks.append(float(in_opts[1]))
+        return _FakeFFmpeg(self.NUM_FRAMES, in_opts=in_opts)
+
+
+def _build_fake_video_index(cls, inpath):
+    num_frames = _FakeFFmpegVideoReader.NUM_FRAMES
+    return cls(
+        np.arange(num_frames) / 10.0, np.arange(1, num_frames + 1, 50))
+
+
+class FFmpegVideoReaderSeekTest(unittest.TestCase):
+
+    def setUp(self):
+        self._build_for = etav.VideoIndex.__dict__["build_for"]
+        etav.VideoIndex.build_for = classmethod(_build_fake_video_index)
+
+    def tearDown(self):
+        etav.VideoIndex.build_for = self._build_for
+
+    def _read(self, frames, **kwargs):
+        with etau.TempDir() as tmp_dir:
+            inpath = os.path.join(tmp_dir, "video.mp4")
+            with _FakeFFmpegVideoReader(
+                    inpath, frames=frames, **kwargs) as r:
+                imgs = [int(img[0, 0, 0]) for img in r]
+        self.num_processes = r.num_processes
+        return imgs, r.seeks
+
+    def test_sparse_frames_are_seeked_by_default(self):
+        imgs, seeks = self._read([1, 500, 501, 900])
+        self.assertEqual(imgs, [1, 500 % 256, 501 % 256, 900 % 256])
+        self.assertEqual(len(seeks), 2)
+
+    def test_first_frame_is_seeked_directly(self):
+        imgs, seeks = self._read("500-502")
+        self.assertEqual(imgs, [500 % 256, 501 % 256, 502 % 256])
+        self.assertEqual(len(seeks), 1)
+        self.assertEqual(self.num_processes, 1)
+
+    def test_dense_frames_are_not_seeked(self):
+        imgs, seeks = self._read("1-10,200-210")
+        self.assertEqual(imgs, list(range(1, 11)) + list(range(200, 211)))
+        self.assertEqual(seeks, [])
+
+    def test_seeking_can_be_disabled(self):
+        imgs, seeks = self._read([1, 500, 900], index=False)
+        self.assertEqual(imgs, [1, 500 % 256, 900 % 256])
+        self.assertEqual(seeks, [])
+
+
+if __name__ == "__main__":
+    unittest.main()